@@ -0,0 +1,458 @@
+'''
+' A local stand-in for the kubernetes API server, serving the CoreV1Api
+' endpoints the rotator uses over real HTTP, with configurable cluster size
+' and injected latency. Calls are counted per endpoint.
+'
+' The server runs in a child process so its CPU and memory don't blur the
+' rotator's own numbers, and is driven through a few `/_fake/` control routes.
+'
+' @file: fake_kube.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import json
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote, unquote
+from urllib.request import Request, urlopen
+
+OLD_TIMESTAMP = "2020-01-01T00:00:00Z"
+COMPARTMENT = "ocid1.compartment.oc1..fake"
+
+ROUTES = [
+  ("GET", "/api/v1/nodes", "list_nodes"),
+  ("GET", "/api/v1/nodes/{name}", "read_node"),
+  ("PATCH", "/api/v1/nodes/{name}", "patch_node"),
+  ("DELETE", "/api/v1/nodes/{name}", "delete_node"),
+  ("GET", "/api/v1/namespaces", "list_namespaces"),
+  ("GET", "/api/v1/pods", "list_pods"),
+  ("GET", "/api/v1/namespaces/{namespace}/pods", "list_namespaced_pods"),
+  ("POST", "/api/v1/namespaces/{namespace}/pods/{name}/eviction", "evict_pod"),
+  ("DELETE", "/api/v1/namespaces/{namespace}/pods/{name}", "delete_pod"),
+  ("GET", "/apis/policy/v1/poddisruptionbudgets", "list_disruption_budgets"),
+]
+ROUTES = [
+  (method, template, re.compile("^" + re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", template) + "$"), action)
+  for method, template, action in ROUTES
+]
+
+CONTROL_ROUTES = [
+  ("GET", re.compile(r"^/_fake/calls$"), "control_calls"),
+  ("POST", re.compile(r"^/_fake/nodes$"), "control_add_node"),
+  ("DELETE", re.compile(r"^/_fake/nodes/(?P<provider_id>[^/]+)$"), "control_remove_node"),
+]
+
+
+class FakeCluster():
+  '''
+  ' In-memory cluster state, owned by the server process.
+  '''
+  def __init__(self, nodes=10, aged=None, namespaces=20, pods_per_node=10, termination_delay=0.0, seed=7):
+    self._lock = threading.RLock()
+    self._random = random.Random(seed)
+    self.termination_delay = termination_delay
+    self.resource_version = 1
+    self.nodes = {}
+    self.pods = {}
+    self.events = []
+    self.namespaces = [f"ns-{i}" for i in range(namespaces)]
+    self._pod_counter = 0
+
+    aged = nodes if aged is None else aged
+    for index in range(nodes):
+      self.add_node(created_at=OLD_TIMESTAMP if index < aged else None)
+    for node_name in list(self.nodes):
+      self._add_pod(node_name, "kube-system", owner="DaemonSet")
+      for _ in range(pods_per_node):
+        self._add_pod(node_name, self._random.choice(self.namespaces))
+
+  def add_node(self, created_at=None, pool="pool-1"):
+    with self._lock:
+      index = len(self.nodes)
+      while f"node-{index}" in self.nodes:
+        index += 1
+      name = f"node-{index}"
+      self.nodes[name] = {
+        "metadata": {
+          "name": name, "uid": f"uid-{name}", "resourceVersion": self._next_version(),
+          "creationTimestamp": created_at or _now(),
+          "labels": { "node-pool": pool, "topology.kubernetes.io/zone": f"zone-{index % 3}" },
+          "annotations": { "oci.oraclecloud.com/compartment-id": COMPARTMENT },
+        },
+        "spec": { "providerID": f"ocid1.instance.fake.{name}" },
+        "status": {
+          "conditions": [{ "type": "Ready", "status": "True" }],
+          "allocatable": { "cpu": "8", "memory": "32Gi", "pods": "110" },
+        },
+      }
+      self._emit("ADDED", self.nodes[name], "nodes")
+      return name
+
+  def remove_node(self, name):
+    with self._lock:
+      node = self.nodes.pop(name, None)
+      if node:
+        node["metadata"]["resourceVersion"] = self._next_version()
+        self._emit("DELETED", node, "nodes")
+
+  def node_by_provider_id(self, provider_id):
+    with self._lock:
+      for name, node in self.nodes.items():
+        if node["spec"]["providerID"] == provider_id:
+          return name
+    return None
+
+  def _add_pod(self, node_name, namespace, owner="ReplicaSet"):
+    self._pod_counter += 1
+    name = f"pod-{self._pod_counter}"
+    pod = {
+      "metadata": {
+        "name": name, "namespace": namespace, "uid": f"uid-{name}", "resourceVersion": self._next_version(),
+        "creationTimestamp": _now(),
+        "ownerReferences": [{ "apiVersion": "apps/v1", "kind": owner, "name": f"{owner.lower()}-1", "uid": "u" }],
+        "labels": { "app": f"app-{self._pod_counter % 5}" },
+      },
+      "spec": {
+        "nodeName": node_name,
+        "containers": [{
+          "name": "main", "image": f"registry.local/app-{self._pod_counter % 5}:1.0",
+          "resources": { "requests": { "cpu": "100m", "memory": "128Mi" } },
+        }],
+      },
+      "status": { "phase": "Running" },
+    }
+    self.pods[(namespace, name)] = pod
+    self._emit("ADDED", pod)
+    return pod
+
+  def evict(self, namespace, name):
+    with self._lock:
+      if (namespace, name) not in self.pods:
+        return False
+    if self.termination_delay:
+      threading.Timer(self.termination_delay, self._terminate, (namespace, name)).start()
+    else:
+      self._terminate(namespace, name)
+    return True
+
+  def _terminate(self, namespace, name):
+    # Evicted ReplicaSet pods come back on another schedulable node.
+    with self._lock:
+      pod = self.pods.pop((namespace, name), None)
+      if not pod:
+        return
+      pod["metadata"]["resourceVersion"] = self._next_version()
+      self._emit("DELETED", pod)
+
+      targets = [
+        n for n, node in self.nodes.items()
+        if not node["spec"].get("unschedulable") and n != pod["spec"]["nodeName"]
+      ]
+      if targets:
+        self._add_pod(self._random.choice(targets), namespace)
+
+  def _emit(self, kind, obj, resource="pods"):
+    self.events.append((int(obj["metadata"]["resourceVersion"]), resource, kind, json.loads(json.dumps(obj))))
+
+  def _next_version(self):
+    self.resource_version += 1
+    return str(self.resource_version)
+
+
+class FakeKubeServer():
+  '''
+  ' Parent-side handle: starts the server process and writes a kubeconfig for it.
+  '''
+  def __init__(self, latency=0.0, **cluster_options):
+    self.latency = latency
+    self.cluster_options = cluster_options
+    self.url = None
+    self.kubeconfig = None
+    self._process = None
+
+  def start(self):
+    parent, child = multiprocessing.Pipe()
+    self._process = multiprocessing.Process(
+      target=_serve, args=(child, self.latency, self.cluster_options), daemon=True
+    )
+    self._process.start()
+    self.url = parent.recv()
+
+    fd, self.kubeconfig = tempfile.mkstemp(prefix="fake-kube-", suffix=".yaml")
+    with os.fdopen(fd, "w") as f:
+      f.write(KUBECONFIG_TEMPLATE.format(url=self.url))
+    return self
+
+  def stop(self):
+    if self._process:
+      self._process.terminate()
+      self._process.join()
+    if self.kubeconfig and os.path.exists(self.kubeconfig):
+      os.remove(self.kubeconfig)
+
+  def take_calls(self):
+    # Returns and resets the per-endpoint call counts.
+    return Counter(self._control("GET", "/_fake/calls"))
+
+  def add_node(self, pool="pool-1"):
+    return self._control("POST", "/_fake/nodes", { "pool": pool })["name"]
+
+  def remove_node(self, provider_id):
+    self._control("DELETE", f"/_fake/nodes/{quote(provider_id, safe='')}")
+
+  def _control(self, method, path, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = Request(self.url + path, data=data, method=method)
+    request.add_header("Content-Type", "application/json")
+    with urlopen(request) as response:
+      return json.loads(response.read())
+
+
+def _serve(conn, latency, cluster_options):
+  state = _ServerState(FakeCluster(**cluster_options), latency)
+  server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(state))
+  server.daemon_threads = True
+  host, port = server.server_address
+  conn.send(f"http://{host}:{port}")
+  server.serve_forever()
+
+
+class _ServerState():
+  def __init__(self, cluster, latency):
+    self.cluster = cluster
+    self.latency = latency
+    self.calls = Counter()
+    self._calls_lock = threading.Lock()
+
+  def count(self, endpoint):
+    with self._calls_lock:
+      self.calls[endpoint] += 1
+
+  def take_calls(self):
+    with self._calls_lock:
+      calls, self.calls = self.calls, Counter()
+      return calls
+
+
+KUBECONFIG_TEMPLATE = '''apiVersion: v1
+kind: Config
+clusters:
+- name: fake
+  cluster:
+    server: {url}
+contexts:
+- name: fake
+  context:
+    cluster: fake
+    user: fake
+current-context: fake
+users:
+- name: fake
+  user:
+    token: fake
+'''
+
+
+def _handler_for(server):
+  cluster = server.cluster
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+      pass
+
+    def do_GET(self):
+      self._dispatch("GET")
+
+    def do_POST(self):
+      self._dispatch("POST")
+
+    def do_PATCH(self):
+      self._dispatch("PATCH")
+
+    def do_DELETE(self):
+      self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+      url = urlparse(self.path)
+      self.query = { k: v[0] for k, v in parse_qs(url.query).items() }
+      length = int(self.headers.get("Content-Length") or 0)
+      self.body = json.loads(self.rfile.read(length)) if length else None
+
+      for route_method, pattern, action in CONTROL_ROUTES:
+        match = pattern.match(url.path)
+        if route_method == method and match:
+          return getattr(self, action)(**match.groupdict())
+
+      for route_method, template, pattern, action in ROUTES:
+        match = pattern.match(url.path)
+        if route_method == method and match:
+          server.count(f"{method} {template}")
+          if server.latency:
+            time.sleep(server.latency)
+          return getattr(self, action)(**match.groupdict())
+      self._send(404, _status(404, "NotFound"))
+
+    def control_calls(self):
+      self._send(200, dict(server.take_calls()))
+
+    def control_add_node(self):
+      self._send(201, { "name": cluster.add_node(pool=(self.body or {}).get("pool", "pool-1")) })
+
+    def control_remove_node(self, provider_id):
+      name = cluster.node_by_provider_id(unquote(provider_id))
+      cluster.remove_node(name)
+      self._send(200, { "name": name })
+
+    def list_nodes(self):
+      if self.query.get("watch") in ("true", "1", "True"):
+        return self._watch("nodes", lambda node: _matches_labels(node, self.query.get("labelSelector")))
+      with cluster._lock:
+        nodes = [n for n in cluster.nodes.values() if _matches_labels(n, self.query.get("labelSelector"))]
+        self._send_list("NodeList", nodes)
+
+    def read_node(self, name):
+      with cluster._lock:
+        node = cluster.nodes.get(name)
+        self._send(200, node) if node else self._send(404, _status(404, "NotFound"))
+
+    def patch_node(self, name):
+      with cluster._lock:
+        node = cluster.nodes.get(name)
+        if not node:
+          return self._send(404, _status(404, "NotFound"))
+        node["spec"].update((self.body or {}).get("spec") or {})
+        node["metadata"]["resourceVersion"] = cluster._next_version()
+        cluster._emit("MODIFIED", node, "nodes")
+        self._send(200, node)
+
+    def delete_node(self, name):
+      cluster.remove_node(name)
+      self._send(200, _status(200, "Success"))
+
+    def list_namespaces(self):
+      items = [{ "metadata": { "name": ns } } for ns in cluster.namespaces]
+      self._send_list("NamespaceList", items)
+
+    def list_pods(self, namespace=None):
+      node_name = _node_selector(self.query.get("fieldSelector"))
+      if self.query.get("watch") in ("true", "1", "True"):
+        return self._watch("pods", lambda pod: not node_name or pod["spec"]["nodeName"] == node_name)
+      with cluster._lock:
+        pods = [
+          p for p in cluster.pods.values()
+          if (not node_name or p["spec"]["nodeName"] == node_name)
+          and (not namespace or p["metadata"]["namespace"] == namespace)
+        ]
+        self._send_list("PodList", pods)
+
+    def list_disruption_budgets(self):
+      # Every namespace guards its `app-0` pods with a budget allowing one disruption.
+      if self.query.get("watch") in ("true", "1", "True"):
+        return self._watch("poddisruptionbudgets", lambda pdb: True)
+      items = [
+        {
+          "metadata": { "name": "app-0", "namespace": ns },
+          "spec": { "selector": { "matchLabels": { "app": "app-0" } } },
+          "status": { "disruptionsAllowed": 1, "currentHealthy": 2, "desiredHealthy": 1, "expectedPods": 2 },
+        }
+        for ns in cluster.namespaces
+      ]
+      self._send_list("PodDisruptionBudgetList", items)
+
+    def list_namespaced_pods(self, namespace):
+      self.list_pods(namespace)
+
+    def evict_pod(self, namespace, name):
+      if cluster.evict(namespace, name):
+        self._send(201, _status(201, "Success"))
+      else:
+        self._send(404, _status(404, "NotFound"))
+
+    def delete_pod(self, namespace, name):
+      with cluster._lock:
+        pod = cluster.pods.get((namespace, name))
+      if not pod:
+        return self._send(404, _status(404, "NotFound"))
+      cluster._terminate(namespace, name)
+      self._send(200, pod)
+
+    def _watch(self, resource, matches):
+      # Streams events after the given resourceVersion until timeoutSeconds.
+      since = int(self.query.get("resourceVersion") or 0)
+      deadline = time.monotonic() + float(self.query.get("timeoutSeconds") or 30)
+      self.send_response(200)
+      # Chunked like the real API server, so clients see each event as it comes.
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Transfer-Encoding", "chunked")
+      self.send_header("Connection", "close")
+      self.end_headers()
+      try:
+        while time.monotonic() < deadline:
+          with cluster._lock:
+            events = [e for e in cluster.events if e[0] > since]
+          for version, event_resource, kind, obj in events:
+            since = version
+            if event_resource == resource and matches(obj):
+              self._write_chunk((json.dumps({ "type": kind, "object": obj }) + "\n").encode())
+          time.sleep(0.05)
+        self.wfile.write(b"0\r\n\r\n")
+      except (BrokenPipeError, ConnectionResetError):
+        pass
+      self.close_connection = True
+
+    def _write_chunk(self, data):
+      self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+      self.wfile.flush()
+
+    def _send_list(self, kind, items):
+      # Pages by offset, the continue token is the next index.
+      offset = int(self.query.get("continue") or 0)
+      limit = int(self.query.get("limit") or 0) or len(items)
+      page = items[offset:offset + limit]
+      metadata = { "resourceVersion": str(cluster.resource_version) }
+      if offset + limit < len(items):
+        metadata["continue"] = str(offset + limit)
+      self._send(200, { "kind": kind, "apiVersion": "v1", "metadata": metadata, "items": page })
+
+    def _send(self, status, payload):
+      data = json.dumps(payload).encode()
+      self.send_response(status)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Length", str(len(data)))
+      self.end_headers()
+      self.wfile.write(data)
+
+  return Handler
+
+
+def _matches_labels(node, selector):
+  if not selector:
+    return True
+  labels = node["metadata"]["labels"]
+  for term in selector.split(","):
+    key, _, value = term.partition("=")
+    if labels.get(key.strip()) != value.strip():
+      return False
+  return True
+
+def _node_selector(selector):
+  if selector and selector.startswith("spec.nodeName="):
+    return selector.split("=", 1)[1]
+  return None
+
+def _status(code, reason):
+  return { "kind": "Status", "apiVersion": "v1", "status": reason, "code": code, "reason": reason }
+
+def _now():
+  return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -0,0 +1,98 @@
+'''
+' A local stand-in for the OCI ContainerEngineClient calls OCIProvider makes.
+' Node pool changes are reflected in the fake kubernetes cluster after a
+' configurable provisioning or deletion delay.
+'
+' @file: fake_oci.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import itertools
+import threading
+import time
+from collections import Counter
+from oci.container_engine.models import Node, NodePool, NodePoolNodeConfigDetails, WorkRequest
+from oci.response import Response
+
+POOL_NAME = "non-autoscaler-pool-1"
+
+
+class FakeContainerEngineClient():
+
+  def __init__(self, kube_server, pool_size, latency=0.0, provision_delay=1.0, delete_delay=0.5):
+    self.kube_server = kube_server
+    self.latency = latency
+    self.provision_delay = provision_delay
+    self.delete_delay = delete_delay
+    self.calls = Counter()
+    self._lock = threading.Lock()
+    self._ids = itertools.count(1)
+    self._work_requests = {}
+    self.pool = NodePool(
+      id="ocid1.nodepool.fake.1", name=POOL_NAME,
+      node_config_details=NodePoolNodeConfigDetails(size=pool_size),
+      nodes=[Node(id=f"ocid1.instance.fake.node-{i}", name=f"node-{i}") for i in range(pool_size)]
+    )
+
+  def take_calls(self):
+    with self._lock:
+      calls, self.calls = self.calls, Counter()
+      return calls
+
+  def list_node_pools(self, compartment_id, cluster_id, **kwargs):
+    self._call("list_node_pools")
+    return Response(200, {}, [self.pool], None)
+
+  def get_node_pool(self, node_pool_id, **kwargs):
+    self._call("get_node_pool")
+    return Response(200, {}, self.pool, None)
+
+  def update_node_pool(self, node_pool_id, update_node_pool_details, **kwargs):
+    self._call("update_node_pool")
+    size = update_node_pool_details.node_config_details.size
+    added = size - self.pool.node_config_details.size
+    self.pool.node_config_details.size = size
+    return self._start_work(self._provision, added)
+
+  def delete_node(self, node_pool_id, node_id, **kwargs):
+    self._call("delete_node")
+    if kwargs.get("is_decrement_size"):
+      self.pool.node_config_details.size -= 1
+    return self._start_work(self._delete, node_id)
+
+  def get_work_request(self, work_request_id, **kwargs):
+    self._call("get_work_request")
+    with self._lock:
+      status = self._work_requests[work_request_id]
+    return Response(200, {}, WorkRequest(id=work_request_id, status=status), None)
+
+  def _provision(self, count):
+    time.sleep(self.provision_delay)
+    for _ in range(max(0, count)):
+      name = self.kube_server.add_node()
+      self.pool.nodes.append(Node(id=f"ocid1.instance.fake.{name}", name=name))
+
+  def _delete(self, node_id):
+    time.sleep(self.delete_delay)
+    self.kube_server.remove_node(node_id)
+    self.pool.nodes = [n for n in self.pool.nodes if n.id != node_id]
+
+  def _start_work(self, job, *args):
+    work_request_id = f"ocid1.workrequest.fake.{next(self._ids)}"
+    with self._lock:
+      self._work_requests[work_request_id] = "IN_PROGRESS"
+
+    def run():
+      job(*args)
+      with self._lock:
+        self._work_requests[work_request_id] = "SUCCEEDED"
+
+    threading.Thread(target=run, daemon=True).start()
+    return Response(202, { "opc-work-request-id": work_request_id }, None, None)
+
+  def _call(self, name):
+    with self._lock:
+      self.calls[name] += 1
+    if self.latency:
+      time.sleep(self.latency)
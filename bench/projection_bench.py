@@ -0,0 +1,119 @@
+'''
+' Benchmark of client model deserialization against the raw JSON projection
+' into compact records (`--fast-parse`), on synthetic node and pod listings.
+'
+' Usage: python bench/projection_bench.py [--nodes 2000] [--pods 30000]
+'
+' @file: projection_bench.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from kubernetes import client
+from records import NodeRecord, PodRecord
+
+
+class RawResponse():
+  def __init__(self, data):
+    self.data = data
+
+
+def synthetic_nodes(count):
+  return {
+    "kind": "NodeList", "apiVersion": "v1", "metadata": { "resourceVersion": "1" },
+    "items": [{
+      "metadata": {
+        "name": f"node-{i}", "uid": f"uid-{i}", "resourceVersion": str(i),
+        "creationTimestamp": "2023-01-01T00:00:00Z",
+        "labels": {
+          **{ f"label-{j}": f"value-{j}" for j in range(20) },
+          "topology.kubernetes.io/zone": f"zone-{i % 3}", "node-pool": f"pool-{i % 4}"
+        },
+        "annotations": { f"annotation-{j}": "x" * 60 for j in range(10) }
+      },
+      "spec": { "providerID": f"ocid1.instance.oc1..{i}", "podCIDR": "10.0.0.0/24" },
+      "status": {
+        "conditions": [{
+          "type": t, "status": "False", "reason": "Fine", "message": "m" * 40,
+          "lastHeartbeatTime": "2023-01-01T00:00:00Z", "lastTransitionTime": "2023-01-01T00:00:00Z"
+        } for t in ("MemoryPressure", "DiskPressure", "PIDPressure", "Ready")],
+        "images": [{ "names": [f"registry/image-{j}:1.0"], "sizeBytes": 1000000 } for j in range(30)],
+        "capacity": { "cpu": "8", "memory": "32Gi", "pods": "110" },
+        "allocatable": { "cpu": "7800m", "memory": "30Gi", "pods": "110" }
+      }
+    } for i in range(count)]
+  }
+
+def synthetic_pods(count, nodes):
+  return {
+    "kind": "PodList", "apiVersion": "v1", "metadata": { "resourceVersion": "1" },
+    "items": [{
+      "metadata": {
+        "name": f"pod-{i}", "namespace": f"ns-{i % 400}", "uid": f"uid-{i}",
+        "creationTimestamp": "2023-01-01T00:00:00Z",
+        "labels": { "app": f"app-{i % 50}", "pod-template-hash": "abcdef" },
+        "ownerReferences": [{ "apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"rs-{i % 50}", "uid": "u" }]
+      },
+      "spec": {
+        "nodeName": f"node-{i % nodes}",
+        "containers": [{
+          "name": "main", "image": f"registry/app-{i % 50}:1.0",
+          "env": [{ "name": f"ENV_{j}", "value": "v" * 20 } for j in range(10)],
+          "resources": { "requests": { "cpu": "100m", "memory": "128Mi" } }
+        }]
+      },
+      "status": { "phase": "Running", "podIP": "10.0.0.1" }
+    } for i in range(count)]
+  }
+
+def measure(label, job):
+  # Timed and traced separately, tracemalloc itself slows allocation-heavy code.
+  gc.collect()
+  started = time.process_time()
+  records = job()
+  cpu = time.process_time() - started
+  del records
+
+  gc.collect()
+  tracemalloc.start()
+  records = job()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print(f"  {label:<10} cpu {cpu:8.3f}s   peak {peak / 2**20:8.1f} MiB   records {len(records)}")
+  return cpu, peak
+
+def compare(name, payload, model_type, record_type):
+  data = json.dumps(payload).encode()
+  print(f"{name}: {len(payload['items'])} items, {len(data) / 2**20:.1f} MiB of JSON")
+  api_client = client.ApiClient()
+
+  def models():
+    listing = api_client.deserialize(RawResponse(data), model_type)
+    return [record_type.from_model(item) for item in listing.items]
+
+  def raw():
+    return [record_type.from_json(item) for item in json.loads(data)["items"]]
+
+  model_cpu, model_peak = measure("models", models)
+  raw_cpu, raw_peak = measure("raw json", raw)
+  print(f"  speedup {model_cpu / raw_cpu:.1f}x cpu, {model_peak / raw_peak:.1f}x less peak memory\n")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--nodes", type=int, default=2000)
+  parser.add_argument("--pods", type=int, default=30000)
+  args = parser.parse_args()
+
+  compare("nodes", synthetic_nodes(args.nodes), "V1NodeList", NodeRecord)
+  compare("pods", synthetic_pods(args.pods, args.nodes), "V1PodList", PodRecord)
@@ -0,0 +1,147 @@
+'''
+' End-to-end rotation benchmark against the local kubernetes and OCI stand-ins.
+' Runs the same four phases as the `rotate` command and reports wall time,
+' API calls and memory per phase. Memory is traced afresh for every phase, so
+' each reports the peak and the retained size of what it allocated itself.
+'
+' Usage: python bench/rotation_bench.py [--nodes 20] [--namespaces 50] [--pods-per-node 20] [--latency 0.005] [--pipelined]
+'
+' @file: rotation_bench.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fake_kube import FakeKubeServer
+from fake_oci import FakeContainerEngineClient
+
+
+def run_rotation(args):
+  server = FakeKubeServer(
+    latency=args.latency, nodes=args.nodes, aged=args.aged, namespaces=args.namespaces,
+    pods_per_node=args.pods_per_node, termination_delay=args.termination_delay
+  ).start()
+  oci_client = FakeContainerEngineClient(
+    server, args.nodes, latency=args.latency,
+    provision_delay=args.provision_delay, delete_delay=args.delete_delay
+  )
+
+  from client_factory import ClientFactory
+  from cluster_utils import KubeUtils
+  from pipeline import PipelinedRotation
+  from providers.oci import OCIProvider
+  from rate_limiter import RateLimiter
+
+  phases = []
+  pool_stats = {}
+
+  def phase(name, job):
+    server.take_calls()
+    oci_client.take_calls()
+    if args.trace_memory:
+      # restarted, so only this phase's allocations are traced.
+      tracemalloc.stop()
+      tracemalloc.start()
+    started = time.perf_counter()
+    job()
+    wall = time.perf_counter() - started
+    calls = server.take_calls() + oci_client.take_calls()
+    retained, peak = tracemalloc.get_traced_memory() if args.trace_memory else (None, None)
+    phases.append({ "phase": name, "wall": wall, "calls": calls, "peak": peak, "retained": retained })
+
+  try:
+    # A fresh factory, so no pooled client from an earlier run points elsewhere.
+    ClientFactory._instance = ClientFactory()
+    RateLimiter.instance().configure(args.api_qps, args.api_burst)
+    # The kubeconfig default location is read once at import, so it's patched directly.
+    with mock.patch("kubernetes.config.kube_config.KUBE_CONFIG_DEFAULT_LOCATION", server.kubeconfig), \
+         mock.patch("oci.config.from_file", return_value={}), \
+         mock.patch("oci.container_engine.ContainerEngineClient", return_value=oci_client):
+      kube = KubeUtils(
+        "fake", 30, False, args.max_unavailable, fast_parse=args.fast_parse, sizing=args.size_replacements
+      )
+      phase("scan", kube.scan_nodes)
+      if not args.no_plan:
+        phase("plan", kube.plan_rotation)
+
+      provider = OCIProvider(
+        kube.rotatable_nodes, provision_time=args.provision_time, kube_api=kube.api,
+        oci_cluster_id="ocid1.cluster.fake", oci_compartment_id=None
+      )
+      if args.size_replacements:
+        phase("size", lambda: kube.size_replacements(provider.pool_of))
+        provider.replacements = kube.replacements
+      if args.pipelined:
+        phase("rotate", PipelinedRotation(kube, provider).run)
+      else:
+        phase("provision", provider.expand_cluster_for_rotation)
+        phase("drain", kube.process_nodes)
+        phase("resize", lambda: provider.resize_cluster_after_rotation(kube.rotated_nodes()))
+      pool_stats.update(ClientFactory.instance().stats())
+  finally:
+    tracemalloc.stop()
+    server.stop()
+
+  return phases, pool_stats
+
+def report(phases, pool_stats, verbose=False):
+  print(f"{'phase':<10} {'wall (s)':>10} {'api calls':>10} {'peak (MiB)':>11} {'retained (MiB)':>15}")
+  for p in phases:
+    memory = f"{_mib(p['peak']):>11} {_mib(p['retained']):>15}"
+    print(f"{p['phase']:<10} {p['wall']:>10.2f} {sum(p['calls'].values()):>10} {memory}")
+    if verbose:
+      for endpoint, count in sorted(p["calls"].items()):
+        print(f"    {count:>6}  {endpoint}")
+  print(f"{'total':<10} {sum(p['wall'] for p in phases):>10.2f} {sum(sum(p['calls'].values()) for p in phases):>10}")
+  kube = pool_stats.get("kubernetes")
+  if kube:
+    print(f"kubernetes connections: {kube['connections']} opened for {kube['requests']} requests")
+
+def _mib(size):
+  return "-" if size is None else f"{size / 2 ** 20:.1f}"
+
+def parser():
+  parser = argparse.ArgumentParser(description="Rotation benchmark against local API stand-ins.")
+  parser.add_argument("--nodes", type=int, default=20)
+  parser.add_argument("--aged", type=int, default=None, help="How many nodes are old enough to rotate.")
+  parser.add_argument("--namespaces", type=int, default=50)
+  parser.add_argument("--pods-per-node", type=int, default=20)
+  parser.add_argument("--latency", type=float, default=0.005, help="Injected seconds per API call.")
+  parser.add_argument("--termination-delay", type=float, default=0.0)
+  parser.add_argument("--provision-delay", type=float, default=1.0)
+  parser.add_argument("--delete-delay", type=float, default=0.5)
+  parser.add_argument("--provision-time", type=int, default=60)
+  parser.add_argument("--max-unavailable", default="1")
+  parser.add_argument("--fast-parse", action="store_true")
+  parser.add_argument("--no-plan", action="store_true", help="Rotate in listing order, without the drain-cost planner.")
+  parser.add_argument("--pipelined", action="store_true", help="Overlap provisioning, draining and deletion per batch.")
+  parser.add_argument(
+    "--size-replacements", action="store_true", help="Provision only the replacements the evicted pods need."
+  )
+  parser.add_argument(
+    "--no-trace-memory", dest="trace_memory", action="store_false",
+    help="Skip per-phase memory tracing, which slows allocation-heavy phases down."
+  )
+  parser.add_argument("--api-qps", type=float, default=1000)
+  parser.add_argument("--api-burst", type=int, default=1000)
+  parser.add_argument("--verbose", action="store_true", help="Break API calls down by endpoint.")
+  parser.add_argument("--log-level", default="WARNING")
+  return parser
+
+
+if __name__ == "__main__":
+  args = parser().parse_args()
+  from log_helper import Logger
+  Logger.instance()
+  logging.getLogger().setLevel(args.log_level)
+  report(*run_rotation(args), verbose=args.verbose)
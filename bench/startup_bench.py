@@ -0,0 +1,87 @@
+'''
+' Startup benchmark: wall time of short-lived CLI invocations and the import
+' cost of each provider, each measured in a fresh interpreter.
+'
+' Usage: python bench/startup_bench.py [--runs 5]
+'
+' @file: startup_bench.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+COMMANDS = {
+  "rotate --version": [sys.executable, "main.py", "--version"],
+  "rotate --help": [sys.executable, "main.py", "--help"],
+}
+IMPORTS = {
+  "cli": "import cli",
+  "provider self_managed": "from providers import load_provider; load_provider('self_managed')",
+  "provider oci": "from providers import load_provider; load_provider('oci')",
+}
+
+
+def command_seconds(command, runs):
+  timings = []
+  for _ in range(runs):
+    started = time.perf_counter()
+    subprocess.run(command, cwd=SRC, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings.append(time.perf_counter() - started)
+  return statistics.median(timings)
+
+
+def import_seconds(statement, runs):
+  # Cumulative microseconds of the top-level imports reported by `-X importtime`.
+  timings = []
+  for _ in range(runs):
+    result = subprocess.run(
+      [sys.executable, "-X", "importtime", "-c", statement], cwd=SRC, check=True,
+      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    baseline = subprocess.run(
+      [sys.executable, "-X", "importtime", "-c", "pass"], cwd=SRC, check=True,
+      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    timings.append((_top_level_micros(result.stderr) - _top_level_micros(baseline.stderr)) / 1e6)
+  return statistics.median(timings)
+
+
+def loaded_modules(statement):
+  check = f"{statement}; import sys; print(','.join(m for m in ('oci', 'kubernetes') if m in sys.modules))"
+  output = subprocess.run([sys.executable, "-c", check], cwd=SRC, check=True, capture_output=True, text=True)
+  return output.stdout.strip() or "-"
+
+
+def _top_level_micros(report):
+  total = 0
+  for line in report.splitlines():
+    match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+    if match and not match.group(2).startswith(" "):
+      total += int(match.group(1))
+  return total
+
+
+def parser():
+  parser = argparse.ArgumentParser(description="CLI startup and provider import benchmark.")
+  parser.add_argument("--runs", type=int, default=5)
+  return parser
+
+
+if __name__ == "__main__":
+  args = parser().parse_args()
+  print(f"{'invocation':<24} {'median wall (s)':>16}")
+  for name, command in COMMANDS.items():
+    print(f"{name:<24} {command_seconds(command, args.runs):>16.3f}")
+  print()
+  print(f"{'import':<24} {'median import (s)':>18} {'heavy SDKs loaded':>18}")
+  for name, statement in IMPORTS.items():
+    print(f"{name:<24} {import_seconds(statement, args.runs):>18.3f} {loaded_modules(statement):>18}")
@@ -0,0 +1,119 @@
+'''
+' Capacity-aware replacement sizing: the pods to be evicted are bin-packed into
+' the free capacity of the nodes staying in the cluster, and only what doesn't
+' fit there is provisioned, in nodes of the pool's shape.
+'
+' @file: capacity.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+from collections import Counter
+
+
+class ReplacementSizer():
+  '''
+  ' Sizing is per node pool, as `pool_of(node)` (the provider's own pooling) tells them:
+  ' evicted pods are placed on the pool's remaining schedulable and untainted nodes first,
+  ' then on new nodes shaped like its aged ones, less their DaemonSet pods. Nodes of an
+  ' unknown pool, or that don't report allocatable resources, keep one replacement each.
+  '''
+  # Share of every node's allocatable resources left unpacked.
+  headroom = 0.1
+
+  def __init__(self, aged_nodes, remaining_nodes, pod_index, node_usage, daemon_usage, pool_of=None):
+    self.pool_of = pool_of or (lambda node: node.pool)
+    self.aged_nodes = aged_nodes
+    self.remaining_nodes = remaining_nodes
+    self.pod_index = pod_index
+    # (millicores, bytes, pods) requested per node by all its pods, and by its DaemonSet pods.
+    self.node_usage = node_usage
+    self.daemon_usage = daemon_usage
+    self.pools = {}
+
+  def plan(self):
+    # Returns the names of the aged nodes that get a replacement, earliest rotated first.
+    pools = {}
+    for node in self.aged_nodes:
+      pools.setdefault(self.pool_of(node), []).append(node)
+
+    replaced = set()
+    for pool, aged in pools.items():
+      pods = [pod for node in aged for pod in self.pod_index.get(node.name, [])]
+      if pool is None or any(node.allocatable is None for node in aged):
+        needed = len(aged)
+      else:
+        # tainted nodes are left out, not every evicted pod tolerates their taints.
+        free = [
+          self._free(node) for node in self.remaining_nodes
+          if node.allocatable and not node.unschedulable and not node.tainted and self.pool_of(node) == pool
+        ]
+        needed = min(len(aged), self.pack(Counter(pod.requests for pod in pods), free, self._shape(aged)))
+      replaced.update(node.name for node in aged[:needed])
+      self.pools[pool] = {
+        "aged": len(aged), "replacements": needed, "pods": len(pods),
+        "cpu": sum(pod.requests[0] for pod in pods), "memory": sum(pod.requests[1] for pod in pods),
+      }
+    return replaced
+
+  def describe(self):
+    lines = []
+    for pool, sizing in self.pools.items():
+      cpu, memory = sizing["cpu"] / 1000, sizing["memory"] / 2 ** 30
+      lines.append(
+        f"  Pool {pool or '-'}: {sizing['replacements']} replacements for {sizing['aged']} aged nodes "
+        f"({sizing['pods']} pods requesting {cpu:.1f} CPU, {memory:.1f} GiB)."
+      )
+    return lines
+
+  @staticmethod
+  def pack(demands, bins, shape):
+    # First-fit decreasing over groups of identical requests, so the cost grows with the
+    # number of distinct request sizes rather than pods. `bins` are [millicores, bytes, pods]
+    # of free capacity, filled in place; returns how many new `shape` bins were opened.
+    def fits(free, cpu, memory):
+      counts = [free[2]]
+      if cpu:
+        counts.append(free[0] // cpu)
+      if memory:
+        counts.append(free[1] // memory)
+      return max(0, min(counts))
+
+    scale = (max(shape[0], 1), max(shape[1], 1))
+    groups = sorted(demands.items(), key=lambda g: -(g[0][0] / scale[0] + g[0][1] / scale[1]))
+    opened = 0
+    for (cpu, memory), count in groups:
+      for free in bins:
+        if not count:
+          break
+        placed = min(count, fits(free, cpu, memory))
+        free[0] -= placed * cpu
+        free[1] -= placed * memory
+        free[2] -= placed
+        count -= placed
+
+      while count:
+        opened += 1
+        free = list(shape)
+        # a pod larger than a whole node still needs a node of its own.
+        placed = min(count, max(1, fits(free, cpu, memory)))
+        free[0] -= placed * cpu
+        free[1] -= placed * memory
+        free[2] -= placed
+        count -= placed
+        bins.append(free)
+    return opened
+
+  def _free(self, node):
+    used = self.node_usage.get(node.name, (0, 0, 0))
+    return [max(0, capacity - u) for capacity, u in zip(self._usable(node.allocatable), used)]
+
+  def _shape(self, aged):
+    # The largest aged node, less the DaemonSet pods every new node runs too.
+    allocatable = max((node.allocatable for node in aged), key=lambda a: (a[0], a[1]))
+    daemons = [self.daemon_usage.get(node.name, (0, 0, 0)) for node in aged]
+    overhead = [max(d[i] for d in daemons) for i in range(3)]
+    return [max(0, capacity - o) for capacity, o in zip(self._usable(allocatable), overhead)]
+
+  def _usable(self, allocatable):
+    return [int(value * (1 - self.headroom)) for value in allocatable]
@@ -6,13 +6,22 @@
 ' @author: Abdullah Alotaibi
 ' @date: 26/03/2023
 '''
+import os
+import time
 from enum import Enum
 import typer
-from typing import Optional
+from typing import List, Optional
+from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from providers.oci import OCIProvider
-from providers.self_managed import SelfManaged
-from cluster_utils import KubeUtils
+from fleet import GLOB_CHARACTERS, aggregate, cluster_summary, resolve_contexts, run_fleet
+from journal import RotationJournal
+from log_helper import Logger
+from metrics import Metrics
+from pipeline import PipelinedRotation
+from rate_limiter import RateLimiter
+
+# The kubernetes client and the provider SDKs are imported once a rotation starts,
+# so `--version`, `--help` and short-lived runs don't pay for loading them.
 
 __version__ = "1.0.0"
 
@@ -67,8 +76,89 @@ def rotate(
       help="The rotation value. Currently only for how long in 'days'."
     ),
     provision_time: int = typer.Option(
-      60,
-      help="The wait window between provider provision calls in seconds. Default: 1 minute"
+      600,
+      help="The maximum wait for provider provision calls to complete in seconds. Default: 10 minutes"
+    ),
+    max_unavailable: str = typer.Option(
+      "1",
+      help="How many nodes to rotate at once per wave: a count (3) or a percentage of rotatable nodes (25%)."
+    ),
+    node_selector: Optional[str] = typer.Option(
+      None,
+      help="Label selector to narrow the scanned nodes, e.g. a node pool or zone label."
+    ),
+    node_field_selector: Optional[str] = typer.Option(
+      None,
+      help="Field selector to narrow the scanned nodes on the server side."
+    ),
+    fast_parse: bool = typer.Option(
+      False,
+      help="Parse node and pod listings from raw JSON into compact records (faster on large clusters)."
+    ),
+    plan: bool = typer.Option(
+      True,
+      help="Order and group nodes by drain cost: pod count, PodDisruptionBudget headroom, local storage and zone."
+    ),
+    pipelined: bool = typer.Option(
+      False,
+      help="Provision the next batch of replacements while the current one drains, and delete each batch once drained."
+    ),
+    size_replacements: bool = typer.Option(
+      False,
+      help="Provision only the replacements that pod requests need beyond the remaining nodes' free capacity."
+    ),
+    prepull: bool = typer.Option(
+      False,
+      help="Pull the images of the pods to be evicted onto the replacements before draining, with a DaemonSet."
+    ),
+    prepull_timeout: int = typer.Option(
+      300,
+      help="Seconds to wait for the pre-pull before draining anyway."
+    ),
+    prepull_namespace: str = typer.Option(
+      "default",
+      help="Namespace of the short-lived pre-pull DaemonSet."
+    ),
+    simulate: bool = typer.Option(
+      False,
+      help="Predict the rotation's duration on a virtual clock from the scanned nodes and pods, changing nothing."
+    ),
+    simulate_max_unavailable: str = typer.Option(
+      "1,2,4,25%",
+      help="Comma separated --max-unavailable values to compare in the simulation."
+    ),
+    simulate_metrics: Optional[str] = typer.Option(
+      None,
+      help="Metrics textfile of an earlier rotation to take the simulated latencies from."
+    ),
+    resume: bool = typer.Option(
+      False,
+      help="Resume an interrupted rotation from its journal, skipping completed steps."
+    ),
+    journal_path: Optional[str] = typer.Option(
+      None,
+      help="Where to keep the rotation journal. Default: ~/.kube-rotator/<CLUSTER>.journal"
+    ),
+    metrics_file: Optional[str] = typer.Option(
+      None,
+      help="Write phase, node step and API call metrics to this OpenMetrics textfile."
+    ),
+    event_log: Optional[str] = typer.Option(
+      None,
+      help="Write log records and rotation events as JSON lines to this file, or '-' for stdout instead of text"
+           " (reports and progress then go to stderr)."
+    ),
+    metrics_push_url: Optional[str] = typer.Option(
+      None,
+      help="Push the run metrics to this endpoint, e.g. http://localhost:9091/metrics/job/node-rotator"
+    ),
+    api_qps: float = typer.Option(
+      20.0,
+      help="Sustained rate of kubernetes and provider API calls per second."
+    ),
+    api_burst: int = typer.Option(
+      40,
+      help="Number of API calls allowed in a burst above the sustained rate."
     ),
     oci_compartment_id: Optional[str] = typer.Option(
       None,
@@ -78,73 +168,431 @@ def rotate(
       None,
       help="OCI cluster ocid. Provider specific."
     ),
-    cluster: str = typer.Argument(
-      "default",
-      help="Name of the cluster (context) to run on. Default is current context."
+    oci_node_pool_prefix: str = typer.Option(
+      "non-autoscaler",
+      help="Only OCI node pools whose name starts with this prefix are rotated. Provider specific."
+    ),
+    self_managed_provision_hook: Optional[str] = typer.Option(
+      None,
+      help="Executable or http(s) webhook run per aged node to add its replacement. Provider specific."
+    ),
+    self_managed_decommission_hook: Optional[str] = typer.Option(
+      None,
+      help="Executable or http(s) webhook run per drained node to remove its machine. Provider specific."
+    ),
+    self_managed_hook_timeout: int = typer.Option(
+      300,
+      help="Seconds a single hook call may take. Provider specific."
+    ),
+    self_managed_hook_retries: int = typer.Option(
+      2,
+      help="How many times a failed hook call is retried. Provider specific."
+    ),
+    fleet_concurrency: int = typer.Option(
+      4,
+      help="With several clusters, how many of them to rotate at once, each in its own worker process."
+    ),
+    daemon: bool = typer.Option(
+      False,
+      help="Keep running, rotating due nodes wave by wave from watch-fed caches of nodes, pods and budgets."
+    ),
+    maintenance_window: Optional[str] = typer.Option(
+      None,
+      help="In daemon mode, only rotate within this UTC window, e.g. '01:00-05:00' or 'Sat,Sun 22:00-04:00'."
+    ),
+    daemon_interval: int = typer.Option(
+      60,
+      help="In daemon mode, seconds between checks for due nodes."
+    ),
+    clusters: Optional[List[str]] = typer.Argument(
+      None,
+      help="Names or globs of the clusters (contexts) to run on, e.g. 'prod-*'. Default is current context."
     )
 ):
   """
-  Rotate the given cluster based on passed crietria.
+  Rotate the given clusters based on passed crietria.
   """
   # Process cli args.
   #
+  from kubernetes import config
+  from cluster_utils import KubeUtils
+  from controller import MaintenanceWindow
+
+  clusters = clusters or ["default"]
+  try:
+    KubeUtils.wave_size(max_unavailable, 1)
+  except ValueError:
+    raise typer.BadParameter(f"invalid value: {max_unavailable}", param_hint="--max-unavailable")
+  simulated_waves = [v.strip() for v in simulate_max_unavailable.split(",") if v.strip()]
+  try:
+    for value in simulated_waves:
+      KubeUtils.wave_size(value, 1)
+  except ValueError:
+    raise typer.BadParameter(f"invalid value: {value}", param_hint="--simulate-max-unavailable")
+  window = None
+  if maintenance_window:
+    try:
+      window = MaintenanceWindow.parse(maintenance_window)
+    except ValueError as e:
+      raise typer.BadParameter(str(e), param_hint="--maintenance-window")
+  available = []
+  if any(g in c for c in clusters for g in GLOB_CHARACTERS):
+    available = [c["name"] for c in config.list_kube_config_contexts()[0]]
+  try:
+    targets = resolve_contexts(clusters, available)
+  except ValueError as e:
+    raise typer.BadParameter(str(e), param_hint="CLUSTERS")
+
+  settings = {
+    "dry_run": dry_run, "provider": provider, "rotate_value": rotate_value, "provision_time": provision_time,
+    "max_unavailable": max_unavailable, "node_selector": node_selector,
+    "node_field_selector": node_field_selector, "fast_parse": fast_parse, "plan": plan,
+    "pipelined": pipelined, "size_replacements": size_replacements, "prepull": prepull,
+    "prepull_timeout": prepull_timeout, "prepull_namespace": prepull_namespace, "simulate": simulate,
+    "simulated_waves": simulated_waves,
+    "simulate_metrics": simulate_metrics, "resume": resume, "journal_path": journal_path,
+    "event_log": event_log, "metrics_file": metrics_file,
+    "metrics_push_url": metrics_push_url, "api_qps": api_qps, "api_burst": api_burst,
+    "oci_compartment_id": oci_compartment_id, "oci_cluster_id": oci_cluster_id,
+    "oci_node_pool_prefix": oci_node_pool_prefix,
+    "provider_options": {
+      "self_managed_provision_hook": self_managed_provision_hook,
+      "self_managed_decommission_hook": self_managed_decommission_hook,
+      "self_managed_hook_timeout": self_managed_hook_timeout,
+      "self_managed_hook_retries": self_managed_hook_retries,
+    },
+  }
+
+  if daemon:
+    if len(targets) > 1 or simulate:
+      raise typer.BadParameter("runs on a single cluster, without --simulate", param_hint="--daemon")
+    run_daemon(targets[0], window, daemon_interval, **settings)
+  elif len(targets) == 1:
+    summary = rotate_cluster(targets[0], **settings)
+    if summary["status"] in ("nothing-to-rotate", "simulated"):
+      raise typer.Exit()
+    typer.echo("Done!", err=_events_on_stdout(event_log))
+  else:
+    err = _events_on_stdout(event_log)
+    if journal_path or metrics_file or event_log:
+      typer.echo(
+        "Journal, event log and metrics files are suffixed with each cluster's name in fleet mode.", err=err
+      )
+    typer.echo(f"Rotating {len(targets)} clusters, {fleet_concurrency} at a time ..", err=err)
+    summaries = run_fleet(targets, rotate_cluster, fleet_concurrency, fleet=True, **settings)
+    report_fleet(summaries, err)
+    if any(s["status"] == "error" for s in summaries):
+      raise typer.Exit(1)
+
+
+def rotate_cluster(cluster, dry_run=False, provider=CloudProviders.self_managed, rotate_value=60,
+                   provision_time=600, max_unavailable="1", node_selector=None, node_field_selector=None,
+                   fast_parse=False, plan=True, pipelined=False, size_replacements=False, prepull=False,
+                   prepull_timeout=300, prepull_namespace="default", simulate=False, simulated_waves=(),
+                   simulate_metrics=None, resume=False, journal_path=None, event_log=None,
+                   metrics_file=None, metrics_push_url=None, api_qps=20.0, api_burst=40,
+                   oci_compartment_id=None, oci_cluster_id=None, oci_node_pool_prefix="non-autoscaler",
+                   provider_options=None, fleet=False):
+  # Rotates one cluster and returns its summary. In fleet mode, this runs in a worker
+  # process: output is prefixed with the cluster, and there are no progress bars.
+  from client_factory import ClientFactory
+  from cluster_utils import KubeUtils
+  from prepull import ImagePrePuller
+  from providers import load_provider
+  from simulation import Latencies, RotationSimulator
+
+  started = time.monotonic()
+  if event_log:
+    Logger.log_events(_for_cluster(event_log, cluster) if fleet and event_log != "-" else event_log)
+  if fleet:
+    Logger.tag(cluster)
+  err = _events_on_stdout(event_log)
+  prefix = f"[{cluster}] " if fleet else ""
+  echo = lambda message, **kw: typer.echo(f"{prefix}{message}", err=err, **kw)
+  if fleet:
+    step = lambda job, description, phase=None: _timed(job, phase)
+  else:
+    step = lambda job, description, phase=None: progress_bar(job, description, phase, err)
+
   chosen_provider = typer.style(provider.title(), fg=typer.colors.RED, bold=True)
   chosen_cluster = typer.style(cluster, fg=typer.colors.GREEN, bold=True)
   chosen_days = typer.style(rotate_value, fg=typer.colors.BRIGHT_YELLOW, bold=True)
   dry_mode = typer.style("in dry mode", fg=typer.colors.BRIGHT_BLACK, bold=True)
 
-  typer.echo(f"The run will target cluster: {chosen_cluster} on {chosen_provider} cloud ..")
-  typer.echo(f"Nodes older than {chosen_days} days will be rotated.")
+  echo(f"The run will target cluster: {chosen_cluster} on {chosen_provider} cloud ..")
+  echo(f"Nodes older than {chosen_days} days will be rotated.")
 
   if dry_run:
-    typer.echo(f"Running script {dry_mode}. No actual rotation will occur.")
+    echo(f"Running script {dry_mode}. No actual rotation will occur.")
+
+  # Dry runs and simulations don't touch the journal on disk.
+  if dry_run or simulate:
+    journal = RotationJournal()
+  else:
+    if fleet and journal_path:
+      journal_path = _for_cluster(journal_path, cluster)
+    journal_path = journal_path or os.path.join(os.path.expanduser("~"), ".kube-rotator", f"{cluster}.journal")
+    journal = RotationJournal(journal_path, resume=resume)
+    if resume:
+      echo(f"Resuming rotation from journal {journal_path} ..")
 
-  kube = KubeUtils(cluster, rotate_value, dry_run)
+  RateLimiter.instance().configure(api_qps, api_burst)
+  kube = KubeUtils(
+    cluster, rotate_value, dry_run, max_unavailable,
+    label_selector=node_selector, field_selector=node_field_selector, fast_parse=fast_parse,
+    journal=journal, sizing=size_replacements
+  )
 
   # Flow (1): finding aged nodes.
   #
-  progress_bar(lambda: kube.scan_nodes(), "Scanning nodes ..")
+  step(lambda: kube.scan_nodes(), "Scanning nodes ..", phase="scan")
+
+  if kube.rotatable_nodes and not simulate:
+    # Flow (2) begins: the provider is set up first, so nodes it can't replace or delete
+    # (e.g. outside the eligible OCI node pools) are never planned or drained.
+    #
+    opts = dict(
+      provider_options or {}, oci_cluster_id=oci_cluster_id, oci_compartment_id=oci_compartment_id,
+      oci_node_pool_prefix=oci_node_pool_prefix
+    )
+    provider_class = load_provider(provider.value)
+    cloud_api = provider_class(
+      kube.rotatable_nodes, provision_time=provision_time, dry=dry_run, kube_api=kube.api, journal=journal,
+      **opts
+    )
+    for node in kube.keep_nodes(cloud_api.manages):
+      echo(f"Skipping node {node.name}, the {provider.value} provider can't replace it.")
 
   rotatable_nodes = kube.rotatable_nodes
   rotatable_count = len(rotatable_nodes)
   if rotatable_count == 0:
-    typer.echo("There's no eligiable nodes to rotate. ✅ ", color=True)
-    raise typer.Exit()
+    echo("There's no eligiable nodes to rotate. ✅ ", color=True)
+    return cluster_summary(cluster, "nothing-to-rotate", seconds=time.monotonic() - started)
+
+  scanned_nodes = list(rotatable_nodes)
+  if plan or simulate:
+    planner = step(lambda: kube.plan_rotation(), "Planning rotation waves 🗺  ..", phase="plan")
+    rotatable_nodes = kube.rotatable_nodes
+    if dry_run and plan:
+      for line in planner.describe(kube.plan):
+        echo(line)
 
-  # Flow (2): communicate with provider to extend with replacements.
+  if simulate:
+    latencies = Latencies()
+    if simulate_metrics:
+      with open(simulate_metrics) as f:
+        latencies = Latencies.from_metrics(f.read())
+    simulator = RotationSimulator(
+      scanned_nodes, kube.pod_index, kube.disruption_budgets,
+      latencies, kube.eviction_workers, plan=plan
+    )
+    report_simulation(simulator, simulated_waves, max_unavailable, pipelined, echo)
+    return cluster_summary(cluster, "simulated", rotatable_count, seconds=time.monotonic() - started)
+
+  # Flow (2): communicate with provider to extend with replacements, in the planned order.
   #
-  if provider == CloudProviders.oci:
-    opts = { "oci_cluster_id": oci_cluster_id, "oci_compartment_id": oci_compartment_id }
-    cloud_api = OCIProvider(rotatable_nodes, provision_time=provision_time, dry=dry_run, **opts)
-  elif provider == CloudProviders.self_managed:
-    cloud_api = SelfManaged(rotatable_nodes)
+  cloud_api.rotatable_nodes = rotatable_nodes
+  if size_replacements:
+    sizer = step(
+      lambda: kube.size_replacements(cloud_api.pool_of), "Sizing replacements 📐 ..", phase="size"
+    )
+    cloud_api.replacements = kube.replacements
+    for line in sizer.describe():
+      echo(line)
+  puller = ImagePrePuller(kube, prepull_namespace, prepull_timeout) if prepull else None
+
+  if pipelined:
+    # Flow (2-4) overlapped: every batch is provisioned, drained and deleted in turn.
+    #
+    warmup = puller and (lambda batch: puller.warm(cloud_api, batch))
+    pipeline = PipelinedRotation(kube, cloud_api, warmup=warmup)
+    step(lambda: pipeline.run(), "Rotating nodes batch by batch ♻️  ..", phase="rotate")
   else:
-    raise NotImplementedError
+    step(
+      lambda: cloud_api.expand_cluster_for_rotation(),
+      "Provisioning additional nodes 🛠 ..",
+      phase="provision"
+    )
+    if puller:
+      step(lambda: puller.warm(cloud_api), "Pre-pulling images onto replacements 📦 ..", phase="prepull")
+
+    # Flow (3): Run the actual rotation .. discard old and add new.
+    #
+    step(lambda: kube.process_nodes(), "Rotating older nodes ♻️  ..", phase="drain")
 
-  progress_bar(
-    lambda: cloud_api.expand_cluster_for_rotation(),
-    "Provisioning additional nodes 🛠 .."
+    # Flow (4): Deregister old nodes and possibly terminate them .. only the drained ones,
+    # a node that failed to cordon or drain still runs pods.
+    #
+    step(
+      lambda: cloud_api.resize_cluster_after_rotation(kube.rotated_nodes()),
+      "Restoring to original cluster capacity 🪄 ..", phase="resize"
+    )
+
+  # The report follows the rotation's log lines, not the other way round.
+  Logger.flush()
+  failed = { name: r for name, r in kube.rotation_results.items() if r["status"] == "failed" }
+  echo(f"Rotated {len(kube.rotation_results) - len(failed)} of {rotatable_count} nodes.")
+  for name, result in failed.items():
+    echo(typer.style(f"  ✗ {name}: {result['error']}", fg=typer.colors.RED))
+
+  stats = RateLimiter.instance().stats()
+  echo(
+    f"API calls: {stats['calls']}, retries: {stats['retries']}, "
+    f"throttled: {stats['throttled_seconds']}s, backing off: {stats['backoff_seconds']}s."
+  )
+  for backend, pool in ClientFactory.instance().stats().items():
+    if pool["requests"]:
+      echo(
+        f"{backend.title()} connections: {pool['connections']} opened, {pool['reused']} requests reused one."
+      )
+  if fleet:
+    metrics_file = metrics_file and _for_cluster(metrics_file, cluster)
+    metrics_push_url = metrics_push_url and f"{metrics_push_url.rstrip('/')}/cluster/{cluster}"
+  export_metrics(metrics_file, metrics_push_url, echo)
+  return cluster_summary(
+    cluster, "rotated", rotatable_count, kube.rotation_results, seconds=time.monotonic() - started
   )
 
-  # Flow (3): Run the actual rotation .. discard old and add new.
-  #
-  progress_bar(lambda: kube.process_nodes(), "Rotating older nodes ♻️  ..")
 
-  # Flow (4): Deregister old nodes and possibly terminate them.
-  #
-  progress_bar(
-    lambda: cloud_api.resize_cluster_after_rotation(), "Restoring to original cluster capacity 🪄 .."
+def run_daemon(cluster, window=None, interval=60, dry_run=False, provider=CloudProviders.self_managed,
+               rotate_value=60, provision_time=600, max_unavailable="1", node_selector=None,
+               node_field_selector=None, fast_parse=False, journal_path=None, event_log=None,
+               metrics_file=None, api_qps=20.0, api_burst=40, oci_compartment_id=None,
+               oci_cluster_id=None, oci_node_pool_prefix="non-autoscaler", provider_options=None, **_):
+  # Rotates due nodes until SIGTERM/SIGINT. The journal always resumes, so a
+  # restarted daemon skips the steps its predecessor completed.
+  import signal
+  import threading
+  from cluster_utils import KubeUtils
+  from controller import RotationController
+  from providers import load_provider
+
+  if event_log:
+    Logger.log_events(event_log)
+  if dry_run:
+    journal = RotationJournal()
+  else:
+    journal_path = journal_path or os.path.join(os.path.expanduser("~"), ".kube-rotator", f"{cluster}.journal")
+    journal = RotationJournal(journal_path, resume=True)
+
+  RateLimiter.instance().configure(api_qps, api_burst)
+  kube = KubeUtils(
+    cluster, rotate_value, dry_run, max_unavailable,
+    label_selector=node_selector, field_selector=node_field_selector, fast_parse=fast_parse,
+    journal=journal
+  )
+  opts = dict(
+    provider_options or {}, oci_cluster_id=oci_cluster_id, oci_compartment_id=oci_compartment_id,
+    oci_node_pool_prefix=oci_node_pool_prefix
+  )
+  provider_class = load_provider(provider.value)
+
+  def provider_factory(nodes):
+    # Replacements are awaited on the controller's node cache, not by listing every node.
+    return provider_class(
+      nodes, provision_time=provision_time, dry=dry_run, kube_api=kube.api, journal=journal,
+      node_cache=controller.nodes, **opts
+    )
+
+  stopping = threading.Event()
+  for signum in (signal.SIGTERM, signal.SIGINT):
+    signal.signal(signum, lambda *_: stopping.set())
+
+  controller = RotationController(kube, provider_factory, window, interval, metrics_file=metrics_file)
+  err = _events_on_stdout(event_log)
+  typer.echo(
+    f"Watching cluster {cluster} for nodes older than {rotate_value} days, Ctrl+C to stop ..", err=err
   )
+  controller.run(stopping)
+  typer.echo(f"Stopped after {controller.waves} waves.", err=err)
+
+
+def report_simulation(simulator, simulated_waves, max_unavailable, pipelined, echo=typer.echo):
+  echo(f"{'flow':<10} {'max unavailable':>16} {'waves':>6} {'total':>10} {'peak extra nodes':>17}")
+  for value in dict.fromkeys(list(simulated_waves) + [max_unavailable]):
+    for mode in (False, True):
+      result = simulator.simulate(value, mode)
+      flow = "pipelined" if mode else "bulk"
+      echo(
+        f"{flow:<10} {value:>16} {result['waves']:>6} {_duration(result['total']):>10} "
+        f"{result['peak_extra']:>17}"
+      )
+
+  chosen = simulator.simulate(max_unavailable, pipelined)
+  echo(f"Batches with --max-unavailable {max_unavailable}{' pipelined' if pipelined else ''}:")
+  for b in chosen["batches"]:
+    echo(
+      f"  {b['number']:>3}. {b['nodes']} nodes: provisioned {_duration(b['provisioned'])}, "
+      f"drained {_duration(b['drain_started'])}-{_duration(b['drained'])}, deleted {_duration(b['deleted'])}"
+    )
+
+
+def report_fleet(summaries, err=False):
+  echo = lambda message: typer.echo(message, err=err)
+  colors = { "rotated": typer.colors.GREEN, "nothing-to-rotate": typer.colors.BRIGHT_BLACK,
+             "simulated": typer.colors.BLUE, "partial": typer.colors.YELLOW, "error": typer.colors.RED }
+  echo(f"{'cluster':<30} {'status':<18} {'rotated':>8} {'failed':>7} {'time (s)':>9}")
+  for s in summaries:
+    status = typer.style(f"{s['status']:<18}", fg=colors[s["status"]])
+    echo(f"{s['context']:<30} {status} {s['rotated']:>8} {len(s['failed']):>7} {s['seconds']:>9}")
+    if s["error"]:
+      echo(typer.style(f"  ✗ {s['error']}", fg=typer.colors.RED))
+    for name, error in s["failed"].items():
+      echo(typer.style(f"  ✗ {name}: {error}", fg=typer.colors.RED))
+
+  totals = aggregate(summaries)
+  by_status = ", ".join(f"{count} {status}" for status, count in sorted(totals["statuses"].items()))
+  echo(
+    f"Rotated {totals['rotated']} of {totals['rotatable']} nodes across {totals['clusters']} clusters "
+    f"({by_status}), {totals['failed']} nodes failed."
+  )
+
+
+def export_metrics(metrics_file, metrics_push_url, echo=typer.echo):
+  metrics = Metrics.instance()
+  if metrics_file:
+    metrics.write_textfile(metrics_file)
+    echo(f"Metrics written to {metrics_file}.")
+  if metrics_push_url:
+    try:
+      metrics.push(metrics_push_url)
+      echo(f"Metrics pushed to {metrics_push_url}.")
+    except OSError as e:
+      echo(typer.style(f"Pushing metrics failed: {e}", fg=typer.colors.RED))
+
+
+def _timed(job, phase):
+  with Metrics.instance().phase(phase):
+    return job()
+
+
+def _duration(seconds):
+  minutes, seconds = divmod(int(round(seconds)), 60)
+  hours, minutes = divmod(minutes, 60)
+  return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+def _events_on_stdout(event_log):
+  # JSON events own stdout then, everything meant for people goes to stderr.
+  return event_log == "-"
+
+
+def _for_cluster(path, cluster):
+  # "rotation.prom" becomes "rotation.prod-1.prom".
+  root, extension = os.path.splitext(path)
+  return f"{root}.{cluster}{extension}"
 
-  typer.echo("Done!")
-  typer.Exit(0)
 
+def progress_bar(job, description, phase=None, err=False):
+  if phase:
+    with Metrics.instance().phase(phase):
+      return progress_bar(job, description, err=err)
 
-def progress_bar(job, description):
   with Progress(
     SpinnerColumn(),
     TextColumn("[progress.description]{task.description}"),
-    transient=False
+    transient=False,
+    console=Console(stderr=err)
   ) as progress:
     progress.add_task(description=f"{description}", total=None)
-    job()
+    return job()
@@ -0,0 +1,108 @@
+'''
+' Shared factory for API clients, so the rotator and every provider reuse the
+' same keep-alive connection pools, sized for the configured concurrency.
+'
+' @file: client_factory.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import threading
+from kubernetes import client, config
+from log_helper import Logger
+from rate_limiter import RateLimitedClient
+
+class ClientFactory():
+  _instance = None
+
+  def instance():
+    if not ClientFactory._instance:
+      ClientFactory._instance = ClientFactory()
+    return ClientFactory._instance
+
+  def __init__(self, pool_size=16):
+    self.logger = Logger.instance()
+    self.pool_size = pool_size
+    self._lock = threading.Lock()
+    self._kube_clients = {}
+    self._oci_clients = {}
+    self._oci_sessions = []
+    self._retired = { "kubernetes": [0, 0], "oci": [0, 0] }
+
+  def kubernetes(self, context=None, api_class=None):
+    # One ApiClient (and connection pool) per context, shared by every API group handed out.
+    with self._lock:
+      api_client = self._kube_clients.get(context)
+      if api_client is None:
+        configuration = client.Configuration()
+        config.load_kube_config(context=context, client_configuration=configuration)
+        configuration.connection_pool_maxsize = self.pool_size
+        api_client = client.ApiClient(configuration)
+        self._kube_clients[context] = api_client
+    return RateLimitedClient((api_class or client.CoreV1Api)(api_client), backend="kubernetes")
+
+  def oci_container_engine(self, oci_config, **kwargs):
+    # One client (and session) per configuration, shared by every provider built with it,
+    # e.g. the daemon's provider of each wave.
+    key = tuple(sorted((name, repr(value)) for name, value in dict(oci_config, **kwargs).items()))
+    with self._lock:
+      cached = self._oci_clients.get(key)
+    if cached is not None:
+      return cached
+
+    # Imported on use, the oci SDK is slow to import and only some runs need it.
+    import oci
+    from requests.adapters import HTTPAdapter
+
+    engine = oci.container_engine.ContainerEngineClient(oci_config, **kwargs)
+    session = getattr(getattr(engine, "base_client", None), "session", None)
+    with self._lock:
+      cached = self._oci_clients.get(key)
+      if cached is not None:
+        return cached
+      if session is not None:
+        session.mount("https://", HTTPAdapter(pool_maxsize=self.pool_size))
+        self._oci_sessions.append(session)
+      self._oci_clients[key] = RateLimitedClient(engine, backend="oci")
+      return self._oci_clients[key]
+
+  def ensure_pool_size(self, concurrency):
+    # Grows the pools when more workers will share them than they can hold.
+    with self._lock:
+      if concurrency <= self.pool_size:
+        return
+      self.logger.info(" Growing API connection pools from %s to %s.", self.pool_size, concurrency)
+      self.pool_size = concurrency
+      for api_client in self._kube_clients.values():
+        manager = api_client.rest_client.pool_manager
+        self._retire("kubernetes", manager)
+        manager.connection_pool_kw["maxsize"] = concurrency
+        manager.clear()
+      for session in self._oci_sessions:
+        self._retire("oci", session.get_adapter("https://").poolmanager)
+        session.mount("https://", type(session.get_adapter("https://"))(pool_maxsize=concurrency))
+
+  def stats(self):
+    # Requests vs. new connections per backend; the difference was served by keep-alive.
+    with self._lock:
+      totals = { backend: list(counts) for backend, counts in self._retired.items() }
+      for api_client in self._kube_clients.values():
+        _add_counts(totals["kubernetes"], api_client.rest_client.pool_manager)
+      for session in self._oci_sessions:
+        _add_counts(totals["oci"], session.get_adapter("https://").poolmanager)
+
+    return {
+      backend: { "requests": requests, "connections": connections, "reused": max(0, requests - connections) }
+      for backend, (requests, connections) in totals.items()
+    }
+
+  def _retire(self, backend, manager):
+    _add_counts(self._retired[backend], manager)
+
+
+def _add_counts(totals, manager):
+  for key in list(manager.pools.keys()):
+    pool = manager.pools.get(key)
+    if pool is not None:
+      totals[0] += pool.num_requests
+      totals[1] += pool.num_connections
@@ -6,37 +6,208 @@
 ' @date: 18/03/2023
 '
 '''
-import os
+import json
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from kubernetes import client, config
+from kubernetes import client, config, watch
 from kubernetes.client.rest import ApiException
+from client_factory import ClientFactory
+from journal import RotationJournal
 from log_helper import Logger
+from metrics import Metrics
+from capacity import ReplacementSizer
+from planner import RotationPlanner
+from records import DisruptionBudgetRecord, NodeRecord, PodRecord
 
 class KubeUtils():
 
-  def __init__(self, context="default", rotate_days=60, dry=False):
-    self._set_properties(context, rotate_days, dry)
+  def __init__(self, context="default", rotate_days=60, dry=False, max_unavailable=1,
+               label_selector=None, field_selector=None, fast_parse=False, journal=None, sizing=False):
+    self._set_properties(
+      context, rotate_days, dry, max_unavailable, label_selector, field_selector, fast_parse, sizing
+    )
+    self.journal = journal or RotationJournal()
     self._load_configuration()
 
   def scan_nodes(self):
+    self.rotatable_nodes = []
+    self.remaining_nodes = []
+    self.plan = None
     try:
-      self._fetch_nodes()
-      self._filter_candidate_nodes()
+      for candidate in self.iter_candidate_nodes():
+        self.rotatable_nodes.append(candidate)
+      self.logger.info(" Total of %s nodes collected for rotation.", len(self.rotatable_nodes))
 
       return self.rotatable_nodes
 
     except ApiException as e:
-      self.logger.error(" Exception when calling CoreV1Api resources: %s\n" % e)
+      self.logger.error(" Exception when calling CoreV1Api resources: %s\n", e)
+
+  def iter_candidate_nodes(self):
+    # Yields rotatable nodes page by page, never holding the full node list.
+    current_context = self.context or config.list_kube_config_contexts()[1]["name"]
+    self.logger.info(" Running on context: %s.", current_context)
+
+    for page in self._fetch_node_pages():
+      for node in page:
+        candidate = self._to_candidate(node)
+        if candidate:
+          yield candidate
+        elif self.sizing:
+          # nodes staying in the cluster take in the evicted pods.
+          self.remaining_nodes.append(node)
+
+  def keep_nodes(self, predicate):
+    # Leaves the rotatable nodes failing `predicate` out of the rotation, returns them.
+    dropped = [node for node in self.rotatable_nodes if not predicate(node)]
+    if dropped:
+      self.rotatable_nodes = [node for node in self.rotatable_nodes if predicate(node)]
+      self.logger.warning(
+        " Leaving out %s nodes the provider can't replace: %s",
+        len(dropped), ", ".join(node.name for node in dropped)
+      )
+    return dropped
 
   def process_nodes(self):
+    # Nodes are rotated in waves of at most `max_unavailable` nodes at once.
+    # A failing node is reported in the results without aborting its wave.
+    self.rotation_results = {}
+    if not self.prepare_rotation():
+      return self.rotation_results
+
+    for number, wave in enumerate(self.waves(), 1):
+      self.rotate_wave(wave, number)
+
+    return self.rotation_results
+
+  def rotated_nodes(self):
+    # The rotatable nodes that were drained, the only ones safe to hand to the provider for deletion.
+    rotated = set(name for name, r in self.rotation_results.items() if r["status"] == "rotated")
+    return [node for node in self.rotatable_nodes if node.name in rotated]
+
+  def prepare_rotation(self):
+    # Indexes the pods of every rotatable node, unless planning or sizing already listed
+    # them (pods landing later are picked up by each node's refresh and final drain), and
+    # sizes the connection pools for a wave. Informer caches are cheap to index afresh.
+    try:
+      if self.pod_cache or any(node.name not in self.pod_index for node in self.rotatable_nodes):
+        self._build_pod_index()
+    except ApiException as e:
+      self.logger.error(" Exception when calling CoreV1Api resources: %s\n", e)
+      return False
+
+    wave_size = self.wave_size(self.max_unavailable, len(self.rotatable_nodes))
+    self.clients.ensure_pool_size(wave_size * self.eviction_workers)
+    return True
+
+  def rotate_wave(self, wave, number):
+    # Cordons and drains one wave, returns the nodes that were rotated.
+    self.logger.info(" Rotating wave %s with %s nodes ..", number, len(wave))
+    with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+      # The whole wave is cordoned first, so pods evicted from one node
+      # can't land on another node of the same wave.
+      cordoned = self._run_wave_step(executor, self._cordon_step, wave)
+      rotated = self._run_wave_step(executor, lambda n: self._rotate_node(n, number > 1), cordoned)
+    for node in rotated:
+      self.rotation_results[node.name] = { "status": "rotated", "error": None }
+      Logger.event("node", " Node %s rotated.", node.name, node=node.name, wave=number, outcome="rotated")
+    return rotated
+
+  def _run_wave_step(self, executor, step, nodes):
+    # Runs `step` for every node concurrently, returns the nodes it succeeded on.
+    futures = { executor.submit(step, node): node for node in nodes }
+    succeeded = []
+    for future in as_completed(futures):
+      node = futures[future]
+      try:
+        future.result()
+        succeeded.append(node)
+      except Exception as e:
+        Logger.event(
+          "node", " Rotation of node %s failed: %s", node.name, e, level=logging.ERROR,
+          node=node.name, outcome="failed", error=str(e)
+        )
+        self.rotation_results[node.name] = { "status": "failed", "error": str(e) }
+    return succeeded
+
+  def _cordon_step(self, node):
+    if not self.journal.done(node, "cordoned") and not self.journal.done(node, "drained"):
+      with self.metrics.node_step(node.name, "cordon"):
+        self._cordon_node(node)
+      self.journal.record(node, "cordoned")
+
+  def _rotate_node(self, node, refresh_pods):
+    # Steps already in the journal (from an interrupted run) are skipped.
+    if self.journal.done(node, "drained"):
+      self.logger.info(" Node %s was drained by a previous run, skipping.", node.name)
+      return
+    if refresh_pods:
+      # earlier waves may have rescheduled pods onto this node.
+      self._refresh_pod_index(node.name)
+    self._drain_node(node)
+    self.journal.record(node, "drained")
+    self._terminate_recycled_node(node)
+
+  def plan_rotation(self):
+    # Reorders the rotatable nodes by drain cost and fixes the waves they're rotated in.
+    self._build_pod_index()
     try:
-      for rotatable in self.rotatable_nodes:
-        self._cordon_node(rotatable)
-        self._drain_node(rotatable)
-        self._terminate_recycled_node(rotatable)
+      budgets = self._list_disruption_budgets()
     except ApiException as e:
-      self.logger.error(" Exception when calling CoreV1Api resources: %s\n" % e)
+      self.logger.warning(" Listing PodDisruptionBudgets failed, planning without them: %s", e.reason)
+      budgets = []
+
+    self.disruption_budgets = budgets
+    size = self.wave_size(self.max_unavailable, len(self.rotatable_nodes))
+    planner = RotationPlanner(self.rotatable_nodes, self.pod_index, budgets, size)
+    self.plan = planner.plan()
+    self.rotatable_nodes = [node for wave in self.plan for node in wave]
+    self.logger.info(" Planned %s waves using %s disruption budgets.", len(self.plan), len(budgets))
+    return planner
+
+  def _list_disruption_budgets(self):
+    if self.budget_cache:
+      return self.budget_cache.items()
+    pages = self._paginate(self.policy_api.list_pod_disruption_budget_for_all_namespaces, DisruptionBudgetRecord)
+    return [budget for page in pages for budget in page]
+
+  def size_replacements(self, pool_of=None):
+    # Picks the rotatable nodes that get a replacement, from what their pods request
+    # and what the remaining nodes have free. `pool_of(node)` is the provider's pooling.
+    if not self.pod_index:
+      self._build_pod_index()
+    sizer = ReplacementSizer(
+      self.rotatable_nodes, self.remaining_nodes, self.pod_index, self.node_usage, self.daemon_usage,
+      pool_of=pool_of
+    )
+    self.replacements = sizer.plan()
+    self.logger.info(
+      " %s replacements are needed for %s rotatable nodes.", len(self.replacements), len(self.rotatable_nodes)
+    )
+    return sizer
+
+  def waves(self):
+    if self.plan:
+      yield from self.plan
+      return
+    size = self.wave_size(self.max_unavailable, len(self.rotatable_nodes))
+    for start in range(0, len(self.rotatable_nodes), size):
+      yield self.rotatable_nodes[start:start + size]
+
+  @staticmethod
+  def wave_size(max_unavailable, total):
+    # Accepts a count (3) or a percentage of the rotatable pool ("25%"),
+    # rounded down like a Deployment's maxUnavailable, but never below one node.
+    value = str(max_unavailable).strip()
+    if value.endswith("%"):
+      size = int(total * int(value[:-1]) / 100)
+    else:
+      size = int(value)
+    if size < 0:
+      raise ValueError(f"max unavailable must not be negative: {max_unavailable}")
+    return max(1, min(size, total)) if total else 1
 
   def run(self):
     # Run both filtering nodes, actual rotation.
@@ -49,50 +220,109 @@ class KubeUtils():
 
     self.process_nodes()
 
-  def _set_properties(self, context, rotate_days, dry):
-    self.node_list = []
+  def _set_properties(self, context, rotate_days, dry, max_unavailable=1,
+                      label_selector=None, field_selector=None, fast_parse=False, sizing=False):
     self.rotatable_nodes = []
+    # Remaining nodes and pod requests are only collected when replacements get sized.
+    self.sizing = sizing
+    self.remaining_nodes = []
+    self.node_usage = {}
+    self.daemon_usage = {}
+    # Names of the rotatable nodes that get a replacement, None for all of them.
+    self.replacements = None
+    self.fast_parse = fast_parse
+    self.label_selector = label_selector
+    self.field_selector = field_selector
+    self.pod_index = {}
+    self.plan = None
+    self.disruption_budgets = []
+    self.pod_cache = None
+    self.budget_cache = None
+    self.page_size = 500
     self.target_cluster = context or ""
+    # "default" stands for the kubeconfig's current context.
+    self.context = None if self.target_cluster in ("", "default") else self.target_cluster
     self.rotate_after_days = rotate_days
     self.dry_mode = dry
+    self.max_unavailable = max_unavailable
+    self.rotation_results = {}
+    self.eviction_results = {}
+    self.eviction_workers = 16
+    self.drain_retry_seconds = 5
     if self.dry_mode:
       self.wait_before_last_drain_seconds = 5
     else:
-      self.wait_before_last_drain_seconds = 60
+      self.wait_before_last_drain_seconds = 300
 
 
   def _load_configuration(self):
-    config.load_kube_config()
-    self.api = client.CoreV1Api()
+    self.clients = ClientFactory.instance()
+    self.api = self.clients.kubernetes(self.context)
+    self.policy_api = self.clients.kubernetes(self.context, api_class=client.PolicyV1Api)
     self.logger = Logger.instance()
+    self.metrics = Metrics.instance()
 
-  def _fetch_nodes(self):
-    current_context = config.list_kube_config_contexts()[1]["name"]
-    self.logger.info(" Running on context: %s.", current_context)
-    self.node_list = self.api.list_node().items
+  def _fetch_node_pages(self):
+    # Selectors are applied by the API server, so only matching nodes are sent back.
+    kwargs = {}
+    if self.label_selector:
+      kwargs["label_selector"] = self.label_selector
+    if self.field_selector:
+      kwargs["field_selector"] = self.field_selector
+    return self._paginate(self.api.list_node, NodeRecord, **kwargs)
 
-  def _filter_candidate_nodes(self):
-    self.rotatable_nodes = []
+  def _paginate(self, list_call, record_type, **kwargs):
+    return self.paginate(list_call, record_type, self.page_size, self.fast_parse, **kwargs)
+
+  @staticmethod
+  def paginate(list_call, record_type, page_size=500, fast_parse=False, **kwargs):
+    # Pages of records from `list_call`; static, so providers polling the API page the same way.
+    continue_token = None
+    while True:
+      if continue_token:
+        kwargs["_continue"] = continue_token
+      records, continue_token, _ = KubeUtils.read_page(
+        list_call, record_type, fast_parse, limit=page_size, **kwargs
+      )
+
+      yield records
+
+      if not continue_token:
+        break
+
+  def _list_page(self, list_call, record_type, **kwargs):
+    return self.read_page(list_call, record_type, self.fast_parse, **kwargs)
+
+  @staticmethod
+  def read_page(list_call, record_type, fast_parse=False, **kwargs):
+    # With `fast_parse`, the raw response is read as plain JSON and projected
+    # into records, skipping the client's model deserialization altogether.
+    if fast_parse:
+      payload = json.loads(list_call(_preload_content=False, **kwargs).data)
+      metadata = payload.get("metadata") or {}
+      records = [record_type.from_json(item) for item in payload.get("items") or []]
+      return records, metadata.get("continue"), metadata.get("resourceVersion")
+
+    response = list_call(**kwargs)
+    records = [record_type.from_model(item) for item in response.items]
+    return records, response.metadata._continue, response.metadata.resource_version
 
-    for node in self.node_list:
-      created_at = node.metadata.creation_timestamp
-      present = datetime.now(timezone.utc)
-      delta = present - created_at
-
-      if delta.days >= self.rotate_after_days:
-        node_name = node.metadata.name
-        labels = node.metadata.labels
-        annotations = node.metadata.annotations
-        self.logger.info(" Node %s was up since %s ..", node_name, created_at.date())
-        self.logger.info(" Adding node '%s' for rotatation list.", node_name)
-        self.rotatable_nodes.append({
-          "name": node_name, "labels": labels, "annotations": annotations, "spec": node.spec
-        })
-    self.logger.info(" Total of %s nodes collected for rotation.", len(self.rotatable_nodes))
+  def is_due(self, node):
+    delta = datetime.now(timezone.utc) - node.created_at
+    return delta.days >= self.rotate_after_days
+
+  def _to_candidate(self, node):
+    created_at = node.created_at
+    if not self.is_due(node):
+      return None
+
+    self.logger.info(" Node %s was up since %s ..", node.name, created_at.date())
+    self.logger.info(" Adding node '%s' for rotatation list.", node.name)
+    return node
 
   def _cordon_node(self, node):
-    node_name = node['name']
-    self.logger.info(f" Cordoning node {node_name} ..")
+    node_name = node.name
+    self.logger.info(" Cordoning node %s ..", node_name)
 
     payload = { "spec": { "unschedulable": True } }
     if not self.dry_mode:
@@ -100,42 +330,209 @@ class KubeUtils():
       if not response.spec.unschedulable:
         raise ApiException(f" Cordon operation for node {node_name} failed.")
 
-    self.logger.info(f"Node '{node_name}' was cordoned successfully.")
+    self.logger.info("Node '%s' was cordoned successfully.", node_name)
 
   def _drain_node(self, node):
-    node_name = node['name']
-    self.logger.info(f" Collecting pods to evict on node: {node_name} ..")
-    namespaces = self.api.list_namespace()
+    node_name = node.name
+    self.logger.info(" Collecting pods to evict on node: %s ..", node_name)
+
+    pods_to_evict = self.pod_index.get(node_name, [])
+    self.logger.info("%s pods will be evicted from node %s.", len(pods_to_evict), node_name)
+    if not self.dry_mode and pods_to_evict:
+      with self.metrics.node_step(node_name, "evict"):
+        outcomes = self._evict_pods(pods_to_evict)
+      self.eviction_results[node_name] = outcomes
+      summary = { o: list(outcomes.values()).count(o) for o in set(outcomes.values()) }
+      Logger.event(
+        "evictions", "Eviction outcomes on node %s: %s", node_name, summary, node=node_name, outcomes=summary
+      )
 
-    eviction_body = lambda pod, namespace: client.V1Eviction(
+    if self.dry_mode:
+      self.logger.info("Skipping drain wait for node %s in dry mode.", node_name)
+    else:
+      with self.metrics.node_step(node_name, "wait"):
+        drained = self._wait_for_node_drained(node_name)
+      if drained:
+        self.logger.info("Node %s has no evictable pods left.", node_name)
+      else:
+        self.logger.warning(
+          "Node %s still has pods after %s seconds.", node_name, self.wait_before_last_drain_seconds
+        )
+
+    self.logger.info("Running the final drain on node %s for the final restoration.", node_name)
+    if not self.dry_mode:
+      with self.metrics.node_step(node_name, "drain"):
+        self._final_drain(node_name)
+
+  def _final_drain(self, node_name):
+    # In-process equivalent of `kubectl drain --force --ignore-daemonsets --delete-emptydir-data`:
+    # everything but DaemonSet and mirror pods is evicted, unmanaged and emptyDir pods included.
+    # PodDisruptionBudgets are still honored, blocked pods are retried until the drain budget
+    # runs out, and a node that doesn't empty raises instead of passing silently.
+    deadline = time.monotonic() + self.wait_before_last_drain_seconds
+    while True:
+      self._refresh_pod_index(node_name)
+      pods = self.pod_index[node_name]
+      if not pods:
+        return
+      if time.monotonic() >= deadline:
+        raise TimeoutError(f"drain of node {node_name} timed out with {len(pods)} pods left.")
+
+      outcomes = self._evict_pods(pods).values()
+      if "failed" in outcomes:
+        raise RuntimeError(f"drain of node {node_name} failed evicting pods.")
+      if "blocked" in outcomes:
+        time.sleep(min(self.drain_retry_seconds, max(0, deadline - time.monotonic())))
+      else:
+        self._wait_for_node_drained(node_name, timeout=max(0, deadline - time.monotonic()))
+
+  def _evict_pods(self, pods):
+    # Fans evictions out over a bounded worker pool, so a slow or blocked
+    # eviction doesn't hold up the rest of the node.
+    outcomes = {}
+    workers = max(1, min(self.eviction_workers, len(pods)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+      futures = { executor.submit(self._evict_pod, pod): pod for pod in pods }
+      for future in as_completed(futures):
+        pod = futures[future]
+        outcomes[pod.key] = future.result()
+    return outcomes
+
+  def _evict_pod(self, pod):
+    started = time.monotonic()
+    outcome = self._request_eviction(pod)
+    Logger.event(
+      "eviction", " Eviction of pod %s/%s: %s.", pod.namespace, pod.name, outcome, level=logging.DEBUG,
+      node=pod.node_name, namespace=pod.namespace, pod=pod.name, duration=time.monotonic() - started,
+      outcome=outcome
+    )
+    return outcome
+
+  def _request_eviction(self, pod):
+    pod_name = pod.name
+    namespace = pod.namespace
+    body = client.V1Eviction(
       api_version= "policy/v1beta1",
       kind="Eviction",
-      metadata=client.V1ObjectMeta(name=pod, namespace=namespace),
+      metadata=client.V1ObjectMeta(name=pod_name, namespace=namespace),
       delete_options=client.V1DeleteOptions(api_version="meta/v1", kind="DeleteOptions", grace_period_seconds=60)
     )
+    try:
+      self.api.create_namespaced_pod_eviction(pod_name, namespace, body)
+      return "evicted"
+    except ApiException as e:
+      if e.status == 404:
+        return "gone"
+      if e.status == 429:
+        # refused by a PodDisruptionBudget (never retried by the limiter),
+        # or still throttled by the API server after every retry.
+        return "blocked"
+      self.logger.error(" Eviction of pod %s/%s failed: %s", namespace, pod_name, e.reason)
+      return "failed"
 
-    pods_to_evict = []
-    for ns in namespaces.items:
-      ns_name = ns.metadata.name
-      node_ns_pods = self.api.list_namespaced_pod(ns_name, field_selector=f"spec.nodeName={node_name}")
-      if len(node_ns_pods.items) > 0:
-        pods_to_evict.append(node_ns_pods.items)
-
-    pods_count = sum([len(l) for l in zip(*pods_to_evict)])
-    self.logger.info(f"{pods_count} pods will be evicted from node {node_name}.")
-    for list in pods_to_evict:
-      for pod in list:
-        pod_name  = pod.metadata.name
-        namespace = pod.metadata.namespace
-        if not self.dry_mode:
-          self.api.create_namespaced_pod_eviction(pod_name, namespace, eviction_body(pod_name, namespace))
-
-    self.logger.info(f"Waiting for {self.wait_before_last_drain_seconds} seconds ..")
-    time.sleep(self.wait_before_last_drain_seconds)
-
-    self.logger.info(f"Issuing plain 'drain' command on node {node_name} for the final restoration.")
-    if not self.dry_mode:
-      os.system(f"kubectl drain --force --ignore-daemonsets --delete-emptydir-data {node_name}")
+  def _wait_for_node_drained(self, node_name, timeout=None):
+    # Watch the node's pods until only DaemonSet/mirror pods remain,
+    # bounded by `timeout` or else `wait_before_last_drain_seconds`.
+    deadline = time.monotonic() + (self.wait_before_last_drain_seconds if timeout is None else timeout)
+    if self.pod_cache:
+      return self.pod_cache.wait_for(lambda: not self._cached_pods(node_name), deadline - time.monotonic())
+    selector = f"spec.nodeName={node_name}"
+    remaining, resource_version = self._list_remaining_pods(selector)
+
+    while remaining:
+      timeout = int(deadline - time.monotonic())
+      if timeout <= 0:
+        break
+
+      watcher = watch.Watch()
+      try:
+        for event in watcher.stream(
+          self.api.list_pod_for_all_namespaces,
+          field_selector=selector,
+          resource_version=resource_version,
+          timeout_seconds=timeout
+        ):
+          pod = PodRecord.from_model(event["object"])
+          if event["type"] == "DELETED" or not self._is_evictable(pod):
+            remaining.discard(pod.key)
+          else:
+            remaining.add(pod.key)
+          resource_version = event["object"].metadata.resource_version
+
+          if not remaining:
+            watcher.stop()
+      except ApiException as e:
+        if e.status != 410:
+          raise
+        # our resourceVersion expired, start over from a fresh listing.
+        remaining, resource_version = self._list_remaining_pods(selector)
+
+    return not remaining
+
+  def _list_remaining_pods(self, selector):
+    pods, _, resource_version = self._list_page(
+      self.api.list_pod_for_all_namespaces, PodRecord, field_selector=selector
+    )
+    return set(pod.key for pod in pods if self._is_evictable(pod)), resource_version
+
+  def _build_pod_index(self):
+    # One paginated all-namespaces listing, grouped by node, instead of
+    # listing every namespace for every rotatable node.
+    node_names = set(n.name for n in self.rotatable_nodes)
+    self.pod_index = { name: [] for name in node_names }
+
+    if self.pod_cache:
+      pages = [self.pod_cache.items()]
+    else:
+      pages = self._paginate(self.api.list_pod_for_all_namespaces, PodRecord)
+    # When sizing replacements, requests of every running pod are added up per node along the way.
+    self.node_usage, self.daemon_usage = {}, {}
+    for page in pages:
+      for pod in page:
+        if pod.node_name is None or pod.phase in ("Succeeded", "Failed"):
+          continue
+        if self.sizing:
+          self._add_requests(self.node_usage, pod)
+        if pod.node_name in node_names:
+          if self._is_evictable(pod):
+            self.pod_index[pod.node_name].append(pod)
+          elif self.sizing:
+            self._add_requests(self.daemon_usage, pod)
+
+    total = sum(len(pods) for pods in self.pod_index.values())
+    self.logger.info(" Indexed %s evictable pods across %s nodes.", total, len(node_names))
+
+  def use_caches(self, pods, budgets=None):
+    # With informer caches (daemon mode), pod lookups and drain waits are served
+    # from memory instead of listing and watching the API server per node.
+    self.pod_cache = pods
+    self.budget_cache = budgets
+
+  def _cached_pods(self, node_name):
+    return [p for p in self.pod_cache.by_index(node_name) if self._is_evictable(p)]
+
+  def _refresh_pod_index(self, node_name):
+    if self.pod_cache:
+      self.pod_index[node_name] = self._cached_pods(node_name)
+      return
+    pods, _, _ = self._list_page(
+      self.api.list_pod_for_all_namespaces, PodRecord, field_selector=f"spec.nodeName={node_name}"
+    )
+    self.pod_index[node_name] = [pod for pod in pods if self._is_evictable(pod)]
+
+  def _is_evictable(self, pod):
+    # DaemonSet pods are recreated in place, mirror pods are owned by the kubelet,
+    # and terminal pods are already gone .. evicting them can never succeed.
+    if pod.phase in ("Succeeded", "Failed") or pod.mirror:
+      return False
+    return "DaemonSet" not in pod.owner_kinds
+
+  @staticmethod
+  def _add_requests(usage, pod):
+    used = usage.setdefault(pod.node_name, [0, 0, 0])
+    used[0] += pod.requests[0]
+    used[1] += pod.requests[1]
+    used[2] += 1
 
   def _terminate_recycled_node(self, node):
     # Here, we don't hardly terinmate `kubectl delete node`, but only signal them to
@@ -0,0 +1,193 @@
+'''
+' Long-running controller mode: nodes, pods and disruption budgets are kept in
+' watch-fed caches, and every reconcile rotates the next wave of due nodes
+' from memory, without listing the cluster again.
+'
+' @file: controller.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import re
+import time
+from datetime import datetime, timezone
+from cluster_utils import KubeUtils
+from informer import Informer
+from log_helper import Logger
+from metrics import Metrics
+from planner import RotationPlanner
+from records import DisruptionBudgetRecord, NodeRecord, PodRecord
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class MaintenanceWindow():
+  '''
+  ' A daily UTC window, optionally limited to some weekdays: "01:00-05:00" or
+  ' "Sat,Sun 22:00-04:00". A window ending before it starts runs overnight, and
+  ' belongs to the weekday it starts on.
+  '''
+  def __init__(self, start, end, days=None):
+    self.start = start
+    self.end = end
+    self.days = set(days) if days else set(range(7))
+
+  @classmethod
+  def parse(cls, text):
+    match = re.match(r'^\s*(?:([A-Za-z,]+)\s+)?(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})\s*$', text)
+    if not match:
+      raise ValueError(f"invalid maintenance window: {text}")
+    days = None
+    if match.group(1):
+      names = [d.strip().lower()[:3] for d in match.group(1).split(",") if d.strip()]
+      if any(name not in WEEKDAYS for name in names):
+        raise ValueError(f"invalid weekday in maintenance window: {text}")
+      days = [WEEKDAYS.index(name) for name in names]
+    start_hour, start_minute, end_hour, end_minute = (int(g) for g in match.groups()[1:])
+    if start_hour > 23 or end_hour > 24 or start_minute > 59 or end_minute > 59:
+      raise ValueError(f"invalid maintenance window: {text}")
+    return cls(start_hour * 60 + start_minute, end_hour * 60 + end_minute, days)
+
+  def contains(self, moment):
+    moment = moment.astimezone(timezone.utc)
+    minute = moment.hour * 60 + moment.minute
+    weekday = moment.weekday()
+    if self.start < self.end:
+      return weekday in self.days and self.start <= minute < self.end
+    # overnight, the early hours belong to the previous day's window.
+    if minute >= self.start:
+      return weekday in self.days
+    return minute < self.end and (weekday - 1) % 7 in self.days
+
+
+class RotationController():
+  '''
+  ' `provider_factory(nodes)` returns the provider for one wave. A wave is the
+  ' cheapest `max_unavailable` due nodes the provider manages; nodes that failed
+  ' to rotate are left alone for `failure_backoff` seconds.
+  '''
+  def __init__(self, kube, provider_factory, window=None, interval=60, failure_backoff=3600,
+               metrics_file=None):
+    self.kube = kube
+    self.provider_factory = provider_factory
+    self.window = window
+    self.interval = interval
+    self.failure_backoff = failure_backoff
+    self.metrics_file = metrics_file
+    self.logger = Logger.instance()
+    self.metrics = Metrics.instance()
+    self.waves = 0
+    self._failed_until = {}
+    self._informers = []
+
+    selectors = {}
+    if kube.label_selector:
+      selectors["label_selector"] = kube.label_selector
+    if kube.field_selector:
+      selectors["field_selector"] = kube.field_selector
+    self.nodes = Informer(kube, kube.api.list_node, NodeRecord, **selectors)
+    self.pods = Informer(
+      kube, kube.api.list_pod_for_all_namespaces, PodRecord,
+      key=lambda pod: pod.key, index=lambda pod: pod.node_name
+    )
+    self.budgets = Informer(
+      kube, kube.policy_api.list_pod_disruption_budget_for_all_namespaces, DisruptionBudgetRecord,
+      key=lambda budget: budget.key
+    )
+
+  def run(self, stopping):
+    # Reconciles until the `stopping` event is set, e.g. by a signal handler.
+    self.start()
+    try:
+      for informer in self._informers:
+        while not informer.synced.wait(1):
+          if stopping.is_set():
+            return
+      self.logger.info(
+        " Caches synced: %s nodes, %s pods, %s disruption budgets.",
+        len(self.nodes.items()), len(self.pods.items()), len(self.budgets.items())
+      )
+      self.kube.use_caches(self.pods, self.budgets)
+
+      while not stopping.is_set():
+        try:
+          results = self.reconcile()
+        except Exception as e:
+          self.logger.error(" Reconcile failed: %s", e)
+          results = {}
+        # keep going right away only while waves rotate nodes, a wave that only
+        # failed waits like an idle one.
+        if not any(r["status"] == "rotated" for r in results.values()):
+          stopping.wait(self.interval)
+    finally:
+      self.stop()
+
+  def start(self):
+    self._informers = [self.nodes.start(), self.pods.start(), self.budgets.start()]
+
+  def stop(self):
+    for informer in self._informers:
+      informer.stop()
+
+  def due_nodes(self):
+    # Drained nodes stay in the cluster until the provider deletes them, which may be
+    # never (e.g. self managed nodes without a decommission hook), so they're done with.
+    # Cordoned nodes are left alone too, unless a rotation of ours was interrupted.
+    journal = self.kube.journal
+    monotonic = time.monotonic()
+    return [
+      node for node in self.nodes.items()
+      if not journal.done(node, "drained") and not journal.done(node, "deleted")
+      and (not node.unschedulable or journal.done(node, "cordoned"))
+      and self._failed_until.get(node.name, 0) <= monotonic
+      and self.kube.is_due(node)
+    ]
+
+  def reconcile(self, now=None):
+    # Rotates the next wave of due nodes, returns their rotation results.
+    now = now or datetime.now(timezone.utc)
+    # nodes gone from the cluster drop out of the journal, which the daemon never starts afresh.
+    self.kube.journal.prune(self.nodes.items())
+    if self.window and not self.window.contains(now):
+      return {}
+    due = self.due_nodes()
+    if not due:
+      return {}
+    provider = self.provider_factory(due)
+    # nodes the provider can't replace or delete are never drained.
+    due = [node for node in due if provider.manages(node)]
+    if not due:
+      return {}
+
+    size = KubeUtils.wave_size(self.kube.max_unavailable, len(due))
+    pod_index = { node.name: self.kube._cached_pods(node.name) for node in due }
+    wave = RotationPlanner(due, pod_index, self.budgets.items(), size).plan()[0]
+    self.waves += 1
+    self.logger.info(" %s nodes are due, rotating %s of them ..", len(due), len(wave))
+
+    kube = self.kube
+    kube.rotatable_nodes = wave
+    kube.plan = [wave]
+    kube.rotation_results = {}
+    provider.rotatable_nodes = wave
+    try:
+      with self.metrics.phase("provision"):
+        provider.expand_cluster_for_rotation(wave)
+      if not kube.prepare_rotation():
+        raise RuntimeError("indexing the wave's pods failed")
+      with self.metrics.phase("drain"):
+        rotated = kube.rotate_wave(wave, self.waves)
+      if rotated:
+        with self.metrics.phase("resize"):
+          provider.resize_cluster_after_rotation(rotated)
+    except Exception as e:
+      self.logger.error(" Rotating wave %s failed: %s", self.waves, e)
+      for node in wave:
+        kube.rotation_results.setdefault(node.name, { "status": "failed", "error": str(e) })
+
+    for name, result in kube.rotation_results.items():
+      if result["status"] == "failed":
+        self._failed_until[name] = time.monotonic() + self.failure_backoff
+    if self.metrics_file:
+      self.metrics.write_textfile(self.metrics_file)
+    return kube.rotation_results
@@ -0,0 +1,102 @@
+'''
+' Fleet mode: rotates many kube contexts from one invocation, each cluster in
+' its own worker process, at most `concurrency` clusters at once.
+'
+' @file: fleet.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import multiprocessing
+import time
+from fnmatch import fnmatchcase
+from multiprocessing.connection import wait
+
+GLOB_CHARACTERS = "*?["
+
+
+def resolve_contexts(patterns, available):
+  # Expands glob patterns against the kubeconfig's contexts, keeping the given order.
+  # Plain names are kept as is, so a missing context fails in its own worker.
+  resolved = []
+  for pattern in patterns:
+    if any(c in pattern for c in GLOB_CHARACTERS):
+      matches = [name for name in available if fnmatchcase(name, pattern)]
+      if not matches:
+        raise ValueError(f"no context matches '{pattern}'.")
+    else:
+      matches = [pattern]
+    resolved.extend(name for name in matches if name not in resolved)
+  return resolved
+
+
+def run_fleet(contexts, job, concurrency, **kwargs):
+  # Runs `job(context, **kwargs)` per context and returns their summaries in context order.
+  # Every cluster gets a freshly spawned process of its own, so no client, pool, lock or
+  # singleton (metrics, rate limiter, log handlers) is inherited or carried over between
+  # clusters, and a cluster that raises or kills its worker fails alone.
+  spawn = multiprocessing.get_context("spawn")
+  pending = list(contexts)
+  running = {}
+  results = {}
+  while pending or running:
+    while pending and len(running) < max(1, concurrency):
+      context = pending.pop(0)
+      receiver, sender = spawn.Pipe(duplex=False)
+      process = spawn.Process(target=_run_job, args=(sender, job, context, kwargs))
+      process.start()
+      # only the worker holds the sending end now, so its exit shows as end of file.
+      sender.close()
+      running[receiver] = (context, process, time.monotonic())
+
+    for receiver in wait(list(running)):
+      context, process, started = running.pop(receiver)
+      try:
+        status, outcome = receiver.recv()
+      except EOFError:
+        status, outcome = "error", None
+      receiver.close()
+      process.join()
+      if status == "done":
+        results[context] = outcome
+      else:
+        error = outcome or f"worker exited with code {process.exitcode}"
+        results[context] = cluster_summary(context, "error", error=error, seconds=time.monotonic() - started)
+  return [results[context] for context in contexts]
+
+
+def _run_job(connection, job, context, kwargs):
+  try:
+    outcome = ("done", job(context, **kwargs))
+  except Exception as e:
+    outcome = ("error", f"{type(e).__name__}: {e}")
+  connection.send(outcome)
+  connection.close()
+
+
+def cluster_summary(context, status, rotatable=0, results=None, error=None, seconds=0.0):
+  # Plain dicts, so summaries cross the process boundary as they are.
+  results = results or {}
+  failed = { name: r["error"] for name, r in results.items() if r["status"] == "failed" }
+  return {
+    "context": context,
+    "status": "partial" if status == "rotated" and failed else status,
+    "rotatable": rotatable,
+    "rotated": len(results) - len(failed),
+    "failed": failed,
+    "error": error,
+    "seconds": round(seconds, 1),
+  }
+
+
+def aggregate(summaries):
+  statuses = {}
+  for summary in summaries:
+    statuses[summary["status"]] = statuses.get(summary["status"], 0) + 1
+  return {
+    "clusters": len(summaries),
+    "statuses": statuses,
+    "rotatable": sum(s["rotatable"] for s in summaries),
+    "rotated": sum(s["rotated"] for s in summaries),
+    "failed": sum(len(s["failed"]) for s in summaries),
+  }
@@ -0,0 +1,159 @@
+'''
+' Informer-style caches: a resource kind is listed once, then kept current by a
+' watch resumed from the last seen resourceVersion, so long-running processes
+' never relist unless the API server has expired that version.
+'
+' @file: informer.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import threading
+import time
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+from log_helper import Logger
+
+class Informer():
+
+  def __init__(self, kube, list_call, record_type, key=lambda record: record.name, index=None,
+               watch_seconds=300, **selectors):
+    self.kube = kube
+    self.list_call = list_call
+    self.record_type = record_type
+    self.key = key
+    # An optional secondary index, e.g. pods by node name.
+    self.index = index
+    self._indexed = {}
+    self.watch_seconds = watch_seconds
+    self.selectors = selectors
+    self.logger = Logger.instance()
+    self.resource_version = None
+    self.relists = 0
+    self.synced = threading.Event()
+    self._records = {}
+    self._changed = threading.Condition()
+    self._stopped = threading.Event()
+    self._watcher = None
+    self._thread = None
+
+  def start(self):
+    name = f"informer-{self.record_type.__name__}"
+    self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._stopped.set()
+    if self._watcher:
+      self._watcher.stop()
+
+  def items(self):
+    with self._changed:
+      return list(self._records.values())
+
+  def get(self, key):
+    with self._changed:
+      return self._records.get(key)
+
+  def by_index(self, value):
+    with self._changed:
+      return list(self._indexed.get(value, {}).values())
+
+  def wait_for(self, predicate, timeout):
+    # Blocks until `predicate()` holds after some change, or `timeout` seconds pass.
+    deadline = time.monotonic() + timeout
+    with self._changed:
+      while not predicate():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          return False
+        self._changed.wait(remaining)
+    return True
+
+  def _run(self):
+    backoff = 1
+    while not self._stopped.is_set():
+      try:
+        if self.resource_version is None:
+          self._relist()
+        self._watch()
+        backoff = 1
+      except ApiException as e:
+        if e.status == 410:
+          # our resourceVersion expired, nothing but a fresh listing can resume from here.
+          self.logger.info(" %s watch expired, relisting ..", self.record_type.__name__)
+          self.resource_version = None
+          continue
+        self.logger.warning(
+          " %s watch failed: %s, retrying in %s sec ..", self.record_type.__name__, e.reason, backoff
+        )
+        self._stopped.wait(backoff)
+        backoff = min(backoff * 2, 60)
+      except Exception as e:
+        if self._stopped.is_set():
+          break
+        # Dropped connections and the like, the watch resumes from the same version.
+        self.logger.warning(
+          " %s watch broke: %s, retrying in %s sec ..", self.record_type.__name__, e, backoff
+        )
+        self._stopped.wait(backoff)
+        backoff = min(backoff * 2, 60)
+
+  def _relist(self):
+    records, continue_token, resource_version = {}, None, None
+    while True:
+      kwargs = dict(self.selectors, limit=self.kube.page_size)
+      if continue_token:
+        kwargs["_continue"] = continue_token
+      page, continue_token, page_version = self.kube._list_page(self.list_call, self.record_type, **kwargs)
+      # Later pages are served from the snapshot of the first one.
+      resource_version = resource_version or page_version
+      records.update((self.key(record), record) for record in page)
+      if not continue_token:
+        break
+
+    with self._changed:
+      self._records = {}
+      self._indexed = {}
+      for key, record in records.items():
+        self._store(key, record)
+      self.resource_version = resource_version
+      self.relists += 1
+      self._changed.notify_all()
+    self.synced.set()
+
+  def _watch(self):
+    self._watcher = watch.Watch()
+    for event in self._watcher.stream(
+      self.list_call,
+      resource_version=self.resource_version,
+      timeout_seconds=self.watch_seconds,
+      allow_watch_bookmarks=True,
+      **self.selectors
+    ):
+      if event["type"] == "BOOKMARK":
+        # Bookmarks only move the version forward, they're left undecoded by the client.
+        self.resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+        continue
+
+      record = self.record_type.from_model(event["object"])
+      with self._changed:
+        self._remove(self.key(record))
+        if event["type"] != "DELETED":
+          self._store(self.key(record), record)
+        self.resource_version = event["object"].metadata.resource_version
+        self._changed.notify_all()
+
+      if self._stopped.is_set():
+        self._watcher.stop()
+
+  def _store(self, key, record):
+    self._records[key] = record
+    if self.index:
+      self._indexed.setdefault(self.index(record), {})[key] = record
+
+  def _remove(self, key):
+    record = self._records.pop(key, None)
+    if record is not None and self.index:
+      self._indexed.get(self.index(record), {}).pop(key, None)
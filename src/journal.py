@@ -0,0 +1,98 @@
+'''
+' Durable rotation journal, so a crashed run can resume where it stopped.
+' Every completed step per node is appended as a JSON line and fsync'ed.
+' Node names get reused (OKE names nodes by private IP, on-prem machines keep
+' their hostnames), so entries are keyed by name and uid.
+'
+' @file: journal.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+class RotationJournal():
+  steps = ("scaled", "cordoned", "drained", "deleted")
+
+  def __init__(self, path=None, resume=False):
+    # Without a path the journal is kept in memory only (e.g. dry runs).
+    self.path = path
+    self._lock = threading.Lock()
+    # {node key: {step: recorded at}}
+    self._done = {}
+
+    if path:
+      os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+      if resume and os.path.exists(path):
+        self._load()
+      else:
+        open(path, "w").close()
+
+  @staticmethod
+  def key(node):
+    # A node record, or a plain node name. A new node taking an old one's name
+    # gets a fresh key, from its uid or else its creation time.
+    if isinstance(node, str):
+      return node
+    identity = node.uid or (node.created_at.isoformat() if node.created_at else None)
+    return f"{node.name}/{identity}" if identity else node.name
+
+  def record(self, node, step):
+    if step not in self.steps:
+      raise ValueError(f"unknown journal step: {step}")
+    key = self.key(node)
+    at = datetime.now(timezone.utc).isoformat()
+    with self._lock:
+      self._done.setdefault(key, {})[step] = at
+      if self.path:
+        with open(self.path, "a") as f:
+          f.write(json.dumps({ "node": key, "step": step, "at": at }) + "\n")
+          f.flush()
+          os.fsync(f.fileno())
+
+  def done(self, node, step):
+    with self._lock:
+      return step in self._done.get(self.key(node), ())
+
+  def completed_nodes(self, step):
+    # Keys of the nodes `step` was recorded for.
+    with self._lock:
+      return set(key for key, steps in self._done.items() if step in steps)
+
+  def prune(self, nodes):
+    # Forgets the nodes no longer in the cluster (`nodes`), so a long-lived journal
+    # doesn't grow forever. The file is rewritten only when something was dropped.
+    keep = set(self.key(node) for node in nodes)
+    with self._lock:
+      gone = [key for key in self._done if key not in keep]
+      if not gone:
+        return []
+      for key in gone:
+        del self._done[key]
+      if self.path:
+        self._rewrite()
+    return gone
+
+  def _rewrite(self):
+    # Written aside and swapped in, so a crash leaves either journal whole.
+    staging = f"{self.path}.tmp"
+    with open(staging, "w") as f:
+      for key, steps in self._done.items():
+        for step, at in steps.items():
+          f.write(json.dumps({ "node": key, "step": step, "at": at }) + "\n")
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(staging, self.path)
+
+  def _load(self):
+    with open(self.path) as f:
+      for line in f:
+        try:
+          entry = json.loads(line)
+        except ValueError:
+          # a torn last line from a crash mid-write.
+          continue
+        self._done.setdefault(entry["node"], {})[entry["step"]] = entry.get("at")
@@ -1,13 +1,23 @@
 '''
-' Common logging utility, writes to system's output channels (stderr).
+' Common logging utility, writes to system's output channels (stdout).
+' Records are queued and written by a background listener, so rotation workers
+' never block on output, and can also be written as JSON lines of typed fields.
 '
 ' @file: log_helper.py
 ' @author: Abdullah Alotaibi
 ' @date: 25/03/2023
 '
 '''
+import atexit
+import json
+import queue
 import sys
 import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+DATE_FORMAT = '%H:%M:%S'
 
 class Singleton(type):
     _instances = {}
@@ -18,13 +28,79 @@ class Singleton(type):
 
 class Logger(metaclass=Singleton):
   _instance = None
+  _queue = None
+  _listener = None
+  # Added to every JSON line, e.g. the cluster of a fleet worker.
+  _fields = {}
 
   def instance():
     if not Logger._instance:
-      logging.basicConfig(
-         stream=sys.stdout,
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s %(message)s', datefmt='%H:%M:%S'
-      )
+      console = logging.StreamHandler(sys.stdout)
+      console.setLevel(logging.INFO)
+      console.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+      Logger._queue = queue.Queue()
+      Logger._listener = QueueListener(Logger._queue, console, respect_handler_level=True)
+      Logger._listener.start()
+      atexit.register(Logger._listener.stop)
+
+      root = logging.getLogger()
+      root.setLevel(logging.INFO)
+      root.addHandler(LazyQueueHandler(Logger._queue))
       Logger._instance = logging.getLogger("main")
     return Logger._instance
+
+  def event(name, message, *args, level=logging.INFO, **fields):
+    # A rotation event: `message` is only formatted by the listener, `fields` stay typed
+    # (node, pod, phase, duration, outcome ..) for the JSON lines.
+    logger = Logger.instance()
+    if logger.isEnabledFor(level):
+      logger.log(level, message, *args, extra={ "event": name, "fields": fields })
+
+  def log_events(path):
+    # Writes every record as a JSON line to `path`, or to stdout in place of the text
+    # output with "-". DEBUG events, e.g. each single eviction, are included.
+    logger = Logger.instance()
+    handler = logging.StreamHandler(sys.stdout) if path == "-" else logging.FileHandler(path)
+    handler.setFormatter(JsonFormatter())
+    if path == "-":
+      Logger._listener.handlers = (handler,)
+    else:
+      Logger._listener.handlers = Logger._listener.handlers + (handler,)
+    logger.setLevel(logging.DEBUG)
+
+  def flush():
+    # Blocks until the listener has written every queued record.
+    if Logger._queue:
+      Logger._queue.join()
+
+  def tag(label):
+    # Prefixes every record with `label`, e.g. the cluster a fleet worker rotates.
+    Logger.instance()
+    Logger._fields = { "cluster": label }
+    for handler in Logger._listener.handlers:
+      if not isinstance(handler.formatter, JsonFormatter):
+        handler.setFormatter(
+          logging.Formatter(f'%(asctime)s %(levelname)s [{label}] %(message)s', datefmt=DATE_FORMAT)
+        )
+
+
+class LazyQueueHandler(QueueHandler):
+  # The stock handler formats the message in the calling thread, here it's left to the
+  # listener. Records never leave the process, so they're queued as they are.
+  def prepare(self, record):
+    return record
+
+
+class JsonFormatter(logging.Formatter):
+  def format(self, record):
+    entry = {
+      "at": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+      "level": record.levelname.lower(),
+      "event": getattr(record, "event", "log"),
+      "message": record.getMessage().strip(),
+    }
+    entry.update(Logger._fields)
+    entry.update(getattr(record, "fields", {}))
+    if record.exc_info:
+      entry["error"] = self.formatException(record.exc_info)
+    return json.dumps(entry, default=str)
@@ -0,0 +1,163 @@
+'''
+' Rotation instrumentation: phase and per-node step durations, API call counts
+' and latency histograms by endpoint, and time spent throttled or backing off,
+' exported in OpenMetrics text format.
+'
+' @file: metrics.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from urllib.request import Request, urlopen
+from log_helper import Logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metrics():
+  _instance = None
+
+  def instance():
+    if not Metrics._instance:
+      Metrics._instance = Metrics()
+    return Metrics._instance
+
+  def __init__(self, prefix="node_rotator"):
+    self.prefix = prefix
+    self._lock = threading.Lock()
+    self.phases = {}
+    self.node_steps = {}
+    self.api_calls = {}
+    self.api_latency = {}
+    # Totals of the shared client-side rate limiter.
+    self.throttled_seconds = 0.0
+    self.retries = 0
+    self.backoff_seconds = 0.0
+
+  @contextmanager
+  def phase(self, name):
+    started = time.monotonic()
+    outcome = "failed"
+    try:
+      yield
+      outcome = "success"
+    finally:
+      duration = time.monotonic() - started
+      with self._lock:
+        self.phases[name] = duration
+      Logger.event(
+        "phase", " Phase %s finished in %.1fs (%s).", name, duration, outcome,
+        level=logging.DEBUG, phase=name, duration=duration, outcome=outcome
+      )
+
+  @contextmanager
+  def node_step(self, node_name, step):
+    # Steps are cordon, evict, wait and drain.
+    started = time.monotonic()
+    outcome = "failed"
+    try:
+      yield
+      outcome = "success"
+    finally:
+      duration = time.monotonic() - started
+      with self._lock:
+        self.node_steps[(node_name, step)] = duration
+      Logger.event(
+        "node_step", " Node %s step %s finished in %.1fs (%s).", node_name, step, duration, outcome,
+        level=logging.DEBUG, node=node_name, step=step, duration=duration, outcome=outcome
+      )
+
+  def observe_api_call(self, backend, endpoint, seconds, outcome="success"):
+    with self._lock:
+      key = (backend, endpoint, outcome)
+      self.api_calls[key] = self.api_calls.get(key, 0) + 1
+
+      histogram = self.api_latency.setdefault((backend, endpoint), [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+      index = bisect_left(LATENCY_BUCKETS, seconds)
+      if index < len(LATENCY_BUCKETS):
+        histogram[0][index] += 1
+      histogram[1] += seconds
+      histogram[2] += 1
+
+  def observe_throttle(self, seconds):
+    with self._lock:
+      self.throttled_seconds += seconds
+
+  def observe_retry(self, delay):
+    with self._lock:
+      self.retries += 1
+      self.backoff_seconds += delay
+
+  def render(self, openmetrics=True):
+    p = self.prefix
+    lines = []
+    with self._lock:
+      lines.append(f"# TYPE {p}_phase_duration_seconds gauge")
+      lines.append(f"# HELP {p}_phase_duration_seconds Wall time of each rotation phase.")
+      for phase, seconds in self.phases.items():
+        lines.append(f"{p}_phase_duration_seconds{_labels(phase=phase)} {seconds:.6f}")
+
+      lines.append(f"# TYPE {p}_node_step_duration_seconds gauge")
+      lines.append(f"# HELP {p}_node_step_duration_seconds Wall time of each rotation step per node.")
+      for (node, step), seconds in sorted(self.node_steps.items()):
+        lines.append(f"{p}_node_step_duration_seconds{_labels(node=node, step=step)} {seconds:.6f}")
+
+      # OpenMetrics names the counter family without its `_total` sample suffix.
+      family = f"{p}_api_calls" if openmetrics else f"{p}_api_calls_total"
+      lines.append(f"# TYPE {family} counter")
+      lines.append(f"# HELP {family} API calls by backend, endpoint and outcome.")
+      for (backend, endpoint, outcome), count in sorted(self.api_calls.items()):
+        lines.append(f"{p}_api_calls_total{_labels(backend=backend, endpoint=endpoint, outcome=outcome)} {count}")
+
+      lines.append(f"# TYPE {p}_api_call_duration_seconds histogram")
+      lines.append(f"# HELP {p}_api_call_duration_seconds API call latency by backend and endpoint.")
+      for (backend, endpoint), (buckets, total, count) in sorted(self.api_latency.items()):
+        cumulative = 0
+        for bound, hits in zip(LATENCY_BUCKETS, buckets):
+          cumulative += hits
+          labels = _labels(backend=backend, endpoint=endpoint, le=str(bound))
+          lines.append(f"{p}_api_call_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(backend=backend, endpoint=endpoint, le="+Inf")
+        lines.append(f"{p}_api_call_duration_seconds_bucket{labels} {count}")
+        lines.append(f"{p}_api_call_duration_seconds_sum{_labels(backend=backend, endpoint=endpoint)} {total:.6f}")
+        lines.append(f"{p}_api_call_duration_seconds_count{_labels(backend=backend, endpoint=endpoint)} {count}")
+
+      for name, description, value in (
+        ("api_throttled_seconds", "Time API calls waited on the rate limit.", self.throttled_seconds),
+        ("api_retries", "API calls retried after a retryable error.", self.retries),
+        ("api_backoff_seconds", "Time spent backing off before retrying API calls.", self.backoff_seconds),
+      ):
+        family = f"{p}_{name}" if openmetrics else f"{p}_{name}_total"
+        lines.append(f"# TYPE {family} counter")
+        lines.append(f"# HELP {family} {description}")
+        lines.append(f"{p}_{name}_total {value if isinstance(value, int) else format(value, '.6f')}")
+
+    if openmetrics:
+      lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+  def write_textfile(self, path):
+    # Written aside and renamed, so a collector never reads a half-written file.
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+      f.write(self.render())
+    os.replace(temp_path, path)
+
+  def push(self, url, timeout=10):
+    # Pushgateway-style endpoints accept the classic text format (no EOF marker).
+    request = Request(url, data=self.render(openmetrics=False).encode(), method="PUT")
+    request.add_header("Content-Type", "text/plain; version=0.0.4")
+    with urlopen(request, timeout=timeout) as response:
+      return response.status
+
+
+def _labels(**labels):
+  def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+  return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
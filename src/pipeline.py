@@ -0,0 +1,73 @@
+'''
+' Pipelined rolling rotation: replacements for the next batch are provisioned
+' while the current batch drains, and each batch's old nodes are deleted as
+' soon as it has drained.
+'
+' @file: pipeline.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+from concurrent.futures import ThreadPoolExecutor
+from log_helper import Logger
+from metrics import Metrics
+
+class PipelinedRotation():
+  '''
+  ' Batches are the rotator's waves (`max_unavailable` nodes each). Provider calls
+  ' run one at a time on their own worker, in the order
+  '
+  '   expand(1), [drain(1) | expand(2)], delete(1), [drain(2) | expand(3)], delete(2), ..
+  '
+  ' so at most one batch of replacements is provisioned ahead of the drain, and
+  ' the pool is never resized by two calls at once. An optional `warmup(batch)`
+  ' runs right after each expand, as part of provisioning the batch.
+  '''
+  def __init__(self, kube, provider, warmup=None):
+    self.kube = kube
+    self.provider = provider
+    self.warmup = warmup
+    self.logger = Logger.instance()
+    self.metrics = Metrics.instance()
+
+  def run(self):
+    self.kube.rotation_results = {}
+    batches = list(self.kube.waves())
+    if not batches or not self.kube.prepare_rotation():
+      return self.kube.rotation_results
+
+    with ThreadPoolExecutor(max_workers=1) as provider_stage:
+      provisioned = provider_stage.submit(self._provision, batches[0], 1)
+      deletions = []
+      for number, batch in enumerate(batches, 1):
+        # A batch is only drained once its replacements are Ready; a failed
+        # provisioning stops the rotation before any further node is cordoned.
+        provisioned.result()
+        if number < len(batches):
+          provisioned = provider_stage.submit(self._provision, batches[number], number + 1)
+
+        with self.metrics.phase(f"drain-batch-{number}"):
+          rotated = self.kube.rotate_wave(batch, number)
+        skipped = len(batch) - len(rotated)
+        if skipped:
+          self.logger.warning(" Keeping %s nodes of batch %s that failed to rotate.", skipped, number)
+        if rotated:
+          deletions.append(provider_stage.submit(self._delete, rotated, number))
+
+      for deletion in deletions:
+        deletion.result()
+
+    return self.kube.rotation_results
+
+  def _provision(self, batch, number):
+    self.logger.info(" Provisioning %s replacements for batch %s ..", len(batch), number)
+    with self.metrics.phase(f"provision-batch-{number}"):
+      self.provider.expand_cluster_for_rotation(batch)
+    if self.warmup:
+      with self.metrics.phase(f"prepull-batch-{number}"):
+        self.warmup(batch)
+
+  def _delete(self, nodes, number):
+    self.logger.info(" Deleting %s drained nodes of batch %s ..", len(nodes), number)
+    with self.metrics.phase(f"resize-batch-{number}"):
+      self.provider.resize_cluster_after_rotation(nodes)
@@ -0,0 +1,95 @@
+'''
+' Drain-cost-aware rotation planner: orders rotatable nodes and splits them into
+' waves, so evictions stay within PodDisruptionBudget headroom and disruption is
+' spread across topology zones.
+'
+' @file: planner.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+
+class DrainCost():
+  __slots__ = ("pods", "local_storage", "budget_usage", "blocked", "score")
+
+  def __init__(self, pods, local_storage, budget_usage, blocked, score):
+    self.pods = pods
+    self.local_storage = local_storage
+    # {pdb key: pods of this node it covers}
+    self.budget_usage = budget_usage
+    self.blocked = blocked
+    self.score = score
+
+
+class RotationPlanner():
+  # Pods with local storage lose their data and restart cold, pods beyond a budget's
+  # headroom are retried until replacements are Ready .. both cost more than a plain pod.
+  local_storage_weight = 2
+  blocked_weight = 10
+
+  def __init__(self, nodes, pod_index, budgets, wave_size=1):
+    self.nodes = nodes
+    self.pod_index = pod_index
+    self.budgets = { b.key: b for b in budgets }
+    self._budgets_by_namespace = {}
+    for budget in budgets:
+      self._budgets_by_namespace.setdefault(budget.namespace, []).append(budget)
+    self.wave_size = max(1, wave_size)
+    self.costs = { node.name: self._cost_of(node) for node in nodes }
+
+  def plan(self):
+    # Cheapest nodes first. Each wave is filled greedily, preferring zones that are
+    # neither in the wave nor in the previous one, then nodes that keep evictions
+    # within every budget's headroom. Waves are only filled past that headroom when
+    # no other node is left, so blocked evictions end up in as few waves as possible.
+    remaining = sorted(self.nodes, key=lambda n: (self.costs[n.name].score, n.name))
+    waves = []
+    previous_zones = set()
+    while remaining:
+      wave, usage, zones = [], {}, set()
+      for spread_zones, within_budgets in ((True, True), (False, True), (False, False)):
+        for node in list(remaining):
+          if len(wave) == self.wave_size:
+            break
+          if spread_zones and (node.zone in zones or node.zone in previous_zones):
+            continue
+          if within_budgets and not self._fits(node, usage):
+            continue
+          wave.append(node)
+          remaining.remove(node)
+          zones.add(node.zone)
+          for key, count in self.costs[node.name].budget_usage.items():
+            usage[key] = usage.get(key, 0) + count
+      waves.append(wave)
+      previous_zones = zones
+    return waves
+
+  def describe(self, waves):
+    lines = []
+    for number, wave in enumerate(waves, 1):
+      lines.append(f"Wave {number}:")
+      for node in wave:
+        cost = self.costs[node.name]
+        lines.append(
+          f"  {node.name} (zone: {node.zone or '-'}, pods: {cost.pods}, local storage: {cost.local_storage}, "
+          f"blocked by budgets: {cost.blocked}, cost: {cost.score})"
+        )
+    return lines
+
+  def _cost_of(self, node):
+    pods = self.pod_index.get(node.name, [])
+    usage = {}
+    for pod in pods:
+      for budget in self._budgets_by_namespace.get(pod.namespace, ()):
+        if budget.covers(pod):
+          usage[budget.key] = usage.get(budget.key, 0) + 1
+    local_storage = len([p for p in pods if p.local_storage])
+    blocked = sum(max(0, count - self.budgets[key].disruptions_allowed) for key, count in usage.items())
+    score = len(pods) + self.local_storage_weight * local_storage + self.blocked_weight * blocked
+    return DrainCost(len(pods), local_storage, usage, blocked, score)
+
+  def _fits(self, node, usage):
+    return all(
+      usage.get(key, 0) + count <= self.budgets[key].disruptions_allowed
+      for key, count in self.costs[node.name].budget_usage.items()
+    )
@@ -0,0 +1,141 @@
+'''
+' Warm-up of replacement nodes: the images of the pods about to be evicted are
+' pulled onto the new nodes by a short-lived DaemonSet, so rescheduled pods don't
+' all wait on the same cold pulls.
+'
+' @file: prepull.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import time
+import uuid
+from kubernetes import client
+from log_helper import Logger
+
+# Waiting reasons of a container whose image is on the node, but which won't run.
+PULLED_REASONS = ("CrashLoopBackOff", "RunContainerError", "CreateContainerError")
+FAILED_REASONS = ("ErrImagePull", "ImagePullBackOff", "InvalidImageName", "ErrImageNeverPull")
+
+
+class ImagePrePuller():
+  '''
+  ' The DaemonSet is pinned to the replacements by node name and tolerates every taint;
+  ' it runs one container per distinct image, and is deleted once every replacement has
+  ' pulled (or failed to pull) them all, or the time budget runs out. A failed or late
+  ' pull never holds the rotation back, its pods just start cold as they would have.
+  '''
+  app_label = "node-rotator-prepull"
+
+  def __init__(self, kube, namespace="default", timeout=300):
+    self.kube = kube
+    self.namespace = namespace
+    self.timeout = timeout
+    self.poll_interval = 2
+    self.logger = Logger.instance()
+    # Replacements already warmed up, so a batch only waits on its own.
+    self.warmed = set()
+
+  def warm(self, provider, nodes=None):
+    # Pulls the images of `nodes` (default: every rotatable node) onto the replacements the
+    # provider saw joining since the last call. Returns a summary of the pulls.
+    targets = sorted(set(provider.provisioned_nodes) - self.warmed)
+    images = self.images_of(self.kube.rotatable_nodes if nodes is None else nodes)
+    summary = { "nodes": len(targets), "images": len(images), "pulled": 0, "failed": 0, "timed_out": False }
+    if not targets or not images:
+      self.logger.info(" No new replacements or images to pre-pull, skipping the warm-up.")
+      return summary
+    if self.kube.dry_mode:
+      self.logger.info(" Would pre-pull %s images onto %s replacements.", len(images), len(targets))
+      return summary
+
+    name = f"{self.app_label}-{uuid.uuid4().hex[:8]}"
+    apps_api = self.kube.clients.kubernetes(self.kube.context, api_class=client.AppsV1Api)
+    self.logger.info(" Pre-pulling %s images onto %s replacements ..", len(images), len(targets))
+    apps_api.create_namespaced_daemon_set(self.namespace, self.manifest(name, targets, images))
+    try:
+      summary.update(self._wait(name, targets, len(images)))
+    finally:
+      apps_api.delete_namespaced_daemon_set(name, self.namespace, propagation_policy="Background")
+    self.warmed.update(targets)
+
+    Logger.event(
+      "prepull", " Pre-pulled %s images onto %s replacements: %s pulled, %s failed%s.",
+      len(images), len(targets), summary["pulled"], summary["failed"],
+      " (timed out)" if summary["timed_out"] else "", **summary
+    )
+    return summary
+
+  def images_of(self, nodes):
+    if not self.kube.pod_index:
+      self.kube._build_pod_index()
+    images = set()
+    for node in nodes:
+      for pod in self.kube.pod_index.get(node.name, []):
+        images.update(pod.images)
+    return sorted(images)
+
+  def manifest(self, name, targets, images):
+    labels = { "app": self.app_label, "prepull-run": name }
+    containers = [
+      client.V1Container(
+        name=f"image-{i}", image=image, image_pull_policy="IfNotPresent",
+        # any command will do, the image is pulled before it runs.
+        command=["sleep", "3600"],
+        resources=client.V1ResourceRequirements(requests={ "cpu": "1m", "memory": "4Mi" })
+      )
+      for i, image in enumerate(images)
+    ]
+    affinity = client.V1Affinity(node_affinity=client.V1NodeAffinity(
+      required_during_scheduling_ignored_during_execution=client.V1NodeSelector(node_selector_terms=[
+        client.V1NodeSelectorTerm(match_fields=[
+          client.V1NodeSelectorRequirement(key="metadata.name", operator="In", values=list(targets))
+        ])
+      ])
+    ))
+    return client.V1DaemonSet(
+      metadata=client.V1ObjectMeta(name=name, labels=labels),
+      spec=client.V1DaemonSetSpec(
+        selector=client.V1LabelSelector(match_labels=labels),
+        template=client.V1PodTemplateSpec(
+          metadata=client.V1ObjectMeta(labels=labels),
+          spec=client.V1PodSpec(
+            containers=containers, affinity=affinity,
+            tolerations=[client.V1Toleration(operator="Exists")],
+            automount_service_account_token=False, termination_grace_period_seconds=0
+          )
+        )
+      )
+    )
+
+  def _wait(self, name, targets, image_count):
+    # Polls the DaemonSet's pods until every target has settled all of its images.
+    deadline = time.monotonic() + self.timeout
+    while True:
+      pods = self.kube.api.list_namespaced_pod(self.namespace, label_selector=f"prepull-run={name}").items
+      settled = { pod.spec.node_name: self._settled(pod) for pod in pods if pod.spec.node_name in targets }
+      pulled = sum(p for p, _ in settled.values())
+      failed = sum(f for _, f in settled.values())
+      done = len(settled) == len(targets) and pulled + failed == len(targets) * image_count
+      if done or time.monotonic() >= deadline:
+        if not done:
+          self.logger.warning(
+            " Pre-pull not done within %s sec (%s of %s images pulled), draining anyway.",
+            self.timeout, pulled, len(targets) * image_count
+          )
+        return { "pulled": pulled, "failed": failed, "timed_out": not done }
+      time.sleep(self.poll_interval)
+
+  @staticmethod
+  def _settled(pod):
+    # (pulled, failed) container images of a pre-pull pod.
+    pulled = failed = 0
+    for status in (pod.status.container_statuses if pod.status else None) or []:
+      if status.state is None:
+        continue
+      waiting = status.state.waiting
+      if waiting is None or status.image_id or waiting.reason in PULLED_REASONS:
+        pulled += 1
+      elif waiting.reason in FAILED_REASONS:
+        failed += 1
+    return pulled, failed
@@ -0,0 +1,45 @@
+'''
+' Provider registry: providers are looked up by name and only imported once selected,
+' so runs that don't need a cloud SDK never load it. Other packages can add theirs
+' under the `node_rotator.providers` entry point group, e.g. `aws = mypkg.aws:AwsProvider`.
+'
+' @file: __init__.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import importlib
+
+ENTRY_POINT_GROUP = "node_rotator.providers"
+BUILTIN_PROVIDERS = {
+  "oci": "oci:OCIProvider",
+  "self_managed": "self_managed:SelfManaged",
+}
+
+
+def load_provider(name):
+  target = BUILTIN_PROVIDERS.get(name)
+  if target:
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(f".{module}", __name__), attribute)
+
+  entry_point = _entry_points().get(name)
+  if entry_point is None:
+    raise NotImplementedError(f"provider '{name}' is not available.")
+  return entry_point.load()
+
+
+def available_providers():
+  return sorted(set(BUILTIN_PROVIDERS) | set(_entry_points()))
+
+
+def _entry_points():
+  from importlib import metadata
+
+  entry_points = metadata.entry_points()
+  # `select` is Python 3.10+, earlier versions return a dict of groups.
+  if hasattr(entry_points, "select"):
+    group = entry_points.select(group=ENTRY_POINT_GROUP)
+  else:
+    group = entry_points.get(ENTRY_POINT_GROUP, [])
+  return { entry_point.name: entry_point for entry_point in group }
@@ -7,29 +7,107 @@
 '
 '''
 from __future__ import annotations
+import time
 from abc import ABCMeta, abstractmethod
+from client_factory import ClientFactory
+from cluster_utils import KubeUtils
+from journal import RotationJournal
 from log_helper import Logger
+from records import NodeRecord
 
 class AbstractProvider():
 
-  def __init__(self, nodes_list, provision_time=300, dry=False, **kwargs):
+  def __init__(self, nodes_list, provision_time=300, dry=False, kube_api=None, journal=None,
+               replacements=None, node_cache=None, **kwargs):
     self.dry_mode = dry
     self.logger = Logger.instance()
+    self.clients = ClientFactory.instance()
+    self.kube_api = kube_api
+    # A synced node informer (daemon mode), polled for readiness instead of the API.
+    self.node_cache = node_cache
+    self.journal = journal or RotationJournal()
 
-    self.scale_factor = len(nodes_list)
     self.rotatable_nodes = nodes_list
+    # Names of the nodes that get a replacement, or None for one per rotated node.
+    self.replacements = replacements
+    # Names of the replacements seen turning Ready, e.g. to warm them up before draining.
+    self.provisioned_nodes = set()
     self.provision_wait = provision_time
+    self.poll_interval = 2
+    self.max_poll_interval = 30
 
     self._load_configuration(**kwargs)
 
+  # Both steps act on every rotatable node, or only on the given `nodes`
+  # when the rotation is pipelined batch by batch.
   @abstractmethod
-  def expand_cluster_for_rotation(self):
+  def expand_cluster_for_rotation(self, nodes=None):
     pass
 
   @abstractmethod
-  def resize_cluster_after_rotation(self):
+  def resize_cluster_after_rotation(self, nodes=None):
     pass
 
   @abstractmethod
   def _load_configuration(self):
     pass
+
+  @property
+  def scale_factor(self):
+    return len(self._needs_replacement())
+
+  def manages(self, node):
+    # Whether the provider can replace and delete `node`. A node it can't must not be
+    # drained, it would stay cordoned and empty for good.
+    return True
+
+  def pool_of(self, node):
+    # The pool a replacement for `node` would be provisioned in, or None when unknown.
+    # Replacement sizing only pools nodes the way the provider itself does.
+    return node.pool
+
+  def _nodes_pending(self, step, nodes=None):
+    # Rotatable (or given) nodes whose `step` isn't recorded in the journal yet.
+    nodes = self.rotatable_nodes if nodes is None else nodes
+    return [node for node in nodes if not self.journal.done(node, step)]
+
+  def _needs_replacement(self, nodes=None):
+    nodes = self.rotatable_nodes if nodes is None else nodes
+    if self.replacements is None:
+      return list(nodes)
+    return [node for node in nodes if node.name in self.replacements]
+
+  def _ready_node_names(self):
+    if self.node_cache is not None:
+      nodes = self.node_cache.items()
+    else:
+      nodes = [node for page in KubeUtils.paginate(self.kube_api.list_node, NodeRecord) for node in page]
+    return set(node.name for node in nodes if node.ready)
+
+  def _wait_for_new_ready_nodes(self, baseline, expected):
+    # Returns once `expected` nodes outside `baseline` report Ready,
+    # or False when `provision_wait` runs out first.
+    if self.kube_api is None:
+      self.logger.warning(" No kubernetes client given, cannot watch for new nodes.")
+      return False
+
+    def check():
+      joined = self._ready_node_names() - baseline
+      self.provisioned_nodes.update(joined)
+      self.logger.info(" %s of %s replacement nodes are Ready ..", len(joined), expected)
+      return len(joined) >= expected
+
+    return self._poll(check, self.provision_wait)
+
+  def _poll(self, check, timeout):
+    # Polls `check` with exponential backoff until it holds or `timeout` seconds pass.
+    deadline = time.monotonic() + timeout
+    interval = self.poll_interval
+    while True:
+      if check():
+        return True
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return False
+      time.sleep(min(interval, remaining))
+      interval = min(interval * 2, self.max_poll_interval)
@@ -6,66 +6,139 @@
 ' @date: 18/03/2023
 '
 '''
-import time
 import oci
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from oci.container_engine.models import UpdateNodePoolDetails, UpdateNodePoolNodeConfigDetails
 from .abstract import AbstractProvider
 
 class OCIProvider(AbstractProvider):
 
-  def expand_cluster_for_rotation(self):
-    # Increase the current cluster by replacement nodes before rotation :)
-    node_pool = self._get_node_pool()
-    current_size = node_pool.node_config_details.size
-    new_size = current_size + self.scale_factor
-
-    if new_size > current_size:
-      self.logger.info(f' Scaling up the node pool to {new_size} nodes.')
-      if not self.dry_mode:
-        response = self.client.update_node_pool(
-          node_pool_id=node_pool.id,
-          update_node_pool_details=UpdateNodePoolDetails(
-            node_config_details=UpdateNodePoolNodeConfigDetails(size=new_size)
-          )
-        )
-        self._check_call_result(response)
-
-      self.logger.info(f" Waiting {self.provision_wait} sec for provision operation to finalize..")
-      time.sleep(self.provision_wait)
-
-  def resize_cluster_after_rotation(self):
-    # Get the current node pool size and node list.
-    node_pool = self._get_node_pool()
-    current_size = node_pool.node_config_details.size
-    new_size = current_size - self.scale_factor
-
-    # Scale down the node pool by deleting older nodes.
-    while current_size > new_size and self.rotatable_nodes:
-      node = self.rotatable_nodes.pop(-1)
-      if not self.dry_mode:
-        self.logger.info(f" Terminating node '%s' ..", node["name"])
-        response = self.client.delete_node(
-          node_pool_id=node_pool.id,
-          node_id=node["spec"].provider_id,
-          is_decrement_size=True,
-          is_force_deletion_after_override_grace_duration=True
-        )
-        self._check_call_result(response)
-        current_size -= 1
-
-    self.logger.info(f" Waiting {self.provision_wait} sec for scale operation to finalize..")
-    time.sleep(self.provision_wait)
-    self.logger.info(f' Successfully scaled down the node pool to {current_size} nodes.')
+  def expand_cluster_for_rotation(self, nodes=None):
+    # Increase every affected node pool by its own share of replacements :)
+    wanted = self._needs_replacement(nodes)
+    pending = self._nodes_pending("scaled", wanted)
+    if len(pending) < len(wanted):
+      self.logger.info(' %s replacements were provisioned by a previous run.', len(wanted) - len(pending))
+    groups = self._group_by_pool(pending)
+    if not groups:
+      return
+
+    baseline = self._ready_node_names() if self.kube_api and not self.dry_mode else set()
+    self._for_each_pool(groups, self._expand_pool)
+
+    if not self.dry_mode:
+      self.logger.info(" Waiting up to %s sec for replacements to be Ready ..", self.provision_wait)
+      expected = sum(len(nodes) for _, nodes in groups.values())
+      if not self._wait_for_new_ready_nodes(baseline, expected):
+        raise TimeoutError(f"replacement nodes not Ready within {self.provision_wait} seconds.")
+
+  def resize_cluster_after_rotation(self, nodes=None):
+    # Scale down each node pool by deleting its older nodes, all at once.
+    pending = self._nodes_pending("deleted", nodes)
+    groups = self._group_by_pool(pending)
+    pools = { node.name: pool for pool, nodes in groups.values() for node in nodes }
+
+    deletions = {}
+    if self.dry_mode:
+      for node_name in pools:
+        self.logger.info(" Would terminate node '%s'.", node_name)
+    elif pools:
+      with ThreadPoolExecutor(max_workers=min(self.delete_workers, len(pools))) as executor:
+        futures = {
+          executor.submit(self._delete_node, pools[node.name], node): node
+          for _, nodes in groups.values() for node in nodes
+        }
+        for future in as_completed(futures):
+          node = futures[future]
+          try:
+            deletions[node.name] = future.result()
+          except Exception as e:
+            self.logger.error(" Terminating node %s failed: %s", node.name, e)
+      self._invalidate_node_pools()
+
+    if deletions:
+      self.logger.info(" Waiting up to %s sec for scale operation to finalize..", self.provision_wait)
+      statuses = self._track_work_requests(deletions)
+      for node_name, status in sorted(statuses.items()):
+        if status != "SUCCEEDED":
+          self.logger.warning(" Termination of node %s is %s.", node_name, status)
+
+    for pool, nodes in groups.values():
+      removed = len([n for n in nodes if n.name in deletions])
+      size = pool.node_config_details.size - removed
+      self.logger.info(' Successfully scaled down the node pool %s to %s nodes.', pool.name, size)
+
+  def _expand_pool(self, pool, nodes):
+    current_size = pool.node_config_details.size
+    new_size = current_size + len(nodes)
+    self.logger.info(' Scaling up the node pool %s to %s nodes.', pool.name, new_size)
+    if self.dry_mode:
+      return
+
+    response = self.client.update_node_pool(
+      node_pool_id=pool.id,
+      update_node_pool_details=UpdateNodePoolDetails(
+        node_config_details=UpdateNodePoolNodeConfigDetails(size=new_size)
+      )
+    )
+    self._check_call_result(response)
+    self._invalidate_node_pools()
+    for node in nodes:
+      self.journal.record(node, "scaled")
+    self._wait_for_work_requests([self._work_request_id(response)])
+
+  def _delete_node(self, node_pool, node):
+    self.logger.info(" Terminating node '%s' ..", node.name)
+    response = self.client.delete_node(
+      node_pool_id=node_pool.id,
+      node_id=node.provider_id,
+      is_decrement_size=True,
+      is_force_deletion_after_override_grace_duration=True
+    )
+    self._check_call_result(response)
+    self.journal.record(node, "deleted")
+    return self._work_request_id(response)
+
+  def manages(self, node):
+    # Only nodes of the eligible (--oci-node-pool-prefix) node pools are scaled and deleted.
+    return node.provider_id in self._node_pool_index()
+
+  def pool_of(self, node):
+    # OKE nodes carry no node pool label, they're pooled by instance OCID.
+    pool = self._node_pool_index().get(node.provider_id)
+    return pool.id if pool else None
+
+  def _group_by_pool(self, nodes):
+    # {pool id: (pool, [nodes])} for the given nodes; nodes outside any eligible pool are skipped.
+    index = self._node_pool_index()
+    groups = {}
+    for node in nodes:
+      pool = index.get(node.provider_id)
+      if pool is None:
+        self.logger.warning(" Node %s is not in an eligible node pool, skipping it.", node.name)
+        continue
+      groups.setdefault(pool.id, (pool, []))[1].append(node)
+    return groups
+
+  def _for_each_pool(self, groups, job):
+    # Runs `job(pool, nodes)` for every pool in parallel, re-raising the first failure.
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+      futures = [executor.submit(job, pool, nodes) for pool, nodes in groups.values()]
+      for future in as_completed(futures):
+        future.result()
 
   def _load_configuration(self, **kwargs):
     config = oci.config.from_file()
-    self.client = oci.container_engine.ContainerEngineClient(config)
-    self.node_pool_filter = "non-autoscaler"
+    self.client = self.clients.oci_container_engine(config)
+    self.node_pool_filter = kwargs.get('oci_node_pool_prefix', "non-autoscaler") or ""
+    self.failed_work_states = ("FAILED", "CANCELING", "CANCELED")
+    self.delete_workers = 10
+    self._node_pool_index_cache = None
 
     self.cluster_id = kwargs['oci_cluster_id']
     # assign compartment from args or infer it from node annotations.
-    inferred_comp_id = self.rotatable_nodes[0]["annotations"]["oci.oraclecloud.com/compartment-id"]
+    inferred_comp_id = self.rotatable_nodes[0].compartment_id
     self.compartment_id = kwargs['oci_compartment_id'] or inferred_comp_id
 
     if not self.compartment_id:
@@ -73,24 +146,74 @@ class OCIProvider(AbstractProvider):
     if not self.cluster_id:
       raise AttributeError("provider 'cluster_id' is missing.")
 
-    self.logger.info(f' Passed configurations: compartment: %s ', self.compartment_id)
-    self.logger.info(f' Passed configurations: cluster: %s ', self.cluster_id)
-
-
-  def _get_node_pool(self):
-    response = self.client.list_node_pools(
-      compartment_id=self.compartment_id,
-      cluster_id=self.cluster_id
-    )
+    self.logger.info(' Passed configurations: compartment: %s ', self.compartment_id)
+    self.logger.info(' Passed configurations: cluster: %s ', self.cluster_id)
+
+
+  def _node_pool_index(self):
+    # Maps each node's provider id (instance OCID) to its node pool. The pools are
+    # listed once; their members come from one get_node_pool per eligible pool,
+    # fetched concurrently, as pool summaries don't carry them.
+    if self._node_pool_index_cache is None:
+      response = self.client.list_node_pools(
+        compartment_id=self.compartment_id,
+        cluster_id=self.cluster_id
+      )
+      self._check_call_result(response)
+      eligible = [np for np in response.data if np.name.startswith(self.node_pool_filter)]
+
+      index = {}
+      if eligible:
+        with ThreadPoolExecutor(max_workers=len(eligible)) as executor:
+          for node_pool in executor.map(self._get_node_pool, eligible):
+            for node in node_pool.nodes or []:
+              index[node.id] = node_pool
+      self._node_pool_index_cache = index
+    return self._node_pool_index_cache
+
+  def _get_node_pool(self, summary):
+    response = self.client.get_node_pool(summary.id)
     self._check_call_result(response)
-
-    node_pool = [np for np in response.data if np.name.startswith(self.node_pool_filter)][0]
+    node_pool = response.data
     name = node_pool.name
     size = node_pool.node_config_details.size
-    self.logger.info(f' Processing node pool: %s which have %s nodes currently.', name, size)
+    self.logger.info(' Processing node pool: %s which have %s nodes currently.', name, size)
 
     return node_pool
 
+  def _invalidate_node_pools(self):
+    self._node_pool_index_cache = None
+
+  def _work_request_id(self, response):
+    return response.headers.get("opc-work-request-id")
+
+  def _wait_for_work_requests(self, work_request_ids):
+    # Tracks OCI work requests until all of them reach a final state.
+    statuses = self._track_work_requests({ w: w for w in work_request_ids if w })
+    for work_request_id, status in statuses.items():
+      if status in self.failed_work_states:
+        raise ConnectionError(f"work request {work_request_id} ended as {status}.")
+    return all(status == "SUCCEEDED" for status in statuses.values())
+
+  def _track_work_requests(self, work_requests):
+    # Polls each pending work request concurrently, until all are final or
+    # `provision_wait` runs out. Returns the last status per key.
+    statuses = { key: None for key in work_requests }
+    final_states = ("SUCCEEDED",) + self.failed_work_states
+
+    def status_of(key):
+      return key, self.client.get_work_request(work_requests[key]).data.status
+
+    def check():
+      pending = [key for key, status in statuses.items() if status not in final_states]
+      if pending:
+        with ThreadPoolExecutor(max_workers=min(self.delete_workers, len(pending))) as executor:
+          statuses.update(executor.map(status_of, pending))
+      return all(status in final_states for status in statuses.values())
+
+    self._poll(check, self.provision_wait)
+    return statuses
+
   def _check_call_result(self, response):
     success_code = re.compile("^20[0-9]$")
     if not success_code.match(str(response.status)):
@@ -1,29 +1,127 @@
 '''
 ' On perimese kubernetes implementation of abstract provider.
 '
-' @file: oci.py
+' @file: self_managed.py
 ' @author: Abdullah Alotaibi
 ' @date: 18/03/2023
 '
 '''
+import json
+import os
+import shlex
+import subprocess
 import time
-import oci
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 from .abstract import AbstractProvider
 
 '''
 ' This provider is used when the cluster is managed manually in terms of nodes,
 ' Such as on-prem servers pool, virtualization, etc.
+'
+' Machines are added and removed by hooks, run once per replacement and per drained node:
+' a local executable, called as `<hook> provision|decommission <node>` with NODE_* variables
+' in its environment, or an http(s) webhook, POSTed `{"action": .., "node": {..}}`. Without
+' hooks, the operator of the cluster adds and removes them by hand.
 '''
 class SelfManaged(AbstractProvider):
-  def expand_cluster_for_rotation(self):
-    self.logger.info(f'Need to increase the cluster size by {self.scale_factor} nodes more ..')
-    self.logger.info(f'Do nothing, leave it for operator of the cluster beforehand.')
-    pass
+  def expand_cluster_for_rotation(self, nodes=None):
+    pending = self._nodes_pending("scaled", self._needs_replacement(nodes))
+    if not self.provision_hook:
+      self.logger.info(' Need to increase the cluster size by %s nodes more ..', len(pending))
+      self.logger.info(' Do nothing, leave it for operator of the cluster beforehand.')
+      return
+    if not pending:
+      return
+
+    baseline = self._ready_node_names() if self.kube_api and not self.dry_mode else set()
+    provisioned, failed = self._run_hooks(self.provision_hook, "provision", pending, "scaled")
+    if failed:
+      raise RuntimeError(f"provision hook failed for nodes: {', '.join(sorted(failed))}.")
+
+    if not self.dry_mode:
+      self.logger.info(" Waiting up to %s sec for replacements to be Ready ..", self.provision_wait)
+      if not self._wait_for_new_ready_nodes(baseline, len(provisioned)):
+        raise TimeoutError(f"replacement nodes not Ready within {self.provision_wait} seconds.")
+
+  def resize_cluster_after_rotation(self, nodes=None):
+    pending = self._nodes_pending("deleted", nodes)
+    if not self.decommission_hook:
+      self.logger.info(' Now need to remove the older %s nodes.', len(pending))
+      self.logger.info(' Do nothing, For the operator of the cluster afterward.')
+      return
+
+    _, failed = self._run_hooks(self.decommission_hook, "decommission", pending, "deleted")
+    for node_name, error in sorted(failed.items()):
+      self.logger.error(" Decommissioning node %s failed: %s", node_name, error)
+
+  def _run_hooks(self, hook, action, nodes, step):
+    # Runs `hook` for every node concurrently, records `step` for the ones it succeeded on.
+    succeeded, failed = [], {}
+    if not nodes:
+      return succeeded, failed
+    if self.dry_mode:
+      for node in nodes:
+        self.logger.info(" Would run the %s hook for node '%s'.", action, node.name)
+      return list(nodes), failed
 
-  def resize_cluster_after_rotation(self):
-    self.logger.info(f'Now need to remove the older {self.scale_factor} nodes.')
-    self.logger.info(f'Do nothing, For the operator of the cluster afterward.')
-    pass
+    with ThreadPoolExecutor(max_workers=min(self.hook_workers, len(nodes))) as executor:
+      futures = { executor.submit(self._run_hook, hook, action, node): node for node in nodes }
+      for future in as_completed(futures):
+        node = futures[future]
+        try:
+          future.result()
+          self.journal.record(node, step)
+          succeeded.append(node)
+        except Exception as e:
+          failed[node.name] = e
+    return succeeded, failed
+
+  def _run_hook(self, hook, action, node):
+    # Retried with backoff, except for webhook client errors which won't go away.
+    attempts = self.hook_retries + 1
+    interval = self.poll_interval
+    for attempt in range(1, attempts + 1):
+      self.logger.info(" Running the %s hook for node '%s' (attempt %s) ..", action, node.name, attempt)
+      try:
+        if hook.startswith(("http://", "https://")):
+          self._call_webhook(hook, action, node)
+        else:
+          self._call_executable(hook, action, node)
+        return
+      except Exception as e:
+        retryable = not (isinstance(e, HTTPError) and 400 <= e.code < 500)
+        if attempt == attempts or not retryable:
+          raise
+        self.logger.warning(" The %s hook for node %s failed: %s, retrying ..", action, node.name, e)
+        time.sleep(interval)
+        interval = min(interval * 2, self.max_poll_interval)
+
+  def _call_executable(self, hook, action, node):
+    env = dict(os.environ, ROTATOR_ACTION=action, **{
+      f"NODE_{key.upper()}": value or "" for key, value in _describe(node).items()
+    })
+    result = subprocess.run(
+      shlex.split(hook) + [action, node.name], env=env, timeout=self.hook_timeout,
+      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    if result.returncode != 0:
+      raise RuntimeError(f"exit status {result.returncode}: {result.stdout.strip()[-500:]}")
+
+  def _call_webhook(self, url, action, node):
+    payload = json.dumps({ "action": action, "node": _describe(node) }).encode()
+    request = Request(url, data=payload, method="POST", headers={ "Content-Type": "application/json" })
+    with urlopen(request, timeout=self.hook_timeout) as response:
+      response.read()
 
   def _load_configuration(self, **kwargs):
-    ...
\ No newline at end of file
+    self.provision_hook = kwargs.get("self_managed_provision_hook")
+    self.decommission_hook = kwargs.get("self_managed_decommission_hook")
+    self.hook_timeout = kwargs.get("self_managed_hook_timeout") or 300
+    self.hook_retries = kwargs.get("self_managed_hook_retries", 2)
+    self.hook_workers = 10
+
+
+def _describe(node):
+  return { "name": node.name, "pool": node.pool, "zone": node.zone, "provider_id": node.provider_id }
@@ -0,0 +1,147 @@
+'''
+' Client-side rate limiting and retry for kubernetes and provider API calls.
+' A single token bucket is shared by every client in the process.
+'
+' @file: rate_limiter.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import functools
+import json
+import random
+import threading
+import time
+from log_helper import Logger
+from metrics import Metrics
+
+class RateLimiter():
+  _instance = None
+  retryable_statuses = (429, 500, 502, 503, 504)
+
+  def instance():
+    if not RateLimiter._instance:
+      RateLimiter._instance = RateLimiter()
+    return RateLimiter._instance
+
+  def __init__(self, qps=20, burst=40, max_retries=5, base_delay=0.5, max_delay=30, metrics=None):
+    self.logger = Logger.instance()
+    self.metrics = metrics or Metrics.instance()
+    self._lock = threading.Lock()
+    self.max_retries = max_retries
+    self.base_delay = base_delay
+    self.max_delay = max_delay
+    self.configure(qps, burst)
+    self.calls = 0
+    self.retries = 0
+    self.throttled_seconds = 0.0
+    self.backoff_seconds = 0.0
+
+  def configure(self, qps, burst):
+    with self._lock:
+      self.qps = float(qps)
+      self.burst = max(1, int(burst))
+      self._tokens = float(self.burst)
+      self._updated_at = time.monotonic()
+
+  def acquire(self):
+    # Takes one token, sleeping outside the lock when the bucket is empty.
+    with self._lock:
+      now = time.monotonic()
+      self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.qps)
+      self._updated_at = now
+      self._tokens -= 1
+      wait = -self._tokens / self.qps if self._tokens < 0 else 0
+      self.calls += 1
+      self.throttled_seconds += wait
+    if wait > 0:
+      self.metrics.observe_throttle(wait)
+      time.sleep(wait)
+
+  def call(self, func, *args, **kwargs):
+    attempt = 0
+    while True:
+      self.acquire()
+      try:
+        return func(*args, **kwargs)
+      except Exception as e:
+        retryable = getattr(e, "status", None) in self.retryable_statuses and not _budget_refusal(e)
+        if not retryable or attempt >= self.max_retries:
+          raise
+        delay = self._retry_delay(e, attempt)
+        attempt += 1
+        with self._lock:
+          self.retries += 1
+          self.backoff_seconds += delay
+        self.metrics.observe_retry(delay)
+        self.logger.warning(
+          " API call %s got status %s, retrying in %.1f sec ..",
+          getattr(func, "__name__", func), e.status, delay
+        )
+        time.sleep(delay)
+
+  def stats(self):
+    with self._lock:
+      return {
+        "calls": self.calls,
+        "retries": self.retries,
+        "throttled_seconds": round(self.throttled_seconds, 3),
+        "backoff_seconds": round(self.backoff_seconds, 3),
+      }
+
+  def _retry_delay(self, error, attempt):
+    # Honors the server's Retry-After, otherwise full-jitter exponential backoff.
+    headers = getattr(error, "headers", None) or {}
+    retry_after = headers.get("Retry-After") or headers.get("retry-after")
+    if retry_after:
+      try:
+        return min(float(retry_after), self.max_delay)
+      except ValueError:
+        pass
+    return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class RateLimitedClient():
+  '''
+  ' Wraps an API client so every method call goes through the shared limiter.
+  '''
+  def __init__(self, api, limiter=None, backend="kubernetes", metrics=None):
+    self._api = api
+    self.limiter = limiter or RateLimiter.instance()
+    self.backend = backend
+    self.metrics = metrics or Metrics.instance()
+
+  def __getattr__(self, name):
+    attribute = getattr(self._api, name)
+    if not callable(attribute):
+      return attribute
+
+    @functools.wraps(attribute)
+    def timed(*args, **kwargs):
+      # Every attempt is observed, so retried calls show up as separate outcomes.
+      started = time.monotonic()
+      outcome = "success"
+      try:
+        return attribute(*args, **kwargs)
+      except Exception as e:
+        outcome = str(getattr(e, "status", None) or type(e).__name__)
+        raise
+      finally:
+        self.metrics.observe_api_call(self.backend, name, time.monotonic() - started, outcome)
+
+    # `wraps` keeps the docstring, which kubernetes' watch relies on to find return types.
+    @functools.wraps(attribute)
+    def limited(*args, **kwargs):
+      return self.limiter.call(timed, *args, **kwargs)
+    return limited
+
+
+def _budget_refusal(error):
+  # An eviction a PodDisruptionBudget refuses is a 429 as well, but no backoff will let it
+  # through: it's left to the drain to retry, and kept out of the throttling counters.
+  try:
+    status = json.loads(getattr(error, "body", None) or "null")
+  except (TypeError, ValueError):
+    return False
+  causes = ((status.get("details") or {}).get("causes") or []) if isinstance(status, dict) else []
+  return any(cause.get("reason") == "DisruptionBudget" for cause in causes)
@@ -0,0 +1,276 @@
+'''
+' Compact node and pod records carrying only the fields rotation needs.
+' Built either from kubernetes client models or straight from raw API JSON.
+'
+' @file: records.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import math
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+ZONE_LABEL = "topology.kubernetes.io/zone"
+POOL_LABELS = ("eks.amazonaws.com/nodegroup", "cloud.google.com/gke-nodepool", "agentpool", "node-pool")
+COMPARTMENT_ANNOTATION = "oci.oraclecloud.com/compartment-id"
+QUANTITY_SUFFIXES = {
+  "": 1, "n": 1e-9, "u": 1e-6, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+  "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60,
+}
+MIRROR_ANNOTATION = "kubernetes.io/config.mirror"
+LOCAL_VOLUMES = frozenset(("emptyDir", "hostPath"))
+
+
+class NodeRecord():
+  __slots__ = (
+    "name", "created_at", "provider_id", "pool", "zone", "compartment_id", "allocatable", "unschedulable",
+    "uid", "tainted", "ready"
+  )
+
+  def __init__(self, name, created_at=None, provider_id=None, pool=None, zone=None, compartment_id=None,
+               allocatable=None, unschedulable=False, uid=None, tainted=False, ready=False):
+    self.name = name
+    self.created_at = created_at
+    self.provider_id = provider_id
+    self.pool = pool
+    self.zone = zone
+    self.compartment_id = compartment_id
+    # (millicores, bytes, pods), or None when the node doesn't report it.
+    self.allocatable = allocatable
+    self.unschedulable = unschedulable
+    self.uid = uid
+    # Carries a NoSchedule or NoExecute taint, so not every pod may land on it.
+    self.tainted = tainted
+    self.ready = ready
+
+  @classmethod
+  def from_model(cls, node):
+    labels = node.metadata.labels or {}
+    annotations = node.metadata.annotations or {}
+    return cls(
+      node.metadata.name,
+      node.metadata.creation_timestamp,
+      node.spec.provider_id if node.spec else None,
+      _pool_of(labels),
+      labels.get(ZONE_LABEL),
+      annotations.get(COMPARTMENT_ANNOTATION),
+      _allocatable(node.status.allocatable if node.status else None),
+      bool(node.spec and node.spec.unschedulable),
+      node.metadata.uid,
+      _tainted(t.effect for t in (node.spec.taints if node.spec else None) or []),
+      any(
+        c.type == "Ready" and c.status == "True"
+        for c in (node.status.conditions if node.status else None) or []
+      )
+    )
+
+  @classmethod
+  def from_json(cls, node):
+    metadata = node["metadata"]
+    labels = metadata.get("labels") or {}
+    annotations = metadata.get("annotations") or {}
+    spec = node.get("spec") or {}
+    return cls(
+      metadata["name"],
+      parse_timestamp(metadata.get("creationTimestamp")),
+      spec.get("providerID"),
+      _pool_of(labels),
+      labels.get(ZONE_LABEL),
+      annotations.get(COMPARTMENT_ANNOTATION),
+      _allocatable((node.get("status") or {}).get("allocatable")),
+      bool(spec.get("unschedulable")),
+      metadata.get("uid"),
+      _tainted(t.get("effect") for t in spec.get("taints") or []),
+      any(
+        c.get("type") == "Ready" and c.get("status") == "True"
+        for c in (node.get("status") or {}).get("conditions") or []
+      )
+    )
+
+  def __repr__(self):
+    return f"NodeRecord({self.name!r}, pool={self.pool!r}, zone={self.zone!r})"
+
+
+class PodRecord():
+  __slots__ = (
+    "name", "namespace", "node_name", "phase", "owner_kinds", "mirror", "labels", "local_storage", "requests",
+    "images"
+  )
+
+  def __init__(self, name, namespace="default", node_name=None, phase=None, owner_kinds=(), mirror=False,
+               labels=None, local_storage=False, requests=(0, 0), images=()):
+    self.name = name
+    self.namespace = namespace
+    self.node_name = node_name
+    self.phase = phase
+    self.owner_kinds = owner_kinds
+    self.mirror = mirror
+    self.labels = labels or {}
+    self.local_storage = local_storage
+    # (millicores, bytes) as the scheduler accounts them.
+    self.requests = requests
+    self.images = images
+
+  @property
+  def key(self):
+    return (self.namespace, self.name)
+
+  @classmethod
+  def from_model(cls, pod):
+    owners = pod.metadata.owner_references or []
+    annotations = pod.metadata.annotations or {}
+    volumes = (pod.spec.volumes if pod.spec else None) or []
+    containers = (pod.spec.containers if pod.spec else None) or []
+    init_containers = (pod.spec.init_containers if pod.spec else None) or []
+    return cls(
+      pod.metadata.name,
+      pod.metadata.namespace,
+      pod.spec.node_name if pod.spec else None,
+      pod.status.phase if pod.status else None,
+      tuple(owner.kind for owner in owners),
+      MIRROR_ANNOTATION in annotations,
+      pod.metadata.labels,
+      any(v.empty_dir is not None or v.host_path is not None for v in volumes),
+      _requests(
+        [(c.resources.requests if c.resources else None) for c in containers],
+        [(c.resources.requests if c.resources else None) for c in init_containers]
+      ),
+      tuple(c.image for c in init_containers + containers if c.image)
+    )
+
+  @classmethod
+  def from_json(cls, pod):
+    metadata = pod["metadata"]
+    owners = metadata.get("ownerReferences") or []
+    annotations = metadata.get("annotations") or {}
+    spec = pod.get("spec") or {}
+    containers = spec.get("containers") or []
+    init_containers = spec.get("initContainers") or []
+    return cls(
+      metadata["name"],
+      metadata.get("namespace"),
+      spec.get("nodeName"),
+      (pod.get("status") or {}).get("phase"),
+      tuple(owner.get("kind") for owner in owners),
+      MIRROR_ANNOTATION in annotations,
+      metadata.get("labels"),
+      any(LOCAL_VOLUMES.intersection(v) for v in spec.get("volumes") or []),
+      _requests(
+        [(c.get("resources") or {}).get("requests") for c in containers],
+        [(c.get("resources") or {}).get("requests") for c in init_containers]
+      ),
+      tuple(c["image"] for c in init_containers + containers if c.get("image"))
+    )
+
+  def __repr__(self):
+    return f"PodRecord({self.namespace!r}, {self.name!r}, node={self.node_name!r})"
+
+
+class DisruptionBudgetRecord():
+  __slots__ = ("name", "namespace", "match_labels", "match_expressions", "disruptions_allowed")
+
+  def __init__(self, name, namespace="default", match_labels=None, match_expressions=(), disruptions_allowed=0):
+    self.name = name
+    self.namespace = namespace
+    # None (no selector) covers no pod, while an empty selector covers the whole namespace.
+    self.match_labels = match_labels
+    # (key, operator, values) tuples, as in a label selector's matchExpressions.
+    self.match_expressions = match_expressions
+    self.disruptions_allowed = disruptions_allowed
+
+  @classmethod
+  def from_model(cls, pdb):
+    selector = pdb.spec.selector if pdb.spec else None
+    expressions = (selector.match_expressions if selector else None) or []
+    return cls(
+      pdb.metadata.name,
+      pdb.metadata.namespace,
+      (selector.match_labels or {}) if selector else None,
+      tuple((e.key, e.operator, tuple(e.values or ())) for e in expressions),
+      (pdb.status.disruptions_allowed if pdb.status else None) or 0
+    )
+
+  @classmethod
+  def from_json(cls, pdb):
+    metadata = pdb["metadata"]
+    selector = (pdb.get("spec") or {}).get("selector")
+    expressions = (selector or {}).get("matchExpressions") or []
+    return cls(
+      metadata["name"],
+      metadata.get("namespace"),
+      (selector.get("matchLabels") or {}) if selector is not None else None,
+      tuple((e["key"], e["operator"], tuple(e.get("values") or ())) for e in expressions),
+      (pdb.get("status") or {}).get("disruptionsAllowed") or 0
+    )
+
+  def covers(self, pod):
+    # Same semantics as a label selector; a PDB only covers pods of its own namespace.
+    if pod.namespace != self.namespace or self.match_labels is None:
+      return False
+    labels = pod.labels
+    if any(labels.get(k) != v for k, v in self.match_labels.items()):
+      return False
+    for key, operator, values in self.match_expressions:
+      if operator == "In" and labels.get(key) not in values:
+        return False
+      if operator == "NotIn" and labels.get(key) in values:
+        return False
+      if operator == "Exists" and key not in labels:
+        return False
+      if operator == "DoesNotExist" and key in labels:
+        return False
+    return True
+
+  @property
+  def key(self):
+    return (self.namespace, self.name)
+
+  def __repr__(self):
+    return f"DisruptionBudgetRecord({self.namespace!r}, {self.name!r}, allowed={self.disruptions_allowed})"
+
+
+def parse_timestamp(value):
+  # The API server always sends RFC 3339 timestamps in UTC.
+  if not value:
+    return None
+  return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+@lru_cache(maxsize=4096)
+def parse_quantity(value, scale=1):
+  # A resource quantity in base units times `scale`, rounded up: ("250m", 1000) is 250
+  # millicores, "1Gi" is 1073741824 bytes.
+  if value is None or value == "":
+    return 0
+  match = re.match(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)([a-zA-Z]*)$', str(value).strip())
+  if not match or match.group(2) not in QUANTITY_SUFFIXES:
+    raise ValueError(f"invalid quantity: {value}")
+  return math.ceil(float(match.group(1)) * QUANTITY_SUFFIXES[match.group(2)] * scale)
+
+def _allocatable(resources):
+  if not resources or "cpu" not in resources or "memory" not in resources:
+    return None
+  return (
+    parse_quantity(resources["cpu"], 1000), parse_quantity(resources["memory"]),
+    parse_quantity(resources.get("pods", 110))
+  )
+
+def _requests(containers, init_containers):
+  # Containers run together, init containers one at a time before them.
+  cpu = sum(parse_quantity((r or {}).get("cpu"), 1000) for r in containers)
+  memory = sum(parse_quantity((r or {}).get("memory")) for r in containers)
+  for r in init_containers:
+    cpu = max(cpu, parse_quantity((r or {}).get("cpu"), 1000))
+    memory = max(memory, parse_quantity((r or {}).get("memory")))
+  return (cpu, memory)
+
+def _tainted(effects):
+  return any(effect in ("NoSchedule", "NoExecute") for effect in effects)
+
+
+def _pool_of(labels):
+  for label in POOL_LABELS:
+    if label in labels:
+      return labels[label]
+  return None
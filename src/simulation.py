@@ -0,0 +1,248 @@
+'''
+' Discrete-event simulation of a rotation on a virtual clock. Replays the scanned
+' nodes and their pods through the bulk or pipelined flow with configured (or
+' previously measured) latencies, without calling any API or sleeping.
+'
+' @file: simulation.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import heapq
+import math
+import re
+from collections import deque
+from itertools import count
+from cluster_utils import KubeUtils
+from planner import RotationPlanner
+
+
+class VirtualClock():
+  '''
+  ' Runs processes, generators that yield seconds to sleep or events to wait on,
+  ' in virtual time order. Nothing ever sleeps, time jumps to the next event.
+  '''
+  def __init__(self):
+    self.now = 0.0
+    self._queue = []
+    self._order = count()
+
+  def process(self, generator):
+    done = Event(self)
+    self._resume(generator, done, None)
+    return done
+
+  def schedule(self, delay, callback):
+    heapq.heappush(self._queue, (self.now + delay, next(self._order), callback))
+
+  def run(self):
+    while self._queue:
+      self.now, _, callback = heapq.heappop(self._queue)
+      callback()
+    return self.now
+
+  def _resume(self, generator, done, value):
+    try:
+      waited = generator.send(value)
+    except StopIteration as stop:
+      done.succeed(stop.value)
+      return
+    if isinstance(waited, Event):
+      waited.on_done(lambda result: self._resume(generator, done, result))
+    else:
+      self.schedule(waited, lambda: self._resume(generator, done, None))
+
+
+class Event():
+  def __init__(self, clock):
+    self.clock = clock
+    self.triggered = False
+    self.value = None
+    self._callbacks = []
+
+  def succeed(self, value=None):
+    self.triggered = True
+    self.value = value
+    for callback in self._callbacks:
+      self.clock.schedule(0, lambda callback=callback: callback(value))
+    self._callbacks = []
+
+  def on_done(self, callback):
+    if self.triggered:
+      self.clock.schedule(0, lambda: callback(self.value))
+    else:
+      self._callbacks.append(callback)
+
+
+class Worker():
+  # A single first-come first-served worker, like the pipeline's provider stage.
+  def __init__(self, clock):
+    self.clock = clock
+    self.busy = False
+    self._waiting = deque()
+
+  def acquire(self):
+    event = Event(self.clock)
+    if self.busy:
+      self._waiting.append(event)
+    else:
+      self.busy = True
+      event.succeed()
+    return event
+
+  def release(self):
+    if self._waiting:
+      self._waiting.popleft().succeed()
+    else:
+      self.busy = False
+
+
+class Latencies():
+  __slots__ = ("cordon", "eviction", "termination", "blocked_retry", "provision", "delete")
+
+  # Seconds. Provisioning covers the work request and the new nodes turning Ready,
+  # termination is how long an evicted pod takes to go away.
+  def __init__(self, cordon=0.2, eviction=0.1, termination=30.0, blocked_retry=5.0,
+               provision=300.0, delete=120.0):
+    self.cordon = cordon
+    self.eviction = eviction
+    self.termination = termination
+    self.blocked_retry = blocked_retry
+    self.provision = provision
+    self.delete = delete
+
+  @classmethod
+  def from_metrics(cls, text, **defaults):
+    # Measured latencies, from the OpenMetrics textfile of an earlier (real) rotation.
+    samples = {}
+    for line in text.splitlines():
+      match = re.match(r'^(\w+)\{(.*)\} (\S+)$', line)
+      if match:
+        labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2)))
+        samples.setdefault(match.group(1), []).append((labels, float(match.group(3))))
+
+    def mean(name, **wanted):
+      # Label values match by prefix, so "provision" also covers pipelined "provision-batch-N".
+      values = [
+        value for labels, value in samples.get(name, [])
+        if all(labels.get(k, "").startswith(w) for k, w in wanted.items())
+      ]
+      return sum(values) / len(values) if values else None
+
+    latencies = cls(**defaults)
+    eviction = "create_namespaced_pod_eviction"
+    eviction_sum = mean("node_rotator_api_call_duration_seconds_sum", endpoint=eviction)
+    eviction_count = mean("node_rotator_api_call_duration_seconds_count", endpoint=eviction)
+    measured = {
+      "cordon": mean("node_rotator_node_step_duration_seconds", step="cordon"),
+      "eviction": eviction_sum / eviction_count if eviction_sum and eviction_count else None,
+      "termination": mean("node_rotator_node_step_duration_seconds", step="wait"),
+      "provision": mean("node_rotator_phase_duration_seconds", phase="provision"),
+      "delete": mean("node_rotator_phase_duration_seconds", phase="resize"),
+    }
+    for name, value in measured.items():
+      if value is not None:
+        setattr(latencies, name, value)
+    return latencies
+
+
+class RotationSimulator():
+  '''
+  ' Node drains follow `KubeUtils._drain_node`: the pods are evicted by a bounded pool of
+  ' workers, then waited on until they terminate. A pod beyond its budget's headroom waits
+  ' one retry plus one termination per blocked pod. Pods rescheduled onto nodes of later
+  ' waves aren't modeled.
+  '''
+  def __init__(self, nodes, pod_index, budgets=(), latencies=None, eviction_workers=16, plan=True):
+    self.nodes = nodes
+    self.pod_index = pod_index
+    self.budgets = budgets
+    self.latencies = latencies or Latencies()
+    self.eviction_workers = eviction_workers
+    self.plan = plan
+
+  def simulate(self, max_unavailable, pipelined=False):
+    size = KubeUtils.wave_size(max_unavailable, len(self.nodes))
+    planner = RotationPlanner(self.nodes, self.pod_index, self.budgets, size)
+    if self.plan:
+      waves = planner.plan()
+    else:
+      waves = [self.nodes[i:i + size] for i in range(0, len(self.nodes), size)]
+
+    clock = VirtualClock()
+    state = { "extra": 0, "peak_extra": 0 }
+    batches = [{ "number": n, "nodes": len(wave) } for n, wave in enumerate(waves, 1)]
+    flow = self._pipelined if pipelined else self._bulk
+    clock.process(flow(clock, waves, batches, state, planner.costs))
+    total = clock.run()
+
+    return {
+      "max_unavailable": max_unavailable,
+      "pipelined": pipelined,
+      "waves": len(waves),
+      "total": total,
+      "peak_extra": state["peak_extra"],
+      "batches": batches,
+    }
+
+  def _bulk(self, clock, waves, batches, state, costs):
+    yield self.latencies.provision
+    self._resize(state, sum(len(w) for w in waves))
+    for batch in batches:
+      batch["provisioned"] = clock.now
+    for wave, batch in zip(waves, batches):
+      batch["drain_started"] = clock.now
+      yield self._wave_seconds(wave, costs)
+      batch["drained"] = clock.now
+    yield self.latencies.delete
+    self._resize(state, -sum(len(w) for w in waves))
+    for batch in batches:
+      batch["deleted"] = clock.now
+
+  def _pipelined(self, clock, waves, batches, state, costs):
+    # Same ordering as PipelinedRotation: one provider worker, expand(k+1) queued
+    # as batch k starts draining, delete(k) queued as soon as it's drained.
+    provider = Worker(clock)
+
+    def provision(batch, size):
+      yield provider.acquire()
+      yield self.latencies.provision
+      self._resize(state, size)
+      batch["provisioned"] = clock.now
+      provider.release()
+
+    def delete(batch, size):
+      yield provider.acquire()
+      yield self.latencies.delete
+      self._resize(state, -size)
+      batch["deleted"] = clock.now
+      provider.release()
+
+    provisioned = clock.process(provision(batches[0], len(waves[0])))
+    deletions = []
+    for index, (wave, batch) in enumerate(zip(waves, batches)):
+      yield provisioned
+      if index + 1 < len(waves):
+        provisioned = clock.process(provision(batches[index + 1], len(waves[index + 1])))
+      batch["drain_started"] = clock.now
+      yield self._wave_seconds(wave, costs)
+      batch["drained"] = clock.now
+      deletions.append(clock.process(delete(batch, len(wave))))
+    for deletion in deletions:
+      yield deletion
+
+  def _wave_seconds(self, wave, costs):
+    # The wave is cordoned at once, then its nodes drain in parallel.
+    return self.latencies.cordon + max(self._drain_seconds(costs[node.name]) for node in wave)
+
+  def _drain_seconds(self, cost):
+    if not cost.pods:
+      return 0.0
+    latencies = self.latencies
+    evictions = math.ceil(cost.pods / self.eviction_workers) * latencies.eviction
+    blocked = cost.blocked * (latencies.blocked_retry + latencies.termination)
+    return evictions + latencies.termination + blocked
+
+  def _resize(self, state, change):
+    state["extra"] += change
+    state["peak_extra"] = max(state["peak_extra"], state["extra"])
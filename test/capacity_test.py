@@ -0,0 +1,101 @@
+'''
+' Unit tests of the capacity-aware replacement sizing.
+'
+' @file: capacity_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from collections import Counter
+from src.capacity import ReplacementSizer
+from src.records import NodeRecord, PodRecord, parse_quantity
+
+GIB = 2 ** 30
+
+class TestReplacementSizer:
+
+  def test_pack_fills_free_capacity_before_opening_new_nodes(self):
+    bins = [[2000, 8 * GIB, 110]]
+    demands = Counter({ (1000, 2 * GIB): 10 })
+
+    # two pods fit the free node, the other eight need two nodes of four.
+    assert ReplacementSizer.pack(demands, bins, [4000, 16 * GIB, 110]) == 2
+
+  def test_pack_respects_pod_slots_and_oversized_pods(self):
+    assert ReplacementSizer.pack(Counter({ (0, 0): 25 }), [], [4000, GIB, 10]) == 3
+    assert ReplacementSizer.pack(Counter({ (8000, GIB): 2 }), [], [4000, 16 * GIB, 110]) == 2
+
+  def test_only_what_the_remaining_nodes_cant_absorb_is_replaced(self):
+    allocatable = (10000, 40 * GIB, 110)
+    aged = [NodeRecord(f"old-{i}", pool="web", allocatable=allocatable) for i in range(3)]
+    remaining = [
+      NodeRecord("new-0", pool="web", allocatable=allocatable),
+      NodeRecord("cordoned", pool="web", allocatable=allocatable, unschedulable=True),
+      NodeRecord("other-pool", pool="db", allocatable=allocatable),
+    ]
+    pod_index = { node.name: _pods(node.name, 8, 1000, GIB) for node in aged }
+    usage = { "new-0": [4000, 4 * GIB, 4] }
+    daemons = { node.name: [1000, GIB, 1] for node in aged }
+
+    sizer = ReplacementSizer(aged, remaining, pod_index, usage, daemons)
+    replaced = sizer.plan()
+
+    # 24 pods of 1 CPU: new-0 takes 5 (9 - 4), new nodes take 8 each (9 - 1 for DaemonSets).
+    assert replaced == { "old-0", "old-1", "old-2" }
+    assert sizer.pools["web"]["replacements"] == 3
+
+    pod_index = { node.name: _pods(node.name, 4, 1000, GIB) for node in aged }
+    replaced = ReplacementSizer(aged, remaining, pod_index, usage, daemons).plan()
+    assert replaced == { "old-0" }
+
+  def test_nodes_without_allocatable_or_pool_keep_one_replacement_each(self):
+    aged = [NodeRecord("old-0", pool="web"), NodeRecord("old-1", pool="web")]
+    assert ReplacementSizer(aged, [], {}, {}, {}).plan() == { "old-0", "old-1" }
+
+    allocatable = (10000, 40 * GIB, 110)
+    aged = [NodeRecord(f"old-{i}", allocatable=allocatable) for i in range(2)]
+    remaining = [NodeRecord("idle", allocatable=allocatable)]
+    assert ReplacementSizer(aged, remaining, {}, {}, {}).plan() == { "old-0", "old-1" }
+
+  def test_pools_come_from_the_provider_and_tainted_nodes_are_left_out(self):
+    allocatable = (10000, 40 * GIB, 110)
+    aged = [NodeRecord(f"old-{i}", provider_id=f"ocid-{i}", allocatable=allocatable) for i in range(2)]
+    remaining = [
+      NodeRecord("idle", provider_id="ocid-idle", allocatable=allocatable),
+      NodeRecord("gpu", provider_id="ocid-gpu", allocatable=allocatable, tainted=True),
+    ]
+    pod_index = { node.name: _pods(node.name, 6, 1000, GIB) for node in aged }
+    pool_of = lambda node: "pool-a"
+
+    # "idle" takes 9 of the 12 pods; "gpu" could take the rest, but is tainted.
+    replaced = ReplacementSizer(aged, remaining, pod_index, {}, {}, pool_of=pool_of).plan()
+    assert replaced == { "old-0" }
+
+  def test_records_carry_requests_and_allocatable(self):
+    pod = PodRecord.from_json({
+      "metadata": { "name": "web-1" },
+      "spec": {
+        "containers": [
+          { "resources": { "requests": { "cpu": "250m", "memory": "128Mi" } } },
+          { "resources": { "requests": { "cpu": "0.5" } } },
+        ],
+        "initContainers": [{ "resources": { "requests": { "memory": "1Gi" } } }],
+      },
+    })
+    node = NodeRecord.from_json({
+      "metadata": { "name": "node-a" },
+      "spec": { "unschedulable": True, "taints": [{ "key": "gpu", "effect": "NoSchedule" }] },
+      "status": { "allocatable": { "cpu": "3920m", "memory": "16Gi", "pods": "110" } },
+    })
+
+    assert pod.requests == (750, GIB)
+    assert node.allocatable == (3920, 16 * GIB, 110)
+    assert node.unschedulable and node.tainted
+    assert parse_quantity("1e3") == 1000
+    with pytest.raises(ValueError):
+      parse_quantity("12 bytes")
+
+
+def _pods(node, count, cpu, memory):
+  return [PodRecord(f"{node}-{i}", node_name=node, requests=(cpu, memory)) for i in range(count)]
@@ -0,0 +1,52 @@
+'''
+' Unit tests of the shared API client factory.
+'
+' @file: client_factory_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from pytest_mock import mocker
+from kubernetes import config
+from src.client_factory import ClientFactory
+
+class TestClientFactory:
+
+  def test_kubernetes_clients_share_one_pool_per_context(self, mocker):
+    load = mocker.patch.object(config, 'load_kube_config', return_value=None)
+    factory = ClientFactory(pool_size=8)
+
+    first = factory.kubernetes("ctx-a")
+    second = factory.kubernetes("ctx-a")
+    other = factory.kubernetes("ctx-b")
+
+    assert first._api.api_client is second._api.api_client
+    assert other._api.api_client is not first._api.api_client
+    assert load.call_count == 2
+    assert first._api.api_client.rest_client.pool_manager.connection_pool_kw["maxsize"] == 8
+
+  def test_ensure_pool_size_only_grows(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    factory = ClientFactory(pool_size=8)
+    api = factory.kubernetes()
+
+    factory.ensure_pool_size(4)
+    assert factory.pool_size == 8
+    factory.ensure_pool_size(32)
+    assert api._api.api_client.rest_client.pool_manager.connection_pool_kw["maxsize"] == 32
+    assert factory.stats()["kubernetes"] == { "requests": 0, "connections": 0, "reused": 0 }
+
+  def test_oci_clients_are_shared_per_configuration(self, mocker):
+    import oci
+    engine = mocker.patch.object(oci.container_engine, 'ContainerEngineClient')
+    engine.side_effect = lambda config, **kwargs: mocker.MagicMock()
+    factory = ClientFactory()
+
+    first = factory.oci_container_engine({ "region": "eu-frankfurt-1" })
+    second = factory.oci_container_engine({ "region": "eu-frankfurt-1" })
+    other = factory.oci_container_engine({ "region": "us-ashburn-1" })
+
+    assert first is second and other is not first
+    assert engine.call_count == 2
+    assert len(factory._oci_sessions) == 2
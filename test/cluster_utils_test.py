@@ -6,10 +6,16 @@
 ' @date: 18/03/2023
 '
 '''
+import json
 import pytest
+from datetime import datetime, timedelta, timezone
 from pytest_mock import mocker
 from kubernetes import client, config
+from kubernetes.client.rest import ApiException
 from src.cluster_utils import KubeUtils
+from src.journal import RotationJournal
+from src.providers.self_managed import SelfManaged
+from src.records import NodeRecord, PodRecord
 
 class TestKubeUtils:
 
@@ -32,3 +38,302 @@ class TestKubeUtils:
     assert kube_utils.target_cluster == "my-k8s-cluster"
     assert kube_utils.dry_mode
     assert kube_utils.rotate_after_days == 25
+
+  def test_clients_are_bound_to_the_given_context(self, mocker):
+    load = mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=None)
+
+    kube_utils = KubeUtils(context="prod-eu")
+    assert kube_utils.context == "prod-eu"
+    assert load.call_args.kwargs["context"] == "prod-eu"
+    assert KubeUtils().context is None
+
+  def test_build_pod_index_pages_once_and_skips_unevictable_pods(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+
+    daemon = client.V1OwnerReference(api_version="apps/v1", kind="DaemonSet", name="ds", uid="1")
+    pods = [
+      _pod("web-1", "node-a"),
+      _pod("ds-1", "node-a", owners=[daemon]),
+      _pod("static-1", "node-a", annotations={"kubernetes.io/config.mirror": "x"}),
+      _pod("done-1", "node-a", phase="Succeeded"),
+      _pod("web-2", "node-b"),
+    ]
+    api.list_pod_for_all_namespaces.side_effect = [
+      client.V1PodList(items=pods[:3], metadata=client.V1ListMeta(_continue="next")),
+      client.V1PodList(items=pods[3:], metadata=client.V1ListMeta()),
+    ]
+
+    kube_utils = KubeUtils()
+    kube_utils.rotatable_nodes = [NodeRecord("node-a")]
+    kube_utils._build_pod_index()
+
+    assert api.list_pod_for_all_namespaces.call_count == 2
+    assert [p.name for p in kube_utils.pod_index["node-a"]] == ["web-1"]
+    assert "node-b" not in kube_utils.pod_index
+    api.list_namespace.assert_not_called()
+
+  def test_wave_size_accepts_counts_and_percentages(self):
+    assert KubeUtils.wave_size(1, 10) == 1
+    assert KubeUtils.wave_size("3", 10) == 3
+    assert KubeUtils.wave_size("25%", 10) == 2
+    assert KubeUtils.wave_size("1%", 10) == 1
+    assert KubeUtils.wave_size(50, 10) == 10
+    with pytest.raises(ValueError):
+      KubeUtils.wave_size("many", 10)
+
+  def test_process_nodes_reports_failures_without_aborting_the_wave(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=mocker.MagicMock())
+
+    kube_utils = KubeUtils(max_unavailable="2")
+    kube_utils.rotatable_nodes = [NodeRecord(n) for n in ("node-a", "node-b", "node-c")]
+    mocker.patch.object(kube_utils, '_build_pod_index')
+    mocker.patch.object(kube_utils, '_refresh_pod_index')
+    mocker.patch.object(kube_utils, '_cordon_node')
+    mocker.patch.object(kube_utils, '_drain_node', side_effect=[None, RuntimeError("stuck"), None])
+    waves = list(kube_utils.waves())
+
+    results = kube_utils.process_nodes()
+
+    assert [len(w) for w in waves] == [2, 1]
+    assert sorted(r["status"] for r in results.values()) == ["failed", "rotated", "rotated"]
+    assert kube_utils._drain_node.call_count == 3
+    kube_utils._refresh_pod_index.assert_called_once_with("node-c")
+
+  def test_pods_are_listed_once_per_planned_rotation(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    api.list_pod_for_all_namespaces.return_value = client.V1PodList(
+      items=[_pod("web-1", "node-a")], metadata=client.V1ListMeta()
+    )
+
+    kube_utils = KubeUtils()
+    kube_utils.rotatable_nodes = [NodeRecord("node-a")]
+    mocker.patch.object(kube_utils, '_list_disruption_budgets', return_value=[])
+    mocker.patch.object(kube_utils, '_cordon_node')
+    mocker.patch.object(kube_utils, '_drain_node')
+
+    kube_utils.plan_rotation()
+    kube_utils.process_nodes()
+
+    assert api.list_pod_for_all_namespaces.call_count == 1
+    assert kube_utils.rotation_results["node-a"]["status"] == "rotated"
+
+  def test_nodes_that_failed_to_drain_are_not_deleted(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=mocker.MagicMock())
+
+    kube_utils = KubeUtils(max_unavailable="2")
+    kube_utils.rotatable_nodes = [NodeRecord(n) for n in ("node-a", "node-b")]
+    mocker.patch.object(kube_utils, '_build_pod_index')
+    mocker.patch.object(kube_utils, '_cordon_node')
+    mocker.patch.object(
+      kube_utils, '_drain_node',
+      side_effect=lambda node: _raise(TimeoutError("blocked by a PDB")) if node.name == "node-b" else None
+    )
+    provider = SelfManaged(
+      kube_utils.rotatable_nodes, journal=RotationJournal(), self_managed_decommission_hook="decommission"
+    )
+    run_hook = mocker.patch.object(provider, '_run_hook')
+
+    kube_utils.process_nodes()
+    provider.resize_cluster_after_rotation(kube_utils.rotated_nodes())
+
+    assert [n.name for n in kube_utils.rotated_nodes()] == ["node-a"]
+    assert [c.args[2].name for c in run_hook.call_args_list] == ["node-a"]
+
+  def test_process_nodes_skips_steps_recorded_by_a_previous_run(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=mocker.MagicMock())
+    journal = RotationJournal()
+    journal.record("node-a", "cordoned")
+    journal.record("node-a", "drained")
+    journal.record("node-b", "cordoned")
+
+    kube_utils = KubeUtils(journal=journal)
+    kube_utils.rotatable_nodes = [NodeRecord(n) for n in ("node-a", "node-b")]
+    mocker.patch.object(kube_utils, '_build_pod_index')
+    mocker.patch.object(kube_utils, '_cordon_node')
+    mocker.patch.object(kube_utils, '_drain_node')
+
+    kube_utils.process_nodes()
+
+    kube_utils._cordon_node.assert_not_called()
+    assert [c.args[0].name for c in kube_utils._drain_node.call_args_list] == ["node-b"]
+    assert journal.done("node-b", "drained")
+
+  def test_wait_for_node_drained_returns_once_watch_empties_the_node(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    daemon = client.V1OwnerReference(api_version="apps/v1", kind="DaemonSet", name="ds", uid="1")
+    api.list_pod_for_all_namespaces.return_value = client.V1PodList(
+      items=[_pod("web-1", "node-a"), _pod("web-2", "node-a"), _pod("ds-1", "node-a", owners=[daemon])],
+      metadata=client.V1ListMeta(resource_version="10")
+    )
+    watcher = mocker.MagicMock()
+    watcher.stream.return_value = iter([
+      { "type": "DELETED", "object": _pod("web-1", "node-a") },
+      { "type": "MODIFIED", "object": _pod("web-2", "node-a", phase="Succeeded") },
+    ])
+    mocker.patch('kubernetes.watch.Watch', return_value=watcher)
+
+    kube_utils = KubeUtils()
+    assert kube_utils._wait_for_node_drained("node-a")
+    watcher.stop.assert_called_once()
+    assert watcher.stream.call_args.kwargs["resource_version"] == "10"
+
+  def test_wait_for_node_drained_gives_up_at_the_timeout(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    api.list_pod_for_all_namespaces.return_value = client.V1PodList(
+      items=[_pod("web-1", "node-a")], metadata=client.V1ListMeta(resource_version="10")
+    )
+    mocker.patch('kubernetes.watch.Watch')
+
+    kube_utils = KubeUtils()
+    kube_utils.wait_before_last_drain_seconds = 0
+    assert not kube_utils._wait_for_node_drained("node-a")
+
+  def test_evict_pods_runs_concurrently_and_classifies_outcomes(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+
+    def evict(name, namespace, body):
+      statuses = { "blocked": 429, "gone": 404, "broken": 500 }
+      if name in statuses:
+        raise ApiException(status=statuses[name])
+    api.create_namespaced_pod_eviction.side_effect = evict
+
+    kube_utils = KubeUtils()
+    mocker.patch.object(kube_utils.api.limiter, 'max_retries', 0)
+    pods = [PodRecord(name, node_name="node-a") for name in ("web", "blocked", "gone", "broken")]
+    outcomes = kube_utils._evict_pods(pods)
+
+    assert outcomes == {
+      ("default", "web"): "evicted",
+      ("default", "blocked"): "blocked",
+      ("default", "gone"): "gone",
+      ("default", "broken"): "failed",
+    }
+
+  def test_scan_nodes_pages_with_selectors_and_keeps_only_aged_nodes(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch.object(config, 'list_kube_config_contexts', return_value=([], { "name": "test" }))
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    api.list_node.side_effect = [
+      client.V1NodeList(items=[_node("old-1", 90), _node("new-1", 2)], metadata=client.V1ListMeta(_continue="next")),
+      client.V1NodeList(items=[_node("old-2", 61)], metadata=client.V1ListMeta()),
+    ]
+
+    kube_utils = KubeUtils(label_selector="pool=blue", field_selector="spec.unschedulable=false")
+    nodes = kube_utils.scan_nodes()
+
+    assert [n.name for n in nodes] == ["old-1", "old-2"]
+    first, second = api.list_node.call_args_list
+    assert first.kwargs == {
+      "limit": 500, "label_selector": "pool=blue", "field_selector": "spec.unschedulable=false"
+    }
+    assert second.kwargs["_continue"] == "next"
+    # remaining nodes are only kept when replacements get sized.
+    assert kube_utils.remaining_nodes == []
+
+  def test_scan_keeps_remaining_nodes_only_when_sizing(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    api.list_node.return_value = client.V1NodeList(
+      items=[_node("old-1", 90), _node("new-1", 2)], metadata=client.V1ListMeta()
+    )
+
+    kube_utils = KubeUtils(context="prod-eu", sizing=True)
+    kube_utils.scan_nodes()
+
+    assert [n.name for n in kube_utils.rotatable_nodes] == ["old-1"]
+    assert [n.name for n in kube_utils.remaining_nodes] == ["new-1"]
+
+  def test_fast_parse_projects_raw_json_pages_into_records(self, mocker):
+    api = mocker.MagicMock()
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=api)
+    pages = [
+      { "metadata": { "continue": "next" }, "items": [
+        { "metadata": { "name": "web-1", "namespace": "shop" }, "spec": { "nodeName": "node-a" },
+          "status": { "phase": "Running" } },
+        { "metadata": { "name": "ds-1", "namespace": "kube-system",
+                        "ownerReferences": [{ "kind": "DaemonSet", "name": "ds" }] },
+          "spec": { "nodeName": "node-a" }, "status": { "phase": "Running" } },
+      ]},
+      { "metadata": {}, "items": [
+        { "metadata": { "name": "web-2", "namespace": "shop" }, "spec": { "nodeName": "node-a" },
+          "status": { "phase": "Pending" } },
+      ]},
+    ]
+    api.list_pod_for_all_namespaces.side_effect = [
+      mocker.MagicMock(data=json.dumps(page).encode()) for page in pages
+    ]
+
+    kube_utils = KubeUtils(fast_parse=True)
+    kube_utils.rotatable_nodes = [NodeRecord("node-a")]
+    kube_utils._build_pod_index()
+
+    assert [p.key for p in kube_utils.pod_index["node-a"]] == [("shop", "web-1"), ("shop", "web-2")]
+    assert all(c.kwargs["_preload_content"] is False for c in api.list_pod_for_all_namespaces.call_args_list)
+
+  def test_final_drain_retries_pdb_blocked_pods_until_the_node_is_empty(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=mocker.MagicMock())
+    mocker.patch('time.sleep')
+    kube_utils = KubeUtils()
+    web = PodRecord("web", node_name="node-a")
+    listings = iter([[web], [web], []])
+    mocker.patch.object(
+      kube_utils, '_refresh_pod_index',
+      side_effect=lambda name: kube_utils.pod_index.__setitem__(name, next(listings))
+    )
+    mocker.patch.object(kube_utils, '_evict_pods', side_effect=[{ web.key: "blocked" }, { web.key: "evicted" }])
+    mocker.patch.object(kube_utils, '_wait_for_node_drained', return_value=True)
+
+    kube_utils._final_drain("node-a")
+
+    assert kube_utils._evict_pods.call_count == 2
+    kube_utils._wait_for_node_drained.assert_called_once()
+
+  def test_final_drain_raises_when_the_node_does_not_empty(self, mocker):
+    mocker.patch.object(config, 'load_kube_config', return_value=None)
+    mocker.patch('kubernetes.client.CoreV1Api', return_value=mocker.MagicMock())
+    kube_utils = KubeUtils()
+    kube_utils.wait_before_last_drain_seconds = 0
+    mocker.patch.object(
+      kube_utils, '_refresh_pod_index',
+      side_effect=lambda name: kube_utils.pod_index.__setitem__(name, [PodRecord("web")])
+    )
+
+    with pytest.raises(TimeoutError):
+      kube_utils._final_drain("node-a")
+
+
+def _node(name, age_days):
+  created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+  return client.V1Node(
+    metadata=client.V1ObjectMeta(name=name, creation_timestamp=created_at), spec=client.V1NodeSpec()
+  )
+
+def _pod(name, node, namespace="default", owners=None, annotations=None, phase="Running"):
+  return client.V1Pod(
+    metadata=client.V1ObjectMeta(
+      name=name, namespace=namespace, owner_references=owners, annotations=annotations
+    ),
+    spec=client.V1PodSpec(node_name=node, containers=[]),
+    status=client.V1PodStatus(phase=phase)
+  )
+
+def _raise(error):
+  raise error
@@ -0,0 +1,217 @@
+'''
+' Unit tests of the watch-fed caches and the daemon mode's controller.
+'
+' @file: controller_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from datetime import datetime, timedelta, timezone
+from pytest_mock import mocker
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from src.controller import MaintenanceWindow, RotationController
+from src.informer import Informer
+from src.journal import RotationJournal
+from src.records import NodeRecord, PodRecord
+
+class TestInformer:
+
+  def test_watch_resumes_from_the_listed_version_and_relists_only_when_expired(self, mocker):
+    kube = mocker.MagicMock(page_size=2)
+    kube._list_page.side_effect = [
+      ([PodRecord("a", node_name="n1")], "next", "10"),
+      ([PodRecord("b", node_name="n1")], None, "11"),
+      ([PodRecord("c", node_name="n2")], None, "20"),
+    ]
+    informer = Informer(kube, "list_pods", PodRecord, key=lambda p: p.key, index=lambda p: p.node_name)
+    streams = []
+
+    def stream(list_call, resource_version, **kwargs):
+      streams.append(resource_version)
+      if len(streams) == 1:
+        return _events(("ADDED", _pod("d", "n1", "12")), ("DELETED", _pod("a", "n1", "13")), expire=True)
+      informer.stop()
+      return iter([])
+
+    mocker.patch("kubernetes.watch.Watch").return_value.stream.side_effect = stream
+
+    informer._run()
+
+    # the first watch resumed from the first page's version, the second from the fresh listing.
+    assert streams == ["10", "20"]
+    assert informer.relists == 2
+    assert [p.name for p in informer.items()] == ["c"]
+    assert informer.by_index("n1") == []
+
+  def test_events_update_records_and_index(self, mocker):
+    kube = mocker.MagicMock(page_size=10)
+    kube._list_page.return_value = ([PodRecord("a", node_name="n1")], None, "1")
+    informer = Informer(kube, "list_pods", PodRecord, key=lambda p: p.key, index=lambda p: p.node_name)
+
+    def stream(list_call, resource_version, **kwargs):
+      informer.stop()
+      return _events(("ADDED", _pod("b", "n2", "2")), ("MODIFIED", _pod("a", "n2", "3")))
+
+    mocker.patch("kubernetes.watch.Watch").return_value.stream.side_effect = stream
+
+    informer._run()
+
+    assert informer.resource_version == "3"
+    assert informer.by_index("n1") == []
+    assert sorted(p.name for p in informer.by_index("n2")) == ["a", "b"]
+    assert informer.wait_for(lambda: len(informer.items()) == 2, timeout=0)
+
+
+class TestMaintenanceWindow:
+
+  def test_daily_and_weekday_windows(self):
+    daily = MaintenanceWindow.parse("01:00-05:00")
+    assert daily.contains(_at(2026, 10, 14, 1, 0))
+    assert not daily.contains(_at(2026, 10, 14, 5, 0))
+
+    weekend = MaintenanceWindow.parse("Sat,Sun 01:00-05:00")
+    assert weekend.contains(_at(2026, 10, 17, 3, 0))
+    assert not weekend.contains(_at(2026, 10, 16, 3, 0))
+
+  def test_overnight_window_belongs_to_the_day_it_starts(self):
+    window = MaintenanceWindow.parse("Fri 22:00-04:00")
+    assert window.contains(_at(2026, 10, 16, 23, 30))
+    assert window.contains(_at(2026, 10, 17, 3, 59))
+    assert not window.contains(_at(2026, 10, 16, 3, 0))
+    assert not window.contains(_at(2026, 10, 17, 22, 30))
+
+  def test_invalid_windows_are_rejected(self):
+    for text in ("1-5", "Someday 01:00-02:00", "25:00-26:00"):
+      with pytest.raises(ValueError):
+        MaintenanceWindow.parse(text)
+
+
+class TestRotationController:
+
+  def test_reconcile_rotates_one_budgeted_wave_of_due_nodes(self, mocker):
+    aged = datetime.now(timezone.utc) - timedelta(days=90)
+    nodes = [NodeRecord(n, aged) for n in ("a", "b", "c")] + [NodeRecord("new", datetime.now(timezone.utc))]
+    journal = RotationJournal()
+    journal.record(nodes[2], "deleted")
+    kube, provider = _controller_stage(mocker, journal, 1, pods=[PodRecord("web", node_name="a")])
+    controller = RotationController(kube, lambda nodes: provider)
+    controller.nodes = _Cache(nodes)
+    controller.budgets = _Cache([])
+
+    results = controller.reconcile()
+
+    # "c" is already rotated and "new" isn't due; of the rest, the idle node goes first.
+    assert list(results) == ["b"]
+    assert [n.name for n in provider.expand_cluster_for_rotation.call_args.args[0]] == ["b"]
+    assert [n.name for n in provider.resize_cluster_after_rotation.call_args.args[0]] == ["b"]
+    kube.api.list_node.assert_not_called()
+
+  def test_failed_nodes_are_backed_off_and_the_window_is_respected(self, mocker):
+    aged = datetime.now(timezone.utc) - timedelta(days=90)
+    kube, provider = _controller_stage(mocker, RotationJournal(), 1)
+    provider.expand_cluster_for_rotation.side_effect = TimeoutError("not Ready")
+    window = MaintenanceWindow.parse("01:00-05:00")
+    controller = RotationController(kube, lambda nodes: provider, window=window)
+    controller.nodes = _Cache([NodeRecord("a", aged)])
+    controller.budgets = _Cache([])
+
+    assert controller.reconcile(_at(2026, 10, 14, 12, 0)) == {}
+    assert controller.reconcile(_at(2026, 10, 14, 2, 0))["a"]["status"] == "failed"
+    assert controller.due_nodes() == []
+    kube.rotate_wave.assert_not_called()
+
+  def test_drained_nodes_the_provider_keeps_are_not_rotated_again(self, mocker):
+    aged = datetime.now(timezone.utc) - timedelta(days=90)
+    # e.g. a self managed provider without a decommission hook never records "deleted".
+    kube, provider = _controller_stage(mocker, RotationJournal(), 1)
+    controller = RotationController(kube, lambda nodes: provider)
+    controller.nodes = _Cache([NodeRecord("a", aged), NodeRecord("cordoned", aged, unschedulable=True)])
+    controller.budgets = _Cache([])
+
+    assert list(controller.reconcile()) == ["a"]
+    assert controller.reconcile() == {}
+    assert kube.rotate_wave.call_count == 1
+
+  def test_a_new_node_reusing_a_drained_nodes_name_is_rotated(self, mocker):
+    aged = datetime.now(timezone.utc) - timedelta(days=90)
+    journal = RotationJournal()
+    journal.record(NodeRecord("10.0.1.7", aged, uid="old"), "drained")
+    kube, provider = _controller_stage(mocker, journal, 1)
+    controller = RotationController(kube, lambda nodes: provider)
+    controller.nodes = _Cache([NodeRecord("10.0.1.7", aged, uid="new")])
+    controller.budgets = _Cache([])
+
+    assert list(controller.reconcile()) == ["10.0.1.7"]
+    assert journal.completed_nodes("drained") == { "10.0.1.7/new" }
+
+  def test_nodes_the_provider_cant_replace_are_never_drained(self, mocker):
+    aged = datetime.now(timezone.utc) - timedelta(days=90)
+    kube, provider = _controller_stage(mocker, RotationJournal(), 2)
+    provider.manages.side_effect = lambda node: node.name != "stray"
+    controller = RotationController(kube, lambda nodes: provider)
+    controller.nodes = _Cache([NodeRecord("a", aged), NodeRecord("stray", aged)])
+    controller.budgets = _Cache([])
+
+    assert list(controller.reconcile()) == ["a"]
+    assert controller.reconcile() == {}
+    assert [n.name for n in kube.rotate_wave.call_args.args[0]] == ["a"]
+
+  def test_run_backs_off_after_a_wave_without_progress(self, mocker):
+    kube, provider = _controller_stage(mocker, RotationJournal(), 1)
+    controller = RotationController(kube, lambda nodes: provider, interval=30)
+    mocker.patch.object(controller, 'start')
+    mocker.patch.object(controller, 'reconcile', side_effect=[
+      { "a": { "status": "rotated", "error": None } }, { "b": { "status": "failed", "error": "stuck" } }
+    ])
+    stopping = mocker.MagicMock()
+    stopping.is_set.side_effect = [False, False, True]
+
+    controller.run(stopping)
+
+    assert controller.reconcile.call_count == 2
+    stopping.wait.assert_called_once_with(30)
+
+
+class _Cache():
+  # Stands in for a synced Informer.
+  def __init__(self, records):
+    self.records = records
+
+  def items(self):
+    return list(self.records)
+
+
+def _controller_stage(mocker, journal, max_unavailable, pods=()):
+  kube = mocker.MagicMock(
+    journal=journal, max_unavailable=max_unavailable, label_selector=None, field_selector=None
+  )
+  kube.is_due.side_effect = lambda node: (datetime.now(timezone.utc) - node.created_at).days >= 60
+  kube._cached_pods.side_effect = lambda name: [p for p in pods if p.node_name == name]
+  kube.prepare_rotation.return_value = True
+  def rotate_wave(wave, number):
+    for node in wave:
+      journal.record(node, "drained")
+      kube.rotation_results[node.name] = { "status": "rotated", "error": None }
+    return wave
+  kube.rotate_wave.side_effect = rotate_wave
+  return kube, mocker.MagicMock()
+
+
+def _events(*events, expire=False):
+  for kind, pod in events:
+    yield { "type": kind, "object": pod }
+  if expire:
+    raise ApiException(status=410, reason="Expired")
+
+
+def _pod(name, node_name, resource_version):
+  return client.V1Pod(
+    metadata=client.V1ObjectMeta(name=name, namespace="default", resource_version=resource_version),
+    spec=client.V1PodSpec(node_name=node_name, containers=[])
+  )
+
+
+def _at(year, month, day, hour, minute):
+  return datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
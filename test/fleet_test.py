@@ -0,0 +1,62 @@
+'''
+' Unit tests of fleet mode.
+'
+' @file: fleet_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import os
+import pytest
+from src.fleet import aggregate, cluster_summary, resolve_contexts, run_fleet
+
+class TestFleet:
+
+  def test_globs_expand_against_contexts_in_order_without_duplicates(self):
+    available = ["prod-eu", "stage-eu", "prod-us"]
+
+    assert resolve_contexts(["prod-*", "prod-us", "dev"], available) == ["prod-eu", "prod-us", "dev"]
+    with pytest.raises(ValueError):
+      resolve_contexts(["qa-*"], available)
+
+  def test_clusters_run_in_separate_processes_and_failures_are_isolated(self):
+    summaries = run_fleet(["a", "broken", "b"], _rotate, 2, rotated=3)
+
+    assert [s["context"] for s in summaries] == ["a", "broken", "b"]
+    assert summaries[0]["status"] == "rotated" and summaries[0]["rotated"] == 3
+    assert summaries[1]["status"] == "error" and "RuntimeError: boom" in summaries[1]["error"]
+    assert summaries[0]["pid"] != os.getpid()
+
+  def test_a_killed_worker_only_fails_its_own_cluster(self):
+    summaries = run_fleet(["a", "killed", "b", "c", "d"], _rotate, 2, rotated=1)
+
+    statuses = { s["context"]: s["status"] for s in summaries }
+    assert statuses == { "a": "rotated", "killed": "error", "b": "rotated", "c": "rotated", "d": "rotated" }
+    assert "exited with code 3" in summaries[1]["error"]
+    # a fresh process per cluster, nothing carried over from an earlier one.
+    assert len(set(s["pid"] for s in summaries if s["status"] == "rotated")) == 4
+
+  def test_partial_rotations_and_totals_are_aggregated(self):
+    results = { "n-1": { "status": "rotated", "error": None }, "n-2": { "status": "failed", "error": "PDB" } }
+    summaries = [
+      cluster_summary("a", "rotated", 2, results),
+      cluster_summary("b", "nothing-to-rotate"),
+    ]
+
+    assert summaries[0]["status"] == "partial"
+    assert summaries[0]["failed"] == { "n-2": "PDB" }
+    assert aggregate(summaries) == {
+      "clusters": 2, "statuses": { "partial": 1, "nothing-to-rotate": 1 },
+      "rotatable": 2, "rotated": 1, "failed": 1,
+    }
+
+
+def _rotate(context, rotated=0):
+  if context == "broken":
+    raise RuntimeError("boom")
+  if context == "killed":
+    os._exit(3)
+  results = { f"{context}-{i}": { "status": "rotated", "error": None } for i in range(rotated) }
+  summary = cluster_summary(context, "rotated", rotated, results)
+  summary["pid"] = os.getpid()
+  return summary
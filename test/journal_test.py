@@ -0,0 +1,55 @@
+'''
+' Unit tests of the rotation journal.
+'
+' @file: journal_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from src.journal import RotationJournal
+from src.records import NodeRecord
+
+class TestRotationJournal:
+
+  def test_resume_reloads_recorded_steps(self, tmp_path):
+    path = tmp_path / "nested" / "cluster.journal"
+    journal = RotationJournal(str(path))
+    journal.record("node-a", "scaled")
+    journal.record("node-a", "drained")
+    with open(path, "a") as f:
+      f.write('{"node": "node-b", "st')
+
+    resumed = RotationJournal(str(path), resume=True)
+    assert resumed.done("node-a", "drained")
+    assert not resumed.done("node-a", "deleted")
+    assert resumed.completed_nodes("scaled") == { "node-a" }
+
+  def test_fresh_run_truncates_the_journal(self, tmp_path):
+    path = str(tmp_path / "cluster.journal")
+    RotationJournal(path).record("node-a", "cordoned")
+
+    assert not RotationJournal(path).done("node-a", "cordoned")
+
+  def test_record_rejects_unknown_steps(self):
+    with pytest.raises(ValueError):
+      RotationJournal().record("node-a", "rebooted")
+
+  def test_a_node_reusing_an_old_name_starts_afresh(self):
+    journal = RotationJournal()
+    journal.record(NodeRecord("10.0.1.7", uid="old-uid"), "drained")
+
+    assert journal.done(NodeRecord("10.0.1.7", uid="old-uid"), "drained")
+    assert not journal.done(NodeRecord("10.0.1.7", uid="new-uid"), "drained")
+
+  def test_prune_forgets_nodes_gone_from_the_cluster(self, tmp_path):
+    path = str(tmp_path / "cluster.journal")
+    kept, gone = NodeRecord("node-a", uid="1"), NodeRecord("node-b", uid="2")
+    journal = RotationJournal(path)
+    journal.record(kept, "cordoned")
+    journal.record(gone, "drained")
+
+    assert journal.prune([kept]) == ["node-b/2"]
+    assert journal.prune([kept]) == []
+    resumed = RotationJournal(path, resume=True)
+    assert resumed.done(kept, "cordoned") and not resumed.done(gone, "drained")
@@ -0,0 +1,74 @@
+'''
+' Unit tests of the queued, structured event log.
+'
+' @file: log_helper_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import json
+import logging
+import queue
+import pytest
+from log_helper import LazyQueueHandler, Logger
+from metrics import Metrics
+
+class TestEventLog:
+
+  @pytest.fixture
+  def event_log(self, tmp_path):
+    logger = Logger.instance()
+    handlers, level = Logger._listener.handlers, logger.level
+    path = tmp_path / "events.jsonl"
+    Logger.log_events(str(path))
+
+    def read(event):
+      Logger.flush()
+      entries = [json.loads(line) for line in path.read_text().splitlines()]
+      return [e for e in entries if e["event"] == event]
+
+    yield read
+    Logger.flush()
+    Logger._listener.handlers = handlers
+    logger.setLevel(level)
+
+  def test_events_are_json_lines_of_typed_fields(self, event_log):
+    Logger.event(
+      "eviction", " Eviction of pod %s/%s: %s.", "shop", "web-1", "evicted", level=logging.DEBUG,
+      node="node-a", pod="web-1", duration=0.25, outcome="evicted"
+    )
+
+    [entry] = event_log("eviction")
+    assert entry["message"] == "Eviction of pod shop/web-1: evicted."
+    assert (entry["node"], entry["pod"], entry["outcome"]) == ("node-a", "web-1", "evicted")
+    assert (entry["duration"], entry["level"]) == (0.25, "debug")
+
+  def test_records_are_queued_unformatted(self):
+    formatted = []
+
+    class Pod:
+      def __str__(self):
+        formatted.append(self)
+        return "shop/web-1"
+
+    records = queue.Queue()
+    record = logging.LogRecord("main", logging.INFO, __file__, 1, " Evicting %s ..", (Pod(),), None)
+    LazyQueueHandler(records).handle(record)
+
+    # formatting is left to the listener's thread.
+    assert records.get_nowait() is record
+    assert record.args and not formatted
+
+  def test_phases_and_node_steps_are_events_with_their_outcome(self, event_log):
+    metrics = Metrics()
+    with metrics.phase("provision"):
+      pass
+    with pytest.raises(TimeoutError):
+      with metrics.node_step("node-a", "drain"):
+        raise TimeoutError()
+
+    [phase] = event_log("phase")
+    [step] = event_log("node_step")
+    assert (phase["phase"], phase["outcome"]) == ("provision", "success")
+    assert (step["node"], step["step"], step["outcome"]) == ("node-a", "drain", "failed")
+    assert step["duration"] >= 0
@@ -0,0 +1,63 @@
+'''
+' Unit tests of rotation metrics and their OpenMetrics rendering.
+'
+' @file: metrics_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from kubernetes.client.rest import ApiException
+from src.metrics import Metrics
+from src.rate_limiter import RateLimiter, RateLimitedClient
+
+class TestMetrics:
+
+  def test_render_includes_phases_steps_and_api_histograms(self):
+    metrics = Metrics()
+    with metrics.phase("scan"):
+      pass
+    with metrics.node_step("node-a", "cordon"):
+      pass
+    metrics.observe_api_call("kubernetes", "list_node", 0.02)
+    metrics.observe_api_call("kubernetes", "list_node", 0.2, outcome="429")
+
+    text = metrics.render()
+
+    assert 'node_rotator_phase_duration_seconds{phase="scan"}' in text
+    assert 'node_rotator_node_step_duration_seconds{node="node-a",step="cordon"}' in text
+    assert 'node_rotator_api_calls_total{backend="kubernetes",endpoint="list_node",outcome="429"} 1' in text
+    assert 'node_rotator_api_call_duration_seconds_bucket{backend="kubernetes",endpoint="list_node",le="0.025"} 1' in text
+    assert 'node_rotator_api_call_duration_seconds_bucket{backend="kubernetes",endpoint="list_node",le="+Inf"} 2' in text
+    assert text.endswith("# EOF\n")
+    assert "# EOF" not in metrics.render(openmetrics=False)
+
+  def test_limited_client_observes_each_call_by_backend(self, tmp_path):
+    class Api:
+      def list_node_pools(self):
+        return "pools"
+
+    metrics = Metrics()
+    api = RateLimitedClient(Api(), RateLimiter(), backend="oci", metrics=metrics)
+    api.list_node_pools()
+
+    path = tmp_path / "rotation.prom"
+    metrics.write_textfile(str(path))
+    assert 'endpoint="list_node_pools",outcome="success"} 1' in path.read_text()
+
+  def test_throttling_and_retries_are_exported_as_counters(self, mocker):
+    mocker.patch('time.sleep')
+    metrics = Metrics()
+    limiter = RateLimiter(qps=1, burst=1, base_delay=0.5, metrics=metrics)
+    mocker.patch.object(limiter, '_retry_delay', return_value=0.5)
+    flaky = mocker.MagicMock(side_effect=[ApiException(status=503), "nodes"])
+
+    limiter.call(flaky)
+
+    text = metrics.render()
+    assert "# TYPE node_rotator_api_throttled_seconds counter" in text
+    assert "node_rotator_api_retries_total 1" in text
+    assert "node_rotator_api_backoff_seconds_total 0.500000" in text
+    throttled = float(text.split("node_rotator_api_throttled_seconds_total ")[1].split()[0])
+    assert throttled == pytest.approx(limiter.stats()["throttled_seconds"], abs=0.001) and throttled > 0
+    assert "node_rotator_api_retries_total 1" in metrics.render(openmetrics=False)
@@ -0,0 +1,143 @@
+'''
+' Unit tests of the OCI provider.
+'
+' @file: oci_provider_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import oci
+import pytest
+from oci.container_engine import models
+from pytest_mock import mocker
+from kubernetes import client
+from client_factory import ClientFactory
+from src.providers.oci import OCIProvider
+from src.journal import RotationJournal
+from src.records import NodeRecord
+
+class TestOCIProvider:
+
+  def test_expand_waits_for_work_request_and_ready_replacements(self, mocker):
+    provider, oci_client, kube_api = _provider(mocker, [_node("old-1")])
+    oci_client.get_work_request.side_effect = [_work_request("IN_PROGRESS"), _work_request("SUCCEEDED")]
+    kube_api.list_node.side_effect = [
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node("old-1")]),
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node("old-1"), _kube_node("new-1", ready="False")]),
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node("old-1"), _kube_node("new-1")]),
+    ]
+
+    provider.expand_cluster_for_rotation()
+
+    size = oci_client.update_node_pool.call_args.kwargs["update_node_pool_details"].node_config_details.size
+    assert size == 4
+    oci_client.get_work_request.assert_called_with("wr-1")
+    assert kube_api.list_node.call_count == 3
+
+  def test_expand_fails_when_replacements_never_become_ready(self, mocker):
+    provider, oci_client, kube_api = _provider(mocker, [_node("old-1")])
+    provider.provision_wait = 0
+    oci_client.get_work_request.return_value = _work_request("SUCCEEDED")
+    kube_api.list_node.return_value = client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node("old-1")])
+
+    with pytest.raises(TimeoutError):
+      provider.expand_cluster_for_rotation()
+
+  def test_resize_deletes_concurrently_and_tracks_each_work_request(self, mocker):
+    provider, oci_client, _ = _provider(mocker, [_node("old-1"), _node("old-2")])
+    oci_client.delete_node.side_effect = lambda node_id, **kwargs: mocker.MagicMock(
+      status=202, headers={ "opc-work-request-id": f"wr-{node_id}" }
+    )
+    oci_client.get_work_request.return_value = _work_request("SUCCEEDED")
+
+    provider.resize_cluster_after_rotation()
+
+    assert oci_client.delete_node.call_count == 2
+    tracked = sorted(c.args[0] for c in oci_client.get_work_request.call_args_list)
+    assert tracked == ["wr-ocid1.instance.old-1", "wr-ocid1.instance.old-2"]
+    assert provider.journal.completed_nodes("deleted") == { "old-1", "old-2" }
+
+  def test_node_pool_index_is_built_once_until_a_pool_changes(self, mocker):
+    provider, oci_client, _ = _provider(mocker, [_node("old-1")])
+
+    provider._node_pool_index()
+    provider._node_pool_index()
+    assert oci_client.list_node_pools.call_count == 1
+
+    provider._invalidate_node_pools()
+    assert provider._node_pool_index()["ocid1.instance.old-1"].name == "non-autoscaler-pool"
+    assert oci_client.list_node_pools.call_count == 2
+
+  def test_each_affected_pool_is_scaled_by_its_own_count(self, mocker):
+    nodes = [_node("a-1"), _node("a-2"), _node("b-1"), _node("stray")]
+    provider, oci_client, kube_api = _provider(mocker, nodes, pools={
+      "non-autoscaler-a": (5, ["a-1", "a-2", "a-3"]),
+      "non-autoscaler-b": (2, ["b-1", "b-2"]),
+      "autoscaled-c": (4, ["stray"]),
+    })
+    oci_client.get_work_request.return_value = _work_request("SUCCEEDED")
+    kube_api.list_node.side_effect = [
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[]),
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node(f"new-{i}") for i in range(3)]),
+    ]
+
+    # the CLI and the daemon leave "stray" out, nothing would replace or delete it.
+    assert [n.name for n in nodes if not provider.manages(n)] == ["stray"]
+
+    provider.expand_cluster_for_rotation()
+    sizes = {
+      c.kwargs["node_pool_id"]: c.kwargs["update_node_pool_details"].node_config_details.size
+      for c in oci_client.update_node_pool.call_args_list
+    }
+    assert sizes == { "pool-non-autoscaler-a": 7, "pool-non-autoscaler-b": 3 }
+
+    provider.resize_cluster_after_rotation()
+    deleted = { c.kwargs["node_id"]: c.kwargs["node_pool_id"] for c in oci_client.delete_node.call_args_list }
+    assert deleted == {
+      "ocid1.instance.a-1": "pool-non-autoscaler-a",
+      "ocid1.instance.a-2": "pool-non-autoscaler-a",
+      "ocid1.instance.b-1": "pool-non-autoscaler-b",
+    }
+
+def _provider(mocker, nodes, pool_size=3, journal=None, pools=None):
+  mocker.patch.object(oci.config, 'from_file', return_value={})
+  oci_client = mocker.MagicMock()
+  mocker.patch('oci.container_engine.ContainerEngineClient', return_value=oci_client)
+  # a fresh factory, engine clients are cached per configuration.
+  mocker.patch.object(ClientFactory, '_instance', ClientFactory())
+
+  # pools: { name: (size, [member node names]) }, by default one pool holding every node.
+  pools = pools or { "non-autoscaler-pool": (pool_size, [n.name for n in nodes]) }
+  full_pools = {
+    f"pool-{name}": models.NodePool(
+      id=f"pool-{name}", name=name, node_config_details=models.NodePoolNodeConfigDetails(size=size),
+      nodes=[models.Node(id=f"ocid1.instance.{member}", name=member) for member in members]
+    )
+    for name, (size, members) in pools.items()
+  }
+  summaries = [models.NodePoolSummary(id=p.id, name=p.name) for p in full_pools.values()]
+  oci_client.list_node_pools.return_value = oci.response.Response(200, {}, summaries, None)
+  oci_client.get_node_pool.side_effect = lambda pool_id: oci.response.Response(200, {}, full_pools[pool_id], None)
+  response = mocker.MagicMock(status=200, headers={ "opc-work-request-id": "wr-1" })
+  oci_client.update_node_pool.return_value = response
+  oci_client.delete_node.return_value = response
+
+  kube_api = mocker.MagicMock()
+  provider = OCIProvider(
+    nodes, provision_time=5, kube_api=kube_api, journal=journal,
+    oci_cluster_id="cluster-1", oci_compartment_id="comp-1"
+  )
+  provider.poll_interval = 0
+  return provider, oci_client, kube_api
+
+def _node(name):
+  return NodeRecord(name, provider_id=f"ocid1.instance.{name}", compartment_id="comp-1")
+
+def _kube_node(name, ready="True"):
+  return client.V1Node(
+    metadata=client.V1ObjectMeta(name=name),
+    status=client.V1NodeStatus(conditions=[client.V1NodeCondition(type="Ready", status=ready)])
+  )
+
+def _work_request(status):
+  return oci.response.Response(200, {}, oci.container_engine.models.WorkRequest(status=status), None)
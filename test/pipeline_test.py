@@ -0,0 +1,85 @@
+'''
+' Unit tests of the pipelined rolling rotation.
+'
+' @file: pipeline_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import threading
+import pytest
+from pytest_mock import mocker
+from src.pipeline import PipelinedRotation
+from src.records import NodeRecord
+
+class TestPipelinedRotation:
+
+  def test_provisions_ahead_and_deletes_each_batch_once_drained(self, mocker):
+    events = []
+    batches = [[NodeRecord("a")], [NodeRecord("b")], [NodeRecord("c")]]
+    kube, provider = _stages(mocker, batches, events)
+
+    PipelinedRotation(kube, provider).run()
+
+    assert events.index("expand a") < events.index("drain a")
+    # the next batch is provisioned while the current one drains ..
+    assert events.index("expand b") < events.index("drained a")
+    # .. but never further ahead than one batch.
+    assert events.index("drained a") < events.index("expand c")
+    assert events.index("delete a") < events.index("expand c")
+    assert [e for e in events if e.startswith("delete")] == ["delete a", "delete b", "delete c"]
+
+  def test_nodes_that_failed_to_rotate_are_not_deleted(self, mocker):
+    events = []
+    batches = [[NodeRecord("a"), NodeRecord("broken")]]
+    kube, provider = _stages(mocker, batches, events, failing={ "broken" })
+
+    PipelinedRotation(kube, provider).run()
+
+    deleted = provider.resize_cluster_after_rotation.call_args.args[0]
+    assert [n.name for n in deleted] == ["a"]
+
+  def test_failed_provisioning_stops_before_the_next_batch_drains(self, mocker):
+    events = []
+    batches = [[NodeRecord("a")], [NodeRecord("b")]]
+    kube, provider = _stages(mocker, batches, events)
+    provider.expand_cluster_for_rotation.side_effect = TimeoutError("not Ready")
+
+    with pytest.raises(TimeoutError):
+      PipelinedRotation(kube, provider).run()
+    kube.rotate_wave.assert_not_called()
+
+  def test_each_batch_is_warmed_up_before_it_drains(self, mocker):
+    events = []
+    batches = [[NodeRecord("a")], [NodeRecord("b")]]
+    kube, provider = _stages(mocker, batches, events)
+
+    PipelinedRotation(kube, provider, warmup=lambda batch: events.append(f"warm {batch[0].name}")).run()
+
+    assert events.index("expand a") < events.index("warm a") < events.index("drain a")
+    assert events.index("expand b") < events.index("warm b") < events.index("drain b")
+
+
+def _stages(mocker, batches, events, failing=()):
+  # Drains wait until the next batch's expand has started, to make the overlap observable.
+  expanding = { nodes[0].name: threading.Event() for nodes in batches }
+
+  def expand(nodes):
+    expanding[nodes[0].name].set()
+    events.append(f"expand {nodes[0].name}")
+
+  def rotate_wave(wave, number):
+    events.append(f"drain {wave[0].name}")
+    if number < len(batches):
+      expanding[batches[number][0].name].wait(timeout=5)
+    events.append(f"drained {wave[0].name}")
+    return [n for n in wave if n.name not in failing]
+
+  kube = mocker.MagicMock()
+  kube.waves.return_value = iter(batches)
+  kube.prepare_rotation.return_value = True
+  kube.rotate_wave.side_effect = rotate_wave
+  provider = mocker.MagicMock()
+  provider.expand_cluster_for_rotation.side_effect = expand
+  provider.resize_cluster_after_rotation.side_effect = lambda nodes: events.append(f"delete {nodes[0].name}")
+  return kube, provider
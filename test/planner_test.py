@@ -0,0 +1,92 @@
+'''
+' Unit tests of the drain-cost-aware rotation planner.
+'
+' @file: planner_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+from kubernetes import client
+from src.planner import RotationPlanner
+from src.records import DisruptionBudgetRecord, NodeRecord, PodRecord
+
+class TestRotationPlanner:
+
+  def test_cheaper_nodes_are_rotated_first(self):
+    nodes = [NodeRecord("busy"), NodeRecord("idle"), NodeRecord("local")]
+    pod_index = {
+      "busy": _pods("busy", 5),
+      "idle": _pods("idle", 1),
+      "local": _pods("local", 2, local_storage=True),
+    }
+
+    planner = RotationPlanner(nodes, pod_index, [])
+    waves = planner.plan()
+
+    assert [w[0].name for w in waves] == ["idle", "busy", "local"]
+    assert planner.costs["local"].score == 2 + 2 * RotationPlanner.local_storage_weight
+
+  def test_waves_stay_within_disruption_budget_headroom(self):
+    budget = DisruptionBudgetRecord("web", "shop", { "app": "web" }, disruptions_allowed=1)
+    nodes = [NodeRecord("a"), NodeRecord("b"), NodeRecord("c")]
+    pod_index = {
+      "a": _pods("a", 1, labels={ "app": "web" }),
+      "b": _pods("b", 1, labels={ "app": "web" }),
+      "c": _pods("c", 1, labels={ "app": "db" }),
+    }
+
+    waves = RotationPlanner(nodes, pod_index, [budget], wave_size=2).plan()
+
+    # a and b can't be drained together, one `web` pod may be disrupted at a time.
+    assert [[n.name for n in w] for w in waves] == [["a", "c"], ["b"]]
+
+  def test_waves_are_filled_past_headroom_only_when_nothing_else_is_left(self):
+    budget = DisruptionBudgetRecord("web", "shop", { "app": "web" }, disruptions_allowed=1)
+    nodes = [NodeRecord(n) for n in ("a", "b", "c", "d")]
+    pod_index = {
+      "a": _pods("a", 1, labels={ "app": "web" }),
+      "b": _pods("b", 1, labels={ "app": "web" }),
+      "c": _pods("c", 2, labels={ "app": "web" }),
+      "d": [],
+    }
+
+    planner = RotationPlanner(nodes, pod_index, [budget], wave_size=2)
+    waves = planner.plan()
+
+    assert [[n.name for n in w] for w in waves] == [["d", "a"], ["b", "c"]]
+    assert planner.costs["c"].blocked == 1
+
+  def test_waves_are_spread_across_zones(self):
+    nodes = [NodeRecord(f"{zone}-{i}", zone=zone) for zone in ("z1", "z2", "z3") for i in range(2)]
+
+    waves = RotationPlanner(nodes, {}, [], wave_size=2).plan()
+
+    assert all(len(set(n.zone for n in wave)) == 2 for wave in waves)
+    for previous, wave in zip(waves, waves[1:]):
+      assert set(n.zone for n in previous) != set(n.zone for n in wave)
+
+  def test_budget_selector_semantics(self):
+    pod = PodRecord("web-1", "shop", labels={ "app": "web", "tier": "front" })
+    expression = client.V1LabelSelectorRequirement(key="tier", operator="In", values=["front", "edge"])
+    pdb = client.V1PodDisruptionBudget(
+      metadata=client.V1ObjectMeta(name="web", namespace="shop"),
+      spec=client.V1PodDisruptionBudgetSpec(
+        selector=client.V1LabelSelector(match_labels={ "app": "web" }, match_expressions=[expression])
+      ),
+      status=client.V1PodDisruptionBudgetStatus(
+        disruptions_allowed=2, current_healthy=3, desired_healthy=1, expected_pods=3
+      )
+    )
+
+    budget = DisruptionBudgetRecord.from_model(pdb)
+    assert budget.covers(pod)
+    assert budget.disruptions_allowed == 2
+    assert not budget.covers(PodRecord("web-1", "other", labels=pod.labels))
+    assert not DisruptionBudgetRecord.from_json({ "metadata": { "name": "none", "namespace": "shop" } }).covers(pod)
+
+
+def _pods(node, count, labels=None, local_storage=False):
+  return [
+    PodRecord(f"{node}-{i}", "shop", node_name=node, labels=labels, local_storage=local_storage)
+    for i in range(count)
+  ]
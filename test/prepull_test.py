@@ -0,0 +1,108 @@
+'''
+' Unit tests of the image pre-pull onto replacement nodes.
+'
+' @file: prepull_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import pytest
+from pytest_mock import mocker
+from kubernetes import client
+from src.prepull import ImagePrePuller
+from src.records import NodeRecord, PodRecord
+
+class TestImagePrePuller:
+
+  def test_daemonset_pulls_distinct_images_onto_replacements_only(self, mocker):
+    kube, apps_api = _kube(mocker)
+    puller = ImagePrePuller(kube, namespace="warmup")
+    kube.api.list_namespaced_pod.return_value = client.V1PodList(items=[
+      _pod("new-1", [_running(), _running()]),
+      _pod("new-2", [_waiting("CrashLoopBackOff"), _waiting("ErrImagePull")]),
+    ])
+
+    summary = puller.warm(_provider(mocker, "new-1", "new-2"))
+
+    namespace, daemonset = apps_api.create_namespaced_daemon_set.call_args.args
+    template = daemonset.spec.template.spec
+    term = template.affinity.node_affinity.required_during_scheduling_ignored_during_execution
+    assert namespace == "warmup"
+    assert [c.image for c in template.containers] == ["app:1", "sidecar:2"]
+    assert term.node_selector_terms[0].match_fields[0].values == ["new-1", "new-2"]
+    assert template.tolerations[0].operator == "Exists"
+    assert (summary["pulled"], summary["failed"], summary["timed_out"]) == (3, 1, False)
+    apps_api.delete_namespaced_daemon_set.assert_called_once_with(
+      daemonset.metadata.name, "warmup", propagation_policy="Background"
+    )
+
+  def test_pulls_are_awaited_until_the_time_budget_runs_out(self, mocker):
+    kube, apps_api = _kube(mocker)
+    puller = ImagePrePuller(kube, timeout=0.05)
+    puller.poll_interval = 0.01
+    kube.api.list_namespaced_pod.return_value = client.V1PodList(items=[
+      _pod("new-1", [_running(), _waiting("ContainerCreating")]),
+    ])
+
+    summary = puller.warm(_provider(mocker, "new-1"))
+
+    assert summary["timed_out"] and summary["pulled"] == 1
+    assert kube.api.list_namespaced_pod.call_count > 1
+    apps_api.delete_namespaced_daemon_set.assert_called_once()
+
+  def test_daemonset_is_deleted_when_waiting_fails(self, mocker):
+    kube, apps_api = _kube(mocker)
+    kube.api.list_namespaced_pod.side_effect = client.ApiException(status=500)
+
+    with pytest.raises(client.ApiException):
+      ImagePrePuller(kube).warm(_provider(mocker, "new-1"))
+    apps_api.delete_namespaced_daemon_set.assert_called_once()
+
+  def test_replacements_are_warmed_up_once(self, mocker):
+    kube, apps_api = _kube(mocker)
+    kube.api.list_namespaced_pod.return_value = client.V1PodList(items=[_pod("new-1", [_running()] * 2)])
+    puller, provider = ImagePrePuller(kube), _provider(mocker, "new-1")
+
+    puller.warm(provider)
+    summary = puller.warm(provider)
+
+    assert summary["nodes"] == 0
+    assert apps_api.create_namespaced_daemon_set.call_count == 1
+
+
+def _kube(mocker):
+  kube = mocker.MagicMock()
+  kube.dry_mode = False
+  kube.rotatable_nodes = [NodeRecord("old-1"), NodeRecord("old-2")]
+  kube.pod_index = {
+    "old-1": [PodRecord("web-1", images=("app:1", "sidecar:2")), PodRecord("web-2", images=("app:1",))],
+    "old-2": [PodRecord("web-3", images=("app:1",))],
+  }
+  apps_api = kube.clients.kubernetes.return_value
+  return kube, apps_api
+
+
+def _provider(mocker, *names):
+  provider = mocker.MagicMock()
+  provider.provisioned_nodes = set(names)
+  return provider
+
+
+def _pod(node, statuses):
+  return client.V1Pod(spec=client.V1PodSpec(node_name=node, containers=[]), status=client.V1PodStatus(
+    container_statuses=statuses
+  ))
+
+
+def _running():
+  return client.V1ContainerStatus(
+    name="image", image="app", image_id="sha256:1", ready=True, restart_count=0,
+    state=client.V1ContainerState(running=client.V1ContainerStateRunning())
+  )
+
+
+def _waiting(reason):
+  return client.V1ContainerStatus(
+    name="image", image="app", image_id="", ready=False, restart_count=0,
+    state=client.V1ContainerState(waiting=client.V1ContainerStateWaiting(reason=reason))
+  )
@@ -0,0 +1,40 @@
+'''
+' Unit tests of the lazy provider registry.
+'
+' @file: providers_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import os
+import subprocess
+import sys
+import pytest
+from pytest_mock import mocker
+from src import providers
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+class TestProviderRegistry:
+
+  def test_builtin_providers_load_by_name(self):
+    assert providers.load_provider("self_managed").__name__ == "SelfManaged"
+    assert providers.load_provider("oci").__name__ == "OCIProvider"
+
+  def test_unknown_providers_are_not_implemented(self):
+    with pytest.raises(NotImplementedError):
+      providers.load_provider("alibaba")
+
+  def test_providers_registered_by_entry_point_are_loaded(self, mocker):
+    plugin = mocker.MagicMock()
+    plugin.load.return_value = "AwsProvider"
+    mocker.patch.object(providers, "_entry_points", return_value={ "aws": plugin })
+
+    assert providers.load_provider("aws") == "AwsProvider"
+    assert "aws" in providers.available_providers()
+
+  def test_cli_import_leaves_the_sdks_unloaded(self):
+    check = "import sys, cli; print(sorted(m for m in ('oci', 'kubernetes') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=SRC, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == "[]"
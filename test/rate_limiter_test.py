@@ -0,0 +1,78 @@
+'''
+' Unit tests of the shared rate limiter.
+'
+' @file: rate_limiter_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import json
+import time
+import pytest
+from pytest_mock import mocker
+from kubernetes.client.rest import ApiException
+from src.rate_limiter import RateLimiter, RateLimitedClient
+
+class TestRateLimiter:
+
+  def test_acquire_throttles_once_the_burst_is_spent(self, mocker):
+    sleep = mocker.patch.object(time, 'sleep')
+    limiter = RateLimiter(qps=10, burst=2)
+
+    for _ in range(3):
+      limiter.acquire()
+
+    assert sleep.call_count == 1
+    assert sleep.call_args.args[0] == pytest.approx(0.1, abs=0.01)
+    assert limiter.stats()["throttled_seconds"] > 0
+
+  def test_call_honors_retry_after_on_429(self, mocker):
+    sleep = mocker.patch.object(time, 'sleep')
+    limiter = RateLimiter(qps=1000, burst=10)
+    throttled = ApiException(status=429)
+    throttled.headers = { "Retry-After": "3" }
+    func = mocker.MagicMock(side_effect=[throttled, "ok"])
+
+    assert limiter.call(func) == "ok"
+    sleep.assert_called_once_with(3.0)
+    assert limiter.stats()["retries"] == 1
+
+  def test_call_gives_up_after_max_retries_and_skips_client_errors(self, mocker):
+    mocker.patch.object(time, 'sleep')
+    limiter = RateLimiter(qps=1000, burst=10, max_retries=2)
+
+    unavailable = mocker.MagicMock(side_effect=ApiException(status=503))
+    with pytest.raises(ApiException):
+      limiter.call(unavailable)
+    assert unavailable.call_count == 3
+
+    missing = mocker.MagicMock(side_effect=ApiException(status=404))
+    with pytest.raises(ApiException):
+      limiter.call(missing)
+    assert missing.call_count == 1
+
+  def test_call_does_not_retry_evictions_refused_by_a_disruption_budget(self, mocker):
+    sleep = mocker.patch.object(time, 'sleep')
+    limiter = RateLimiter(qps=1000, burst=10)
+    refused = ApiException(status=429)
+    refused.body = json.dumps({
+      "kind": "Status", "code": 429, "reason": "TooManyRequests",
+      "details": { "causes": [{ "reason": "DisruptionBudget", "message": "needs 1 healthy pod" }] }
+    })
+    evict = mocker.MagicMock(side_effect=refused)
+
+    with pytest.raises(ApiException):
+      limiter.call(evict)
+    assert evict.call_count == 1
+    sleep.assert_not_called()
+    assert limiter.stats()["retries"] == 0
+
+  def test_limited_client_keeps_docstrings_for_watch(self, mocker):
+    class Api:
+      def list_node(self):
+        ''':return: V1NodeList'''
+        return "nodes"
+
+    api = RateLimitedClient(Api(), RateLimiter())
+    assert api.list_node() == "nodes"
+    assert ":return: V1NodeList" in api.list_node.__doc__
@@ -0,0 +1,64 @@
+'''
+' Smoke test of the rotation benchmark harness at a tiny scale.
+'
+' @file: rotation_bench_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../bench')))
+from rotation_bench import parser, run_rotation
+
+class TestRotationBench:
+
+  def test_runs_every_phase_against_the_stand_ins(self):
+    args = parser().parse_args([
+      "--nodes", "3", "--aged", "2", "--namespaces", "5", "--pods-per-node", "4",
+      "--latency", "0", "--provision-delay", "0", "--delete-delay", "0", "--max-unavailable", "2"
+    ])
+
+    results, pool_stats = run_rotation(args)
+    phases = { p["phase"]: p for p in results }
+
+    assert list(phases) == ["scan", "plan", "provision", "drain", "resize"]
+    assert phases["scan"]["calls"]["GET /api/v1/nodes"] == 1
+    assert phases["plan"]["calls"]["GET /apis/policy/v1/poddisruptionbudgets"] == 1
+    assert phases["provision"]["calls"]["update_node_pool"] == 1
+    assert phases["drain"]["calls"]["POST /api/v1/namespaces/{namespace}/pods/{name}/eviction"] == 8
+    assert "GET /api/v1/namespaces" not in phases["drain"]["calls"]
+    assert phases["resize"]["calls"]["delete_node"] == 2
+    assert pool_stats["kubernetes"]["reused"] > 0
+    # memory is traced per phase, not accumulated over the run.
+    assert all(p["peak"] >= p["retained"] >= 0 for p in results)
+
+  def test_pipelined_rotation_scales_and_deletes_per_batch(self):
+    args = parser().parse_args([
+      "--nodes", "4", "--namespaces", "5", "--pods-per-node", "2", "--latency", "0",
+      "--provision-delay", "0", "--delete-delay", "0", "--max-unavailable", "2", "--pipelined"
+    ])
+
+    results, _ = run_rotation(args)
+    phases = { p["phase"]: p for p in results }
+
+    assert list(phases) == ["scan", "plan", "rotate"]
+    assert phases["rotate"]["calls"]["update_node_pool"] == 2
+    assert phases["rotate"]["calls"]["delete_node"] == 4
+
+  def test_sized_rotation_skips_replacements_the_remaining_nodes_absorb(self):
+    args = parser().parse_args([
+      "--nodes", "4", "--aged", "2", "--namespaces", "5", "--pods-per-node", "4", "--latency", "0",
+      "--provision-delay", "0", "--delete-delay", "0", "--size-replacements"
+    ])
+
+    results, _ = run_rotation(args)
+    phases = { p["phase"]: p for p in results }
+
+    assert list(phases) == ["scan", "plan", "size", "provision", "drain", "resize"]
+    # nodes are pooled as OCI pools them, the pool listing is then reused by the provision.
+    assert set(phases["size"]["calls"]) == { "list_node_pools", "get_node_pool" }
+    assert "update_node_pool" not in phases["provision"]["calls"]
+    assert phases["resize"]["calls"]["delete_node"] == 2
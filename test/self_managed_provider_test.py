@@ -0,0 +1,148 @@
+'''
+' Unit tests of the self managed provider's provisioning hooks.
+'
+' @file: self_managed_provider_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import json
+import sys
+import textwrap
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pytest_mock import mocker
+from kubernetes import client
+from src.providers.self_managed import SelfManaged
+from src.journal import RotationJournal
+from src.records import NodeRecord
+
+class TestSelfManaged:
+
+  def test_executable_hooks_run_per_node_then_replacements_are_awaited(self, mocker, tmp_path):
+    calls = tmp_path / "calls"
+    hook = _script(tmp_path, f'''
+      import os, sys
+      with open({str(calls)!r}, "a") as f:
+        f.write(" ".join(sys.argv[1:]) + " " + os.environ["NODE_POOL"] + "\\n")
+    ''')
+    kube_api = mocker.MagicMock()
+    kube_api.list_node.side_effect = [
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node(n) for n in names])
+      for names in (("old-1", "old-2"), ("old-1", "old-2", "new-1"), ("old-1", "old-2", "new-1", "new-2"))
+    ]
+    provider = _provider([_node("old-1"), _node("old-2")], kube_api, self_managed_provision_hook=hook)
+
+    provider.expand_cluster_for_rotation()
+
+    assert sorted(calls.read_text().splitlines()) == ["provision old-1 pool-1", "provision old-2 pool-1"]
+    assert provider.journal.done("old-1", "scaled") and provider.journal.done("old-2", "scaled")
+    assert kube_api.list_node.call_count == 3
+
+  def test_failing_executable_hook_stops_before_draining(self, mocker, tmp_path):
+    hook = _script(tmp_path, "import sys; sys.exit(3)")
+    kube_api = mocker.MagicMock()
+    kube_api.list_node.return_value = client.V1NodeList(metadata=client.V1ListMeta(), items=[])
+    provider = _provider([_node("old-1")], kube_api, self_managed_provision_hook=hook)
+
+    with pytest.raises(RuntimeError, match="old-1"):
+      provider.expand_cluster_for_rotation()
+    assert not provider.journal.done("old-1", "scaled")
+
+  def test_webhook_is_retried_until_it_succeeds(self, webhook):
+    webhook.failures = 2
+    provider = _provider([_node("old-1"), _node("old-2")], None, self_managed_decommission_hook=webhook.url)
+
+    provider.resize_cluster_after_rotation()
+
+    decommissioned = [p["node"]["name"] for p in webhook.received if p["action"] == "decommission"]
+    assert sorted(set(decommissioned)) == ["old-1", "old-2"]
+    assert len(webhook.received) == 4
+    assert provider.journal.completed_nodes("deleted") == { "old-1", "old-2" }
+
+  def test_webhook_client_errors_are_not_retried(self, webhook):
+    webhook.status = 404
+    provider = _provider([_node("old-1")], None, self_managed_decommission_hook=webhook.url)
+
+    provider.resize_cluster_after_rotation()
+
+    assert len(webhook.received) == 1
+    assert not provider.journal.done("old-1", "deleted")
+
+  def test_without_hooks_nothing_is_called(self, mocker):
+    kube_api = mocker.MagicMock()
+    provider = _provider([_node("old-1")], kube_api)
+
+    provider.expand_cluster_for_rotation()
+    provider.resize_cluster_after_rotation()
+
+    kube_api.list_node.assert_not_called()
+
+  def test_readiness_is_listed_page_by_page_or_read_from_a_node_cache(self, mocker):
+    kube_api = mocker.MagicMock()
+    kube_api.list_node.side_effect = [
+      client.V1NodeList(metadata=client.V1ListMeta(_continue="next"), items=[_kube_node("new-1")]),
+      client.V1NodeList(metadata=client.V1ListMeta(), items=[_kube_node("new-2")]),
+    ]
+    provider = _provider([_node("old-1")], kube_api)
+
+    assert provider._ready_node_names() == { "new-1", "new-2" }
+    first, second = kube_api.list_node.call_args_list
+    assert first.kwargs == { "limit": 500 } and second.kwargs["_continue"] == "next"
+
+    cache = mocker.MagicMock()
+    cache.items.return_value = [NodeRecord("new-1", ready=True), NodeRecord("new-2")]
+    provider = SelfManaged([_node("old-1")], kube_api=kube_api, node_cache=cache)
+    assert provider._ready_node_names() == { "new-1" }
+    assert kube_api.list_node.call_count == 2
+
+
+@pytest.fixture
+def webhook():
+  # A local stand-in for an on-prem provisioning service.
+  class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+      pass
+
+    def do_POST(self):
+      length = int(self.headers["Content-Length"])
+      with server.lock:
+        server.received.append(json.loads(self.rfile.read(length)))
+        status = 503 if server.failures > 0 else server.status
+        server.failures -= 1
+      self.send_response(status)
+      self.end_headers()
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  server.lock = threading.Lock()
+  server.received = []
+  server.failures = 0
+  server.status = 200
+  server.url = f"http://127.0.0.1:{server.server_address[1]}/hooks"
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  yield server
+  server.shutdown()
+
+
+def _provider(nodes, kube_api, **hooks):
+  provider = SelfManaged(nodes, provision_time=5, kube_api=kube_api, journal=RotationJournal(), **hooks)
+  provider.poll_interval = 0.01
+  return provider
+
+
+def _script(tmp_path, source):
+  path = tmp_path / "hook.py"
+  path.write_text(textwrap.dedent(source))
+  return f"{sys.executable} {path}"
+
+
+def _node(name):
+  return NodeRecord(name, pool="pool-1")
+
+
+def _kube_node(name):
+  return client.V1Node(
+    metadata=client.V1ObjectMeta(name=name),
+    status=client.V1NodeStatus(conditions=[client.V1NodeCondition(type="Ready", status="True")])
+  )
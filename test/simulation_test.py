@@ -0,0 +1,70 @@
+'''
+' Unit tests of the rotation simulation.
+'
+' @file: simulation_test.py
+' @author: Abdullah Alotaibi
+' @date: 18/10/2026
+'
+'''
+import time
+from src.metrics import Metrics
+from src.records import NodeRecord, PodRecord
+from src.simulation import Latencies, RotationSimulator, VirtualClock, Worker
+
+class TestSimulation:
+
+  def test_virtual_clock_jumps_between_events_in_order(self):
+    clock = VirtualClock()
+    worker = Worker(clock)
+    finished = []
+
+    def job(name, seconds):
+      yield worker.acquire()
+      yield seconds
+      finished.append((name, clock.now))
+      worker.release()
+
+    clock.process(job("slow", 100))
+    clock.process(job("fast", 1))
+    started = time.monotonic()
+
+    assert clock.run() == 101
+    assert finished == [("slow", 100), ("fast", 101)]
+    assert time.monotonic() - started < 1
+
+  def test_bulk_and_pipelined_flows(self):
+    latencies = Latencies(cordon=1, provision=10, delete=5)
+    simulator = RotationSimulator([NodeRecord("a"), NodeRecord("b")], {}, latencies=latencies, plan=False)
+
+    bulk = simulator.simulate(1)
+    assert bulk["total"] == 17
+    assert bulk["peak_extra"] == 2
+
+    # provision(b) overlaps draining a, delete(a) waits for the provider after it.
+    pipelined = simulator.simulate(1, pipelined=True)
+    assert pipelined["total"] == 30
+    assert [(b["provisioned"], b["drained"], b["deleted"]) for b in pipelined["batches"]] == [
+      (10, 11, 25), (20, 21, 30)
+    ]
+
+  def test_drain_time_grows_with_pods_and_blocked_evictions(self):
+    latencies = Latencies(cordon=0, eviction=1, termination=10, blocked_retry=5, provision=0, delete=0)
+    pods = [PodRecord(f"web-{i}", node_name="a") for i in range(3)]
+    simulator = RotationSimulator([NodeRecord("a")], { "a": pods }, latencies=latencies, eviction_workers=2)
+
+    # two rounds of evictions, then the pods terminate.
+    assert simulator.simulate(1)["total"] == 2 + 10
+
+  def test_latencies_are_taken_from_an_earlier_runs_metrics(self):
+    metrics = Metrics()
+    metrics.phases.update({ "provision": 420.0, "resize": 90.0 })
+    metrics.node_steps.update({ ("a", "wait"): 20.0, ("b", "wait"): 40.0, ("a", "cordon"): 0.5 })
+    metrics.observe_api_call("kubernetes", "create_namespaced_pod_eviction", 0.2)
+    metrics.observe_api_call("kubernetes", "create_namespaced_pod_eviction", 0.4)
+
+    latencies = Latencies.from_metrics(metrics.render(), blocked_retry=7)
+
+    assert (latencies.provision, latencies.delete, latencies.termination) == (420.0, 90.0, 30.0)
+    assert round(latencies.eviction, 3) == 0.3
+    assert latencies.cordon == 0.5
+    assert latencies.blocked_retry == 7